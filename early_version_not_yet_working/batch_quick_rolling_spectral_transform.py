@@ -0,0 +1,806 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        batch_quick_rolling_spectral_transform.py
+#        -----------------------------------------
+#
+#  Applies the Quick Rolling Spectral Transform (QRST) algorithm to
+#  many independent streams at once -- such as thousands of short
+#  clips or sensor channels -- in lockstep.  Every stream's octave
+#  histories are stored in NumPy arrays that have a leading stream
+#  dimension, and each calculation is done for all the streams in a
+#  single vectorized step.  The peaks and the troughs are also looked
+#  for at the same time, with the troughs found as peaks after the
+#  samples are mirrored vertically (negated).
+#
+#  All the streams start together and receive one sample each at the
+#  same time, so they share the same time counter, and therefore the
+#  same octave firing schedule, the same track at each octave, and the
+#  same measurement windows.  Only the sample values (and everything
+#  calculated from them) differ from one stream to the next.  As a
+#  result, the interpreter overhead is paid once for each sample time,
+#  not once for each stream, and the throughput grows with the number
+#  of streams.
+#
+#  Each stream produces the same results as a separate run of the
+#  "quick_rolling_spectral_transform" function (in its own process),
+#  including that function's current behaviour:  the lowest of the
+#  specified octaves is not calculated, the line-crossing cycle
+#  counter only runs at octave 14, and the calculations use the same
+#  floating-point operations in the same order.  The debugging output
+#  (the text-waveform file) is not written.
+#
+#  Optionally the sum of two (or four) samples of the next-higher
+#  octave, from which each octave's samples are calculated, is
+#  replaced by one of the integer half-band decimation kernels in
+#  "half_band_decimation_filters.py" (such as "half_band_15"), which
+#  reject more of the signal that would otherwise alias into the
+#  octave.  The kernel is applied to the next-higher octave's filtered
+#  samples in the order that octave fires (both tracks), and its
+#  output -- twice the filtered average -- is used with the same
+#  peak-and-trough adjustments.  The default kernel, "pair_sum", keeps
+#  the results the same as the "quick_rolling_spectral_transform"
+#  function's results.
+#
+#  The "quick_rolling_spectral_transform" function raises a
+#  ZeroDivisionError when the peak-to-peak distance of the samples so
+#  far -- as tracked for its debugging output -- is less than two,
+#  which happens when the first sample is between -1024 and 1024.
+#  Here such a stream is stopped instead:  the sample number at which
+#  it stopped is recorded, and from then on it only returns zero
+#  amplitudes and zero wavelengths.
+#
+#  Sample usage:
+#
+#      transform = batch_quick_rolling_spectral_transform.BatchQuickRollingSpectralTransform( number_of_streams , 7 , 24 )
+#      list_of_octave_results = transform.transform_block( block_of_samples_at_stream_and_time )
+#      for ( sample_offset , octave , amplitudes , scaled_wavelengths ) in list_of_octave_results:
+#          ...
+#
+#      transform = batch_quick_rolling_spectral_transform.BatchQuickRollingSpectralTransform( number_of_streams , 7 , 24 , decimation_kernel="half_band_15" )
+#
+#  Sample usage from the command line, to measure the throughput at
+#  several numbers of streams:
+#
+#      python batch_quick_rolling_spectral_transform.py --stream-counts 1,16,256,4096
+#      python batch_quick_rolling_spectral_transform.py --stream-counts 256 --decimation-kernel half_band_15
+#
+#  With "--verify-fraction", a sampled fraction of the streams is also
+#  compared with the reference function while the engine runs (see
+#  "differential_verification.py"), which slows the measurement.  The
+#  comparison is only made with the "pair_sum" kernel, because the
+#  half-band kernels are not used by the reference function.
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Initialization.  These values match the
+#  "quick_rolling_spectral_transform" function.
+
+highest_octave = 15
+
+highest_octave_plus_one = highest_octave + 1
+
+output_wavelength_value_at_bottom_of_octave = 64
+output_wavelength_value_at_center_of_octave = output_wavelength_value_at_bottom_of_octave * 2
+output_wavelength_value_at_top_of_octave = ( output_wavelength_value_at_center_of_octave * 2 ) - 1
+
+cycle_distance_at_center_of_octave = 3
+
+maximum_considered_distance_to_recent_peak_or_trough = 12
+
+number_of_saved_samples_per_octave = 8 + maximum_considered_distance_to_recent_peak_or_trough
+
+most_recent_sample_pointer = number_of_saved_samples_per_octave - 1
+
+next_most_recent_sample_pointer = most_recent_sample_pointer - 1
+
+delayed_sample_pointer = 1
+
+number_of_tracks = 2
+
+peaks = 0
+troughs = 1
+
+scale_for_adjustment_values = 0.5
+
+scale_for_threshold_for_gap_to_line_distance = 0.01
+
+octave_with_line_crossing_cycle_counter = 14
+
+initial_maximum_sample_value = - ( 2 ** 10 )
+
+initial_minimum_sample_value = 2 ** 10
+
+
+#----------------------------------------------------------------------
+#  Each history of saved samples (and adjustment values) is stored
+#  twice in a row -- as in "rolling_spectrogram_buffer.py" -- so that
+#  the saved samples, ordered from the oldest to the newest, are always
+#  a contiguous part of the stored history, starting at the position of
+#  the oldest saved sample.  A sample pointer of the
+#  "quick_rolling_spectral_transform" function is therefore the
+#  offset from that position.  Making room for a new sample only
+#  requires advancing that position, instead of shifting all the saved
+#  samples of all the streams.
+
+number_of_stored_samples_per_octave = 2 * number_of_saved_samples_per_octave
+
+
+#----------------------------------------------------------------------
+#  For each tested peak-to-peak distance (2, 3, or 4 sample intervals),
+#  list the sample pointers at which the gap to the straight line is
+#  checked -- all the involved samples except the two samples that
+#  the line is drawn through -- and each pointer's distance from the
+#  most recent sample.
+#  Only the most recent samples -- the ones involved at the largest
+#  distance -- are copied for these calculations, so the pointers are
+#  also listed relative to the first of those samples.
+
+tested_peak_to_peak_distances = ( 2 , 3 , 4 )
+
+first_involved_sample_pointer = most_recent_sample_pointer - ( max( tested_peak_to_peak_distances ) + 3 ) + 1
+
+next_most_recent_involved_sample_pointer = next_most_recent_sample_pointer - first_involved_sample_pointer
+
+involved_sample_pointers_checked_at_distance = { }
+distances_from_most_recent_sample_at_distance = { }
+for peak_to_peak_distance_being_tested in tested_peak_to_peak_distances:
+    number_of_samples_involved = peak_to_peak_distance_being_tested + 3
+    sample_pointers_checked = numpy.array( [ sample_pointer for sample_pointer in range( most_recent_sample_pointer - number_of_samples_involved + 1 , most_recent_sample_pointer + 1 ) if ( sample_pointer != next_most_recent_sample_pointer ) and ( sample_pointer != ( next_most_recent_sample_pointer - peak_to_peak_distance_being_tested ) ) ] )
+    involved_sample_pointers_checked_at_distance[ peak_to_peak_distance_being_tested ] = sample_pointers_checked - first_involved_sample_pointer
+    distances_from_most_recent_sample_at_distance[ peak_to_peak_distance_being_tested ] = ( most_recent_sample_pointer - sample_pointers_checked )[ : , None , None ]
+# }
+
+
+#----------------------------------------------------------------------
+#  When a peak (or trough) pair is found at a distance, the adjustment
+#  values from that distance before the next-most-recent sample up to
+#  the next-most-recent sample are updated.  These are the sample
+#  pointers that can be updated, and the smallest distance at which
+#  each of them is updated.
+
+adjusted_sample_pointers = numpy.arange( next_most_recent_sample_pointer - max( tested_peak_to_peak_distances ) , next_most_recent_sample_pointer + 1 )
+
+smallest_distance_that_adjusts_sample_pointer = next_most_recent_sample_pointer - adjusted_sample_pointers
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that holds the state of all the streams.
+
+class BatchQuickRollingSpectralTransform:
+
+    "Applies the QRST algorithm to many streams in lockstep"
+
+
+#----------------------------------------------------------------------
+#  Initialize the state of all the streams.  The filtered samples are
+#  set to each stream's first sample when that sample arrives.  The
+#  decimation kernel is named as in "half_band_decimation_filters.py".
+
+    def __init__( self , number_of_streams , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , decimation_kernel="pair_sum" ):
+        self.number_of_streams = number_of_streams
+        self.number_of_octaves_for_calculations = number_of_octaves_for_calculations
+        self.number_of_samples_for_wavelength_measurement = number_of_samples_for_wavelength_measurement
+        self.calculated_octaves = tuple( range( highest_octave , highest_octave_plus_one - number_of_octaves_for_calculations , -1 ) )
+        self.bit_representing_octave_at_octave = [ ( 2 ** ( highest_octave - octave ) ) for octave in range( highest_octave_plus_one ) ]
+        self.bit_representing_octave_at_octave[ highest_octave ] = 1
+        self.scale_value_for_output_amplitude_at_octave = [ ( 1 / 1.4 ) ** ( highest_octave - octave ) for octave in range( highest_octave_plus_one ) ]
+        self.scale_value_for_output_amplitude_at_octave[ highest_octave ] = 1
+
+#  The time counter, the positions of the oldest saved samples, and
+#  the measurement-window counters are the same for all the streams.
+
+        self.time_counter = 0
+        self.number_of_samples_so_far = 0
+        self.position_of_oldest_sample_at_octave_and_track = [ [ 0 for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ]
+        self.number_of_accumulated_samples_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+
+#  The histories of filtered samples and adjustment values, in a
+#  separate array for each octave and track, so that the values used
+#  together are close together in memory.  Only the calculated octaves
+#  have histories.  The filtered samples are integers stored in 64
+#  bits, as in the reference function, because each lower octave
+#  roughly doubles the range of the samples.  The adjustment values
+#  can have fractions.
+
+        self.filtered_sample_at_stream_and_position_at_octave_and_track = [ None for octave in range( highest_octave_plus_one ) ]
+        self.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track = [ None for octave in range( highest_octave_plus_one ) ]
+        for octave in self.calculated_octaves:
+            self.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ] = [ numpy.zeros( ( number_of_streams , number_of_stored_samples_per_octave ) , dtype=numpy.int64 ) for track in range( number_of_tracks ) ]
+            self.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track[ octave ] = [ numpy.zeros( ( number_of_streams , 2 , number_of_stored_samples_per_octave ) , dtype=numpy.float64 ) for track in range( number_of_tracks ) ]
+        # }
+
+#  The values accumulated during each measurement window.
+
+        self.distance_total_at_stream_and_octave = numpy.zeros( ( number_of_streams , highest_octave_plus_one ) , dtype=numpy.int64 )
+        self.count_of_peaks_and_troughs_at_stream_and_octave = numpy.zeros( ( number_of_streams , highest_octave_plus_one ) , dtype=numpy.int64 )
+        self.accumulated_amplitude_at_stream_and_octave = numpy.zeros( ( number_of_streams , highest_octave_plus_one ) , dtype=numpy.float64 )
+
+#  The values used by the line-crossing cycle counter.
+
+        self.distance_from_most_recent_trough_pair_at_stream = numpy.full( number_of_streams , maximum_considered_distance_to_recent_peak_or_trough + 1 , dtype=numpy.int64 )
+        self.amplitude_at_most_recent_trough_pair_at_stream = numpy.zeros( number_of_streams , dtype=numpy.float64 )
+
+#  The peak-to-peak tracking that can stop a stream.
+
+        self.maximum_sample_value_at_stream = numpy.full( number_of_streams , initial_maximum_sample_value , dtype=numpy.float64 )
+        self.minimum_sample_value_at_stream = numpy.full( number_of_streams , initial_minimum_sample_value , dtype=numpy.float64 )
+        self.sample_number_at_stop_for_stream = numpy.full( number_of_streams , -1 , dtype=numpy.int64 )
+        self.is_stopped_at_stream = numpy.zeros( number_of_streams , dtype=bool )
+
+#  When a half-band kernel is used, each calculated octave also keeps
+#  its most recent filtered samples -- as many as the kernel has taps,
+#  from both tracks, in the order the octave fires -- stored twice in
+#  a row like the other histories.  The half-band kernels are only
+#  imported when one is used.
+
+        self.decimation_kernel = decimation_kernel
+        self.decimation_history_at_octave = [ None for octave in range( highest_octave_plus_one ) ]
+        self.position_of_oldest_decimation_sample_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+        if decimation_kernel != "pair_sum":
+            import half_band_decimation_filters
+            if decimation_kernel not in half_band_decimation_filters.kernel_for_name:
+                raise ValueError( "unknown decimation kernel:  %s" % decimation_kernel )
+            # }
+            kernel = half_band_decimation_filters.kernel_for_name[ decimation_kernel ]
+            self.number_of_decimation_taps = len( kernel )
+            self.list_of_nonzero_decimation_taps = [ ( tap , coefficient ) for ( tap , coefficient ) in enumerate( kernel ) if coefficient != 0 ]
+            self.number_of_bits_in_decimation_sum = half_band_decimation_filters.number_of_bits_in_sum_for_name[ decimation_kernel ]
+            for octave in self.calculated_octaves:
+                self.decimation_history_at_octave[ octave ] = numpy.zeros( ( number_of_streams , 2 * self.number_of_decimation_taps ) , dtype=numpy.int64 )
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the number of bytes used by each stream's state -- all the
+#  arrays that have a stream dimension -- which depends on the number
+#  of calculated octaves.
+
+    def bytes_used_per_stream( self ):
+        list_of_arrays = [ self.distance_total_at_stream_and_octave , self.count_of_peaks_and_troughs_at_stream_and_octave , self.accumulated_amplitude_at_stream_and_octave , self.distance_from_most_recent_trough_pair_at_stream , self.amplitude_at_most_recent_trough_pair_at_stream , self.maximum_sample_value_at_stream , self.minimum_sample_value_at_stream , self.sample_number_at_stop_for_stream , self.is_stopped_at_stream ]
+        for octave in self.calculated_octaves:
+            list_of_arrays.extend( self.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ] )
+            list_of_arrays.extend( self.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track[ octave ] )
+            if self.decimation_history_at_octave[ octave ] is not None:
+                list_of_arrays.append( self.decimation_history_at_octave[ octave ] )
+            # }
+        # }
+        return sum( [ stream_array.nbytes for stream_array in list_of_arrays ] ) // self.number_of_streams
+    # }
+
+
+#----------------------------------------------------------------------
+#  Make room for a new sample at the specified octave and track, for
+#  all streams, and set its adjustment values to zero.  Return the
+#  position of the newest sample's first copy.
+
+    def advance_history( self , octave , track ):
+        position_of_oldest_sample = ( self.position_of_oldest_sample_at_octave_and_track[ octave ][ track ] + 1 ) % number_of_saved_samples_per_octave
+        self.position_of_oldest_sample_at_octave_and_track[ octave ][ track ] = position_of_oldest_sample
+        position_of_newest_sample = ( position_of_oldest_sample + most_recent_sample_pointer ) % number_of_saved_samples_per_octave
+        for position in ( position_of_newest_sample , position_of_newest_sample + number_of_saved_samples_per_octave ):
+            self.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track[ octave ][ track ][ : , : , position ] = 0
+        # }
+        return position_of_newest_sample
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the saved samples (or adjustment values) at the specified
+#  octave and track -- for all streams -- ordered from the oldest to
+#  the newest, so that they can be accessed with the sample pointers
+#  of the "quick_rolling_spectral_transform" function.
+
+    def saved_samples( self , octave , track ):
+        position_of_oldest_sample = self.position_of_oldest_sample_at_octave_and_track[ octave ][ track ]
+        return self.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ][ track ][ : , position_of_oldest_sample : ( position_of_oldest_sample + number_of_saved_samples_per_octave ) ]
+    # }
+
+    def saved_adjustment_values( self , octave , track ):
+        position_of_oldest_sample = self.position_of_oldest_sample_at_octave_and_track[ octave ][ track ]
+        return self.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track[ octave ][ track ][ : , : , position_of_oldest_sample : ( position_of_oldest_sample + number_of_saved_samples_per_octave ) ]
+    # }
+
+
+#----------------------------------------------------------------------
+#  Update the filtered sample at the specified octave and track, for
+#  all streams, after making room for it.  The additions are done in
+#  the same order as in the "quick_rolling_spectral_transform"
+#  function so that the floating-point results are identical.  With a
+#  half-band kernel, its output replaces the sum of the next-higher
+#  octave's samples (or half of the sum of four samples).
+
+    def update_filtered_samples( self , octave , track , other_track , current_samples ):
+        position_of_newest_sample = self.advance_history( octave , track )
+
+        if octave == highest_octave:
+            filtered_samples = current_samples
+        elif octave == highest_octave - 1:
+            higher_samples = self.saved_samples( octave + 1 , 0 )
+            higher_adjustment_values = self.saved_adjustment_values( octave + 1 , 0 )
+            sum_of_two_samples_at_higher_octave = higher_samples[ : , delayed_sample_pointer ] + higher_samples[ : , delayed_sample_pointer + 1 ]
+            sum_of_adjustment_values = higher_adjustment_values[ : , peaks , delayed_sample_pointer ] + higher_adjustment_values[ : , troughs , delayed_sample_pointer + 1 ]
+            decimated_samples = sum_of_two_samples_at_higher_octave
+            if self.decimation_kernel != "pair_sum":
+                decimated_samples = self.half_band_decimated_samples( octave + 1 )
+            # }
+            filtered_samples = numpy.trunc( decimated_samples + ( sum_of_adjustment_values * scale_for_adjustment_values ) )
+
+#  The peak-to-peak tracking (for debugging output) also includes this
+#  octave's sums.
+
+            numpy.maximum( self.maximum_sample_value_at_stream , sum_of_two_samples_at_higher_octave , out=self.maximum_sample_value_at_stream )
+            numpy.minimum( self.minimum_sample_value_at_stream , sum_of_two_samples_at_higher_octave , out=self.minimum_sample_value_at_stream )
+        else:
+            higher_samples_in_track_zero = self.saved_samples( octave + 1 , 0 )
+            higher_samples_in_track_one = self.saved_samples( octave + 1 , 1 )
+            higher_adjustment_values_in_track = self.saved_adjustment_values( octave + 1 , track )
+            higher_adjustment_values_in_other_track = self.saved_adjustment_values( octave + 1 , other_track )
+            sum_of_four_samples_at_higher_octave = higher_samples_in_track_zero[ : , delayed_sample_pointer ] + higher_samples_in_track_zero[ : , delayed_sample_pointer + 1 ] + higher_samples_in_track_one[ : , delayed_sample_pointer ] + higher_samples_in_track_one[ : , delayed_sample_pointer + 1 ]
+            sum_of_adjustment_values = higher_adjustment_values_in_track[ : , peaks , delayed_sample_pointer ] + higher_adjustment_values_in_track[ : , troughs , delayed_sample_pointer + 1 ] + higher_adjustment_values_in_other_track[ : , peaks , delayed_sample_pointer ] + higher_adjustment_values_in_other_track[ : , troughs , delayed_sample_pointer + 1 ]
+            decimated_samples = sum_of_four_samples_at_higher_octave / 2
+            if self.decimation_kernel != "pair_sum":
+                decimated_samples = self.half_band_decimated_samples( octave + 1 )
+            # }
+            filtered_samples = numpy.trunc( decimated_samples + ( sum_of_adjustment_values * scale_for_adjustment_values ) )
+        # }
+
+        for position in ( position_of_newest_sample , position_of_newest_sample + number_of_saved_samples_per_octave ):
+            self.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ][ track ][ : , position ] = filtered_samples
+        # }
+        if self.decimation_history_at_octave[ octave ] is not None:
+            position_of_oldest_sample = self.position_of_oldest_decimation_sample_at_octave[ octave ]
+            for position in ( position_of_oldest_sample , position_of_oldest_sample + self.number_of_decimation_taps ):
+                self.decimation_history_at_octave[ octave ][ : , position ] = filtered_samples
+            # }
+            self.position_of_oldest_decimation_sample_at_octave[ octave ] = ( position_of_oldest_sample + 1 ) % self.number_of_decimation_taps
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Apply the half-band kernel to the most recent filtered samples of
+#  the specified octave, for all streams, and return twice the
+#  filtered average, rounded, as in "half_band_decimation_filters.py".
+#  The kernel is symmetric, so its taps can be applied from the oldest
+#  sample.
+
+    def half_band_decimated_samples( self , octave ):
+        position_of_oldest_sample = self.position_of_oldest_decimation_sample_at_octave[ octave ]
+        recent_samples = self.decimation_history_at_octave[ octave ][ : , position_of_oldest_sample : ( position_of_oldest_sample + self.number_of_decimation_taps ) ]
+        sums = numpy.zeros( self.number_of_streams , dtype=numpy.int64 )
+        for ( tap , coefficient ) in self.list_of_nonzero_decimation_taps:
+            sums += coefficient * recent_samples[ : , tap ]
+        # }
+        return ( sums + ( 1 << ( self.number_of_bits_in_decimation_sum - 2 ) ) ) >> ( self.number_of_bits_in_decimation_sum - 1 )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Look for peak pairs and trough pairs -- at distances of 2, 3, and 4
+#  sample intervals -- at the specified octave and track, for all
+#  streams at once.  For each stream, and for peaks and for troughs,
+#  the first distance whose straight line stays above all the involved
+#  samples (by a significant amount) is the match.  Return the matched
+#  distances (zero for no match), the largest gaps to the line, and
+#  the straight-line values at the most recent time, each with one row
+#  for each stream and one column for peaks and one for troughs.
+#  The involved samples are copied with the time offset as the first
+#  dimension, because NumPy is much faster at finding the largest
+#  value (and so on) along the first dimension than along a short
+#  last dimension.
+
+    def find_peak_and_trough_pairs( self , octave , track ):
+        involved_samples = numpy.ascontiguousarray( self.saved_samples( octave , track )[ : , first_involved_sample_pointer : ( most_recent_sample_pointer + 1 ) ].T )
+        mirrored_samples = numpy.stack( ( involved_samples , - involved_samples ) , axis=2 )
+
+        match_at_distance = numpy.zeros( ( self.number_of_streams , 2 ) , dtype=numpy.int64 )
+        largest_gap_to_line = numpy.zeros( ( self.number_of_streams , 2 ) , dtype=numpy.float64 )
+        straight_line_value_at_most_recent_time = numpy.zeros( ( self.number_of_streams , 2 ) , dtype=numpy.float64 )
+        for peak_to_peak_distance_being_tested in tested_peak_to_peak_distances:
+            slope = ( mirrored_samples[ next_most_recent_involved_sample_pointer ] - mirrored_samples[ next_most_recent_involved_sample_pointer - peak_to_peak_distance_being_tested ] ) / peak_to_peak_distance_being_tested
+            straight_line_values = mirrored_samples[ next_most_recent_involved_sample_pointer ] + slope
+            gaps_to_line = mirrored_samples[ involved_sample_pointers_checked_at_distance[ peak_to_peak_distance_being_tested ] ] - ( straight_line_values[ None ] - ( slope[ None ] * distances_from_most_recent_sample_at_distance[ peak_to_peak_distance_being_tested ] ) )
+            positive_gaps_to_line = numpy.abs( gaps_to_line )
+            largest_gaps = positive_gaps_to_line.max( axis=0 )
+            threshold_gap_to_line_distance = numpy.trunc( largest_gaps * scale_for_threshold_for_gap_to_line_distance )
+            is_match = ( gaps_to_line < 0 ).all( axis=0 ) & ( positive_gaps_to_line >= threshold_gap_to_line_distance[ None ] ).all( axis=0 )
+            is_new_match = is_match & ( match_at_distance == 0 )
+            numpy.copyto( match_at_distance , peak_to_peak_distance_being_tested , where=is_new_match )
+            numpy.copyto( largest_gap_to_line , largest_gaps , where=is_new_match )
+            numpy.copyto( straight_line_value_at_most_recent_time , straight_line_values , where=is_new_match )
+        # }
+        return ( match_at_distance , largest_gap_to_line , straight_line_value_at_most_recent_time )
+    # }
+
+
+#----------------------------------------------------------------------
+#  For the matched peak and trough pairs, update the measurement-window
+#  totals and calculate the adjustment values that remove the matched
+#  cycles from the next-lower octave.  A zero adjustment value becomes
+#  half the cycle amplitude -- negative for peaks and positive for
+#  troughs -- and a non-zero one is averaged with it.
+#  Both copies of each adjustment value are updated.
+
+    def add_peak_and_trough_pairs( self , octave , track , match_at_distance , largest_gap_to_line ):
+        is_matched = match_at_distance != 0
+        for peaks_or_troughs in ( peaks , troughs ):
+            self.distance_total_at_stream_and_octave[ : , octave ] += match_at_distance[ : , peaks_or_troughs ]
+            self.count_of_peaks_and_troughs_at_stream_and_octave[ : , octave ] += is_matched[ : , peaks_or_troughs ]
+            self.accumulated_amplitude_at_stream_and_octave[ : , octave ] += numpy.where( is_matched[ : , peaks_or_troughs ] , largest_gap_to_line[ : , peaks_or_troughs ] , 0.0 )
+        # }
+        if not numpy.any( is_matched ):
+            return
+        # }
+
+        positions = ( self.position_of_oldest_sample_at_octave_and_track[ octave ][ track ] + adjusted_sample_pointers ) % number_of_saved_samples_per_octave
+        adjustment_history = self.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track[ octave ][ track ]
+        adjustments = adjustment_history[ : , : , positions ]
+        half_of_cycle_amplitudes = numpy.abs( largest_gap_to_line / 2 )
+        new_adjustment_values = numpy.stack( ( - half_of_cycle_amplitudes[ : , peaks ] , half_of_cycle_amplitudes[ : , troughs ] ) , axis=1 )[ : , : , None ]
+        is_adjusted = is_matched[ : , : , None ] & ( smallest_distance_that_adjusts_sample_pointer[ None , None , : ] <= match_at_distance[ : , : , None ] )
+        adjusted_values = numpy.where( adjustments == 0 , new_adjustment_values , numpy.trunc( ( adjustments + new_adjustment_values ) / 2 ) )
+        adjustments = numpy.where( is_adjusted , adjusted_values , adjustments )
+        adjustment_history[ : , : , positions ] = adjustments
+        adjustment_history[ : , : , positions + number_of_saved_samples_per_octave ] = adjustments
+    # }
+
+
+#----------------------------------------------------------------------
+#  At octave 14 -- because of where this section is located in the
+#  "quick_rolling_spectral_transform" function -- a matched trough pair
+#  is also compared with the most recent earlier trough pair.  If they
+#  are far enough apart, the significant crossings of the straight line
+#  between their centers are counted as additional cycles.
+
+    def count_line_crossing_cycles( self , octave , track , match_at_distance , largest_gap_to_line , straight_line_value_at_most_recent_time ):
+        peak_or_trough_multiplier = -1
+        match_of_troughs = match_at_distance[ : , troughs ]
+        distance_to_recent_trough = self.distance_from_most_recent_trough_pair_at_stream
+        is_matched = match_of_troughs != 0
+        stream_numbers = numpy.nonzero( is_matched & ( ( distance_to_recent_trough - match_of_troughs ) > 2 ) & ( distance_to_recent_trough < maximum_considered_distance_to_recent_peak_or_trough ) )[ 0 ]
+
+        if len( stream_numbers ) > 0:
+            samples = self.saved_samples( octave , track )[ stream_numbers ]
+            match_distances = match_of_troughs[ stream_numbers ]
+            recent_distances = distance_to_recent_trough[ stream_numbers ]
+            largest_gaps = largest_gap_to_line[ stream_numbers , troughs ]
+            half_amplitude_at_recent_trough = self.amplitude_at_most_recent_trough_pair_at_stream[ stream_numbers ] / 2
+            center_of_most_recent_trough = ( samples[ : , next_most_recent_sample_pointer ] - half_amplitude_at_recent_trough ) * peak_or_trough_multiplier
+            center_of_previously_identified_trough = ( straight_line_value_at_most_recent_time[ stream_numbers , troughs ] - half_amplitude_at_recent_trough ) * peak_or_trough_multiplier
+            slope = ( center_of_most_recent_trough - center_of_previously_identified_trough ) / recent_distances
+            count_of_line_crossings = numpy.ones( len( stream_numbers ) , dtype=numpy.int64 )
+            direction_needed_for_crossing = numpy.full( len( stream_numbers ) , -1 , dtype=numpy.int64 )
+            threshold_for_crossings = 0.2 * half_amplitude_at_recent_trough
+            for sample_pointer_offset in range( min( tested_peak_to_peak_distances ) , maximum_considered_distance_to_recent_peak_or_trough ):
+                distance_from_line = center_of_most_recent_trough - ( slope * sample_pointer_offset ) - ( samples[ : , most_recent_sample_pointer - sample_pointer_offset ] * peak_or_trough_multiplier )
+                is_crossing = ( sample_pointer_offset >= match_distances ) & ( sample_pointer_offset <= recent_distances ) & ( ( distance_from_line * direction_needed_for_crossing ) > threshold_for_crossings )
+                count_of_line_crossings += is_crossing
+                direction_needed_for_crossing[ is_crossing ] *= -1
+            # }
+            cycle_count = count_of_line_crossings // 2
+            self.distance_total_at_stream_and_octave[ stream_numbers , octave ] += recent_distances - match_distances - 1
+            self.count_of_peaks_and_troughs_at_stream_and_octave[ stream_numbers , octave ] += cycle_count
+            self.accumulated_amplitude_at_stream_and_octave[ stream_numbers , octave ] += largest_gaps * cycle_count
+        # }
+
+        self.amplitude_at_most_recent_trough_pair_at_stream[ is_matched ] = largest_gap_to_line[ is_matched , troughs ]
+        distance_to_recent_trough[ is_matched ] = 0
+        distance_to_recent_trough += 1
+    # }
+
+
+#----------------------------------------------------------------------
+#  Finish a measurement window at the specified octave, for all
+#  streams, and return the amplitudes and scaled wavelengths.
+
+    def finish_measurement_window( self , octave ):
+        count_of_peaks_and_troughs = self.count_of_peaks_and_troughs_at_stream_and_octave[ : , octave ]
+        distance_total = self.distance_total_at_stream_and_octave[ : , octave ]
+        accumulated_amplitude = self.accumulated_amplitude_at_stream_and_octave[ : , octave ]
+
+        has_peaks_and_troughs = count_of_peaks_and_troughs > 0
+        is_valid = has_peaks_and_troughs & ( distance_total > 0 ) & ( accumulated_amplitude > 0 )
+        scaled_wavelength_counts = numpy.trunc( ( output_wavelength_value_at_center_of_octave * distance_total ) / ( numpy.maximum( count_of_peaks_and_troughs , 1 ) * cycle_distance_at_center_of_octave ) )
+        scaled_wavelength_counts = numpy.clip( scaled_wavelength_counts , output_wavelength_value_at_bottom_of_octave , output_wavelength_value_at_top_of_octave )
+        scaled_wavelength_counts = numpy.where( is_valid , scaled_wavelength_counts , 0 ).astype( numpy.int64 )
+        accumulated_amplitude = numpy.where( is_valid , accumulated_amplitude , 0.0 )
+
+        amplitudes = numpy.where( has_peaks_and_troughs , accumulated_amplitude / numpy.maximum( count_of_peaks_and_troughs , 1 ) , accumulated_amplitude )
+        amplitudes = amplitudes * self.scale_value_for_output_amplitude_at_octave[ octave ]
+        is_below_one = amplitudes < 1
+        scaled_wavelength_counts[ is_below_one ] = output_wavelength_value_at_center_of_octave
+        amplitudes[ is_below_one ] = 0
+
+        self.accumulated_amplitude_at_stream_and_octave[ : , octave ] = 0
+        self.count_of_peaks_and_troughs_at_stream_and_octave[ : , octave ] = 0
+        self.distance_total_at_stream_and_octave[ : , octave ] = 0
+
+        amplitudes[ self.is_stopped_at_stream ] = 0
+        scaled_wavelength_counts[ self.is_stopped_at_stream ] = 0
+        return ( amplitudes , scaled_wavelength_counts )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Start a new sample time, for all streams:  for the very first
+#  sample, put each stream's first sample into all its filtered sample
+#  positions, then advance the time counter, and stop any stream whose
+#  peak-to-peak distance so far is too small.
+
+    def start_sample_time( self , current_samples ):
+        if self.number_of_samples_so_far == 0:
+            for octave in self.calculated_octaves:
+                for track in range( number_of_tracks ):
+                    self.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ][ track ][ ... ] = current_samples[ : , None ]
+                # }
+                if self.decimation_history_at_octave[ octave ] is not None:
+                    self.decimation_history_at_octave[ octave ][ ... ] = current_samples[ : , None ]
+                # }
+            # }
+        # }
+        self.time_counter = self.time_counter + 1
+        if self.time_counter > 2 ** ( highest_octave * 4 ):
+            self.time_counter = 0
+        # }
+
+        numpy.maximum( self.maximum_sample_value_at_stream , current_samples , out=self.maximum_sample_value_at_stream )
+        numpy.minimum( self.minimum_sample_value_at_stream , current_samples , out=self.minimum_sample_value_at_stream )
+        is_stopping = ( numpy.trunc( ( self.maximum_sample_value_at_stream - self.minimum_sample_value_at_stream ) / 2 ) == 0 ) & ~ self.is_stopped_at_stream
+        if numpy.any( is_stopping ):
+            self.sample_number_at_stop_for_stream[ is_stopping ] = self.number_of_samples_so_far
+            self.is_stopped_at_stream |= is_stopping
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return True if the specified octave fires at the current time, and
+#  return the track (and the other track) used at that octave.  The
+#  time counter, and therefore the octaves and tracks, are the same
+#  for all streams.
+
+    def octave_fires( self , octave ):
+        return ( octave == highest_octave ) or ( ( self.time_counter % self.bit_representing_octave_at_octave[ octave ] ) == 0 )
+    # }
+
+    def tracks_at_octave( self , octave ):
+        if ( octave < highest_octave ) and ( ( ( self.time_counter // self.bit_representing_octave_at_octave[ octave ] ) % 2 ) == 0 ):
+            return ( 1 , 0 )
+        # }
+        return ( 0 , 1 )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Handle an octave that fires at the current time, for all streams.
+#  If this finishes a measurement window, return the amplitudes and
+#  scaled wavelength counts, otherwise return None.
+
+    def handle_octave_firing( self , octave , current_samples ):
+        ( track , other_track ) = self.tracks_at_octave( octave )
+        self.update_filtered_samples( octave , track , other_track , current_samples )
+        ( match_at_distance , largest_gap_to_line , straight_line_value_at_most_recent_time ) = self.find_peak_and_trough_pairs( octave , track )
+        self.add_peak_and_trough_pairs( octave , track , match_at_distance , largest_gap_to_line )
+        if octave == octave_with_line_crossing_cycle_counter:
+            self.count_line_crossing_cycles( octave , track , match_at_distance , largest_gap_to_line , straight_line_value_at_most_recent_time )
+        # }
+
+        self.number_of_accumulated_samples_at_octave[ octave ] = self.number_of_accumulated_samples_at_octave[ octave ] + 1
+        if self.number_of_accumulated_samples_at_octave[ octave ] < self.number_of_samples_for_wavelength_measurement:
+            return None
+        # }
+        self.number_of_accumulated_samples_at_octave[ octave ] = 0
+        return self.finish_measurement_window( octave )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Apply the QRST algorithm to one block of samples for each stream,
+#  supplied as an array with one row for each stream and one column
+#  for each sample time.  The samples must be integers.
+#  The octave results that became available during the block are
+#  returned as a list of results that each contain:  the sample offset
+#  (within the block) at which the results became available, the
+#  octave number, and the amplitudes and scaled wavelength counts of
+#  all the streams (as arrays).  A stopped stream's wavelength count
+#  is zero.
+
+    def transform_block( self , block_of_samples_at_stream_and_time ):
+        if self.number_of_samples_for_wavelength_measurement < 8:
+            return ( 1 )
+        # }
+        block_of_samples = numpy.asarray( block_of_samples_at_stream_and_time ).astype( numpy.float64 )
+        if ( block_of_samples.ndim != 2 ) or ( block_of_samples.shape[ 0 ] != self.number_of_streams ):
+            return ( 1 )
+        # }
+        samples_at_time_and_stream = numpy.ascontiguousarray( block_of_samples.T )
+
+        list_of_octave_results = [ ]
+        for sample_offset in range( samples_at_time_and_stream.shape[ 0 ] ):
+            current_samples = samples_at_time_and_stream[ sample_offset ]
+            self.start_sample_time( current_samples )
+            for octave in self.calculated_octaves:
+                if self.octave_fires( octave ):
+                    measurement = self.handle_octave_firing( octave , current_samples )
+                    if measurement is not None:
+                        list_of_octave_results.append( ( sample_offset , octave ) + measurement )
+                    # }
+                # }
+            # }
+            self.number_of_samples_so_far = self.number_of_samples_so_far + 1
+        # }
+
+
+#----------------------------------------------------------------------
+#  All done.
+
+        return list_of_octave_results
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that extracts one stream's octave results -- from
+#  the results returned for a block -- in the form returned by the
+#  "quick_rolling_spectral_transform_for_block" function.  Results at
+#  the same sample offset are returned from the highest to the lowest
+#  octave, as in that function.
+
+def octave_results_for_stream( list_of_octave_results , stream_number ):
+
+    "Returns one stream's octave results in the form of the single-stream block function"
+
+    list_of_octave_results_for_stream = [ ]
+    for ( sample_offset , octave , amplitudes , scaled_wavelength_counts ) in list_of_octave_results:
+        if scaled_wavelength_counts[ stream_number ] != 0:
+            list_of_octave_results_for_stream.append( ( sample_offset , octave , float( amplitudes[ stream_number ] ) , int( scaled_wavelength_counts[ stream_number ] ) ) )
+        # }
+    # }
+    return list_of_octave_results_for_stream
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that generates a different chirp for each stream
+#  (each with a different chirp length, as in
+#  "load_test_live_streams.py"), as an array with one row per stream.
+
+def generate_chirps_for_streams( number_of_streams , number_of_samples ):
+
+    "Generates one chirp signal for each stream"
+
+    import generate_signal_blocks_for_testing
+    samples_at_stream_and_time = numpy.zeros( ( number_of_streams , number_of_samples ) , dtype=numpy.int16 )
+    sample_rate = generate_signal_blocks_for_testing.default_parameters[ "sample_rate" ]
+    for stream_number in range( number_of_streams ):
+        parameters = generate_signal_blocks_for_testing.parameters_for_signal( "chirp" , duration_in_seconds=( number_of_samples / sample_rate ) , chirp_length_in_samples=( 20000 + ( 1000 * ( stream_number % 64 ) ) ) )
+        samples_at_stream_and_time[ stream_number ] = next( generate_signal_blocks_for_testing.generate_signal_blocks( parameters , number_of_samples ) )
+    # }
+    return samples_at_stream_and_time
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that measures the single-stream QRST function,
+#  in its own process (because it keeps its state in global values)
+#  and in a temporary directory (because it writes a text-waveform
+#  debugging file).
+
+def measure_single_stream_function_in_process( list_of_samples , samples_per_block , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , result_queue ):
+
+    "Measures the processor time of the single-stream block function"
+
+    os.chdir( tempfile.mkdtemp( prefix="qrst_batch_" ) )
+    import quick_rolling_spectral_transform
+    processor_time_at_start = time.process_time( )
+    for first_sample_number in range( 0 , len( list_of_samples ) , samples_per_block ):
+        quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( list_of_samples[ first_sample_number : first_sample_number + samples_per_block ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+    # }
+    result_queue.put( time.process_time( ) - processor_time_at_start )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that measures the throughput of the batch
+#  engine -- in stream samples per second -- at each number of streams,
+#  compared with the single-stream function.
+
+def main( ):
+
+    "Measures the throughput of the batch QRST engine at several numbers of streams"
+
+    parser = argparse.ArgumentParser( description="Throughput of the batch QRST engine at several numbers of streams" )
+    parser.add_argument( "--stream-counts" , default="1,16,256,4096" , help="comma-separated numbers of streams to try" )
+    parser.add_argument( "--samples-per-stream" , type=int , default=4096 , help="number of samples delivered to each stream" )
+    parser.add_argument( "--samples-per-block" , type=int , default=256 , help="number of samples delivered at a time" )
+    parser.add_argument( "--octaves" , type=int , default=7 , help="number_of_octaves_for_calculations" )
+    parser.add_argument( "--wavelength-samples" , type=int , default=24 , help="number_of_samples_for_wavelength_measurement" )
+    parser.add_argument( "--verify-fraction" , type=float , default=0.0 , help="fraction of the streams to compare with the reference function" )
+    parser.add_argument( "--decimation-kernel" , default="pair_sum" , help="decimation kernel, as named in half_band_decimation_filters.py (such as half_band_15)" )
+    arguments = parser.parse_args( )
+
+    number_of_samples = arguments.samples_per_stream
+    samples_per_block = arguments.samples_per_block
+    list_of_stream_counts = [ int( text ) for text in arguments.stream_counts.split( "," ) ]
+
+
+#----------------------------------------------------------------------
+#  Measure the single-stream function as the baseline.
+
+    samples_at_stream_and_time = generate_chirps_for_streams( 1 , number_of_samples )
+    context = multiprocessing.get_context( "spawn" )
+    result_queue = context.Queue( )
+    process = context.Process( target=measure_single_stream_function_in_process , args=( samples_at_stream_and_time[ 0 ].tolist( ) , samples_per_block , arguments.octaves , arguments.wavelength_samples , result_queue ) )
+    process.start( )
+    processor_time = result_queue.get( )
+    process.join( )
+    samples_per_second_of_single_stream_function = number_of_samples / processor_time
+    sys.stdout.write( "single-stream function:  %12.0f samples per second\n" % samples_per_second_of_single_stream_function )
+
+
+#----------------------------------------------------------------------
+#  Measure the batch engine at each number of streams.
+
+    for number_of_streams in list_of_stream_counts:
+        samples_at_stream_and_time = generate_chirps_for_streams( number_of_streams , number_of_samples )
+        transform = BatchQuickRollingSpectralTransform( number_of_streams , arguments.octaves , arguments.wavelength_samples , decimation_kernel=arguments.decimation_kernel )
+        verifier = None
+        if ( arguments.verify_fraction > 0 ) and ( arguments.decimation_kernel == "pair_sum" ):
+            import differential_verification
+            verifier = differential_verification.DifferentialVerifier( number_of_streams , arguments.octaves , arguments.wavelength_samples , fraction_of_streams=arguments.verify_fraction )
+            verifier.start( )
+        # }
+        processor_time_at_start = time.process_time( )
+        for first_sample_number in range( 0 , number_of_samples , samples_per_block ):
+            list_of_octave_results = transform.transform_block( samples_at_stream_and_time[ : , first_sample_number : first_sample_number + samples_per_block ] )
+            if verifier is not None:
+                verifier.verify_block( samples_at_stream_and_time[ : , first_sample_number : first_sample_number + samples_per_block ] , list_of_octave_results )
+            # }
+        # }
+        processor_time = time.process_time( ) - processor_time_at_start
+        if verifier is not None:
+            verifier.finish( )
+            sys.stdout.write( "%6d streams:  %d sampled streams match the reference function\n" % ( number_of_streams , len( verifier.sampled_stream_numbers ) ) )
+        # }
+        samples_per_second = ( number_of_streams * number_of_samples ) / processor_time
+        sys.stdout.write( "%6d streams:  %12.0f samples per second  (%7.1f times the single-stream function, %d streams stopped, %d bytes per stream)\n" % ( number_of_streams , samples_per_second , samples_per_second / samples_per_second_of_single_stream_function , int( numpy.count_nonzero( transform.is_stopped_at_stream ) ) , transform.bytes_used_per_stream( ) ) )
+    # }
+
+# }
+
+
+if __name__ == "__main__":
+    main( )
+# }
@@ -0,0 +1,409 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        benchmark_quick_rolling_spectral_transform.py
+#        ---------------------------------------------
+#
+#  Measures the throughput -- in samples per second -- and the peak
+#  memory of the Quick Rolling Spectral Transform (QRST) function,
+#  called one sample at a time and called one block at a time, and of
+#  the QRST encoder (the sample-usage code) and the QRST decoder.
+#  The QRST function is also measured over a range of values for the
+#  "number_of_octaves_for_calculations" and
+#  "number_of_samples_for_wavelength_measurement" parameters, and with
+#  additional measurement windows (which share the decimation and the
+#  peak-and-trough search), to show what each additional window costs.
+#
+#  Two input signals are used:  the synthetic chirp of
+#  "generate_signal_for_testing.py" (taken from the signal cache of
+#  "generate_signal_blocks_for_testing.py") and the bundled recording
+#  "sound_recording_votefair_ranking_unsigned_16bit_noheader.raw".
+#
+#  The results are written as JSON so that runs can be compared over
+#  time, and a previous results file can be supplied for comparison.
+#
+#  Sample usage:
+#
+#      python benchmark_quick_rolling_spectral_transform.py --output benchmark_results.json
+#      python benchmark_quick_rolling_spectral_transform.py --compare-with benchmark_results.json
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import generate_signal_blocks_for_testing
+
+
+#----------------------------------------------------------------------
+#  Specify where the code and the bundled recording are located.
+
+directory_containing_this_code = os.path.dirname( os.path.abspath( __file__ ) )
+
+path_to_bundled_recording = os.path.join( os.path.dirname( directory_containing_this_code ) , "sound_recording_votefair_ranking_unsigned_16bit_noheader.raw" )
+
+name_of_encoder_input_file = "output_binary_signal_for_testing_qrst.raw"
+
+
+#----------------------------------------------------------------------
+#  Specify the default parameters, and the parameter values that are
+#  swept.  The defaults match the sample-usage code.
+
+default_number_of_octaves_for_calculations = 8
+
+default_number_of_samples_for_wavelength_measurement = 24
+
+swept_numbers_of_octaves_for_calculations = ( 4 , 6 , 8 , 10 , 12 , 15 )
+
+swept_numbers_of_samples_for_wavelength_measurement = ( 8 , 16 , 24 , 32 , 48 )
+
+swept_additional_measurement_windows = ( ( 12 , ) , ( 12 , 48 ) )
+
+samples_per_block = 1024
+
+number_of_samples_traced_for_memory = 2000
+
+scale_for_amplitude = 100.0
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that reads a raw audio file in the same way as
+#  the sample-usage code:  little-endian 16-bit values, multiplied by
+#  the same amplitude scale.
+
+def read_samples_from_raw_file( path_to_raw_file , maximum_number_of_samples ):
+
+    "Reads 16-bit samples from a raw audio file and converts them to QRST integer units"
+
+    with open( path_to_raw_file , "rb" ) as raw_file:
+        packed_values = raw_file.read( maximum_number_of_samples * 2 )
+    # }
+    number_of_samples = int( len( packed_values ) / 2 )
+    return [ int( value * scale_for_amplitude ) for value in struct.unpack( "<%dh" % number_of_samples , packed_values[ 0 : number_of_samples * 2 ] ) ]
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that runs one QRST-function benchmark inside
+#  its own process.  A separate process is needed because the QRST
+#  function keeps its state in global variables, and it also keeps the
+#  peak-memory measurements separate.
+
+def run_transform_benchmark_in_process( benchmark , working_directory , result_queue ):
+
+    "Measures the throughput and memory of the QRST function for one benchmark"
+
+    os.chdir( working_directory )
+    sys.path.insert( 0 , directory_containing_this_code )
+    list_of_samples = read_samples_from_raw_file( benchmark[ "input_file" ] , benchmark[ "maximum_number_of_samples" ] )
+    number_of_octaves_for_calculations = benchmark[ "number_of_octaves_for_calculations" ]
+    number_of_samples_for_wavelength_measurement = benchmark[ "number_of_samples_for_wavelength_measurement" ]
+
+
+#----------------------------------------------------------------------
+#  Measure the peak memory allocated by the QRST code -- including the
+#  memory allocated when it is imported -- over a short run.  Memory
+#  tracing slows Python considerably, so it is not done while the
+#  throughput is measured.
+
+    tracemalloc.start( )
+    import quick_rolling_spectral_transform
+    quick_rolling_spectral_transform.enable_additional_measurement_windows( benchmark[ "numbers_of_samples_for_additional_measurement_windows" ] )
+    for current_sample in list_of_samples[ 0 : number_of_samples_traced_for_memory ]:
+        quick_rolling_spectral_transform.quick_rolling_spectral_transform( current_sample , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+    # }
+    ( current_traced_bytes , peak_traced_bytes ) = tracemalloc.get_traced_memory( )
+    tracemalloc.stop( )
+
+
+#----------------------------------------------------------------------
+#  Measure the throughput, continuing from the state left by the
+#  memory measurement.
+
+    processor_time_at_start = time.process_time( )
+    time_at_start = time.perf_counter( )
+    count_of_octave_results = 0
+    if benchmark[ "mode" ] == "per_sample":
+        for current_sample in list_of_samples:
+            returned_tuple = quick_rolling_spectral_transform.quick_rolling_spectral_transform( current_sample , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+            for wavelength in returned_tuple[ 1 ]:
+                if wavelength != 0:
+                    count_of_octave_results = count_of_octave_results + 1
+                # }
+            # }
+        # }
+    else:
+        for first_sample_number in range( 0 , len( list_of_samples ) , samples_per_block ):
+            lists_of_octave_results_at_additional_windows = [ [ ] for number_of_samples in benchmark[ "numbers_of_samples_for_additional_measurement_windows" ] ]
+            list_of_octave_results = quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( list_of_samples[ first_sample_number : first_sample_number + samples_per_block ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , lists_of_octave_results_at_additional_windows=lists_of_octave_results_at_additional_windows )
+            count_of_octave_results = count_of_octave_results + len( list_of_octave_results )
+            for list_of_additional_results in lists_of_octave_results_at_additional_windows:
+                count_of_octave_results = count_of_octave_results + len( list_of_additional_results )
+            # }
+        # }
+    # }
+    elapsed_time = time.perf_counter( ) - time_at_start
+    processor_time = time.process_time( ) - processor_time_at_start
+
+    result_queue.put( { "number_of_samples" : len( list_of_samples ) , "elapsed_seconds" : elapsed_time , "processor_seconds" : processor_time , "samples_per_second" : len( list_of_samples ) / elapsed_time , "number_of_octave_results" : count_of_octave_results , "peak_traced_python_bytes" : peak_traced_bytes , "peak_resident_kilobytes" : resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss } )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that runs a QRST-function benchmark in a new
+#  process and returns its measurements.
+
+def run_transform_benchmark( benchmark , working_directory ):
+
+    "Runs one QRST-function benchmark in a separate process"
+
+    context = multiprocessing.get_context( "spawn" )
+    result_queue = context.Queue( )
+    process = context.Process( target=run_transform_benchmark_in_process , args=( benchmark , working_directory , result_queue ) )
+    process.start( )
+    measurements = result_queue.get( )
+    process.join( )
+    return measurements
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that runs a script as a separate process in the
+#  working directory, and returns its elapsed time and peak memory.
+#  The script's text output is discarded.
+#  The peak memory is read by the script's own process -- just before
+#  it exits -- from "/proc/self/status", because the peak memory
+#  reported to a parent process can include the memory of the parent
+#  process that was copied before the script started.
+
+def run_script_and_measure( name_of_script , working_directory ):
+
+    "Runs a Python script in a separate process and measures its time and peak memory"
+
+    path_to_script = os.path.join( directory_containing_this_code , name_of_script )
+    path_to_peak_memory_file = os.path.join( working_directory , "output_peak_memory_kilobytes.txt" )
+    code_that_runs_script = "import runpy , sys ; sys.argv = [ %r ] ; sys.path.insert( 0 , %r ) ; runpy.run_path( %r , run_name='__main__' ) ; open( %r , 'w' ).write( [ line.split( )[ 1 ] for line in open( '/proc/self/status' ) if line.startswith( 'VmHWM:' ) ][ 0 ] )" % ( path_to_script , directory_containing_this_code , path_to_script , path_to_peak_memory_file )
+    time_at_start = time.perf_counter( )
+    with open( os.devnull , "w" ) as discarded_output:
+        process = subprocess.Popen( [ sys.executable , "-c" , code_that_runs_script ] , cwd=working_directory , stdout=discarded_output )
+        ( process_id , wait_status , resource_usage ) = os.wait4( process.pid , 0 )
+        process.returncode = os.waitstatus_to_exitcode( wait_status )
+    # }
+    elapsed_time = time.perf_counter( ) - time_at_start
+    if process.returncode != 0:
+        raise RuntimeError( "%s failed with exit status %d" % ( name_of_script , process.returncode ) )
+    # }
+    with open( path_to_peak_memory_file ) as peak_memory_file:
+        peak_resident_kilobytes = int( peak_memory_file.read( ) )
+    # }
+    return { "elapsed_seconds" : elapsed_time , "processor_seconds" : resource_usage.ru_utime + resource_usage.ru_stime , "peak_resident_kilobytes" : peak_resident_kilobytes }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that measures the encoder (the sample-usage code)
+#  and then the decoder, using the specified input signal.
+#  The encoder reads a fixed file name, so the input signal is copied
+#  to that name.  The encoder stops after its "time_duration" number
+#  of samples, which is read from the encoder's code (importing it
+#  does not run it).
+
+def run_encoder_and_decoder_benchmarks( path_to_input_file , working_directory ):
+
+    "Measures the throughput and memory of the QRST encoder and decoder"
+
+    path_to_encoder_input = os.path.join( working_directory , name_of_encoder_input_file )
+    if os.path.abspath( path_to_input_file ) != os.path.abspath( path_to_encoder_input ):
+        shutil.copyfile( path_to_input_file , path_to_encoder_input )
+    # }
+
+    import sample_usage_of_quick_rolling_spectral_transform
+    encoder_measurements = run_script_and_measure( "sample_usage_of_quick_rolling_spectral_transform.py" , working_directory )
+    encoder_measurements[ "number_of_samples" ] = min( int( os.path.getsize( path_to_encoder_input ) / 2 ) , sample_usage_of_quick_rolling_spectral_transform.time_duration )
+    encoder_measurements[ "samples_per_second" ] = encoder_measurements[ "number_of_samples" ] / encoder_measurements[ "elapsed_seconds" ]
+    encoder_measurements[ "compressed_bytes" ] = os.path.getsize( os.path.join( working_directory , "output_binary_compressed_audio.qrst" ) )
+
+    decoder_measurements = run_script_and_measure( "uncompress_qrst_audio.py" , working_directory )
+    decoder_measurements[ "number_of_samples" ] = int( os.path.getsize( os.path.join( working_directory , "output_binary_uncompressed_audio.raw" ) ) / 2 )
+    decoder_measurements[ "samples_per_second" ] = decoder_measurements[ "number_of_samples" ] / decoder_measurements[ "elapsed_seconds" ]
+
+    return ( encoder_measurements , decoder_measurements )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that lists the QRST-function benchmarks to run.
+#  Each input signal is measured per sample and per block at the
+#  default parameters, and the parameter sweeps and the additional
+#  measurement windows use the chirp signal.
+
+def list_transform_benchmarks( input_files , maximum_number_of_samples ):
+
+    "Lists the QRST-function benchmarks"
+
+    list_of_benchmarks = [ ]
+    for name_of_signal in sorted( input_files ):
+        for mode in ( "per_sample" , "block" ):
+            list_of_benchmarks.append( { "name" : "transform_%s_%s" % ( mode , name_of_signal ) , "mode" : mode , "signal" : name_of_signal , "input_file" : input_files[ name_of_signal ] , "maximum_number_of_samples" : maximum_number_of_samples , "number_of_octaves_for_calculations" : default_number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : default_number_of_samples_for_wavelength_measurement , "numbers_of_samples_for_additional_measurement_windows" : [ ] } )
+        # }
+    # }
+    for number_of_octaves_for_calculations in swept_numbers_of_octaves_for_calculations:
+        list_of_benchmarks.append( { "name" : "sweep_octaves_%02d" % number_of_octaves_for_calculations , "mode" : "block" , "signal" : "chirp" , "input_file" : input_files[ "chirp" ] , "maximum_number_of_samples" : maximum_number_of_samples , "number_of_octaves_for_calculations" : number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : default_number_of_samples_for_wavelength_measurement , "numbers_of_samples_for_additional_measurement_windows" : [ ] } )
+    # }
+    for number_of_samples_for_wavelength_measurement in swept_numbers_of_samples_for_wavelength_measurement:
+        list_of_benchmarks.append( { "name" : "sweep_measurement_samples_%02d" % number_of_samples_for_wavelength_measurement , "mode" : "block" , "signal" : "chirp" , "input_file" : input_files[ "chirp" ] , "maximum_number_of_samples" : maximum_number_of_samples , "number_of_octaves_for_calculations" : default_number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : number_of_samples_for_wavelength_measurement , "numbers_of_samples_for_additional_measurement_windows" : [ ] } )
+    # }
+    for numbers_of_samples_for_additional_measurement_windows in swept_additional_measurement_windows:
+        list_of_benchmarks.append( { "name" : "additional_windows_%s" % "_".join( [ "%02d" % number_of_samples for number_of_samples in numbers_of_samples_for_additional_measurement_windows ] ) , "mode" : "block" , "signal" : "chirp" , "input_file" : input_files[ "chirp" ] , "maximum_number_of_samples" : maximum_number_of_samples , "number_of_octaves_for_calculations" : default_number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : default_number_of_samples_for_wavelength_measurement , "numbers_of_samples_for_additional_measurement_windows" : list( numbers_of_samples_for_additional_measurement_windows ) } )
+    # }
+    return list_of_benchmarks
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes a comparison between the current
+#  results and the results of an earlier run.
+
+def write_comparison_with_earlier_results( output_stream , current_results , earlier_results ):
+
+    "Writes the change in throughput of each benchmark compared with an earlier run"
+
+    earlier_throughput_for_benchmark = { }
+    for result in earlier_results[ "benchmarks" ]:
+        earlier_throughput_for_benchmark[ result[ "name" ] ] = result[ "samples_per_second" ]
+    # }
+    output_stream.write( "%-40s %14s %14s %9s\n" % ( "benchmark" , "earlier" , "current" , "change" ) )
+    for result in current_results[ "benchmarks" ]:
+        if result[ "name" ] in earlier_throughput_for_benchmark:
+            earlier_throughput = earlier_throughput_for_benchmark[ result[ "name" ] ]
+            output_stream.write( "%-40s %14.1f %14.1f %+8.1f%%\n" % ( result[ "name" ] , earlier_throughput , result[ "samples_per_second" ] , ( ( result[ "samples_per_second" ] / earlier_throughput ) - 1 ) * 100 ) )
+        # }
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which runs all the benchmarks and writes
+#  the results.
+
+def main( ):
+
+    "Runs the QRST benchmark suite and writes the results as JSON"
+
+    parser = argparse.ArgumentParser( description="Benchmarks for the QRST function, encoder and decoder" )
+    parser.add_argument( "--output" , default="output_benchmark_results.json" , help="file that receives the JSON results" )
+    parser.add_argument( "--maximum-samples" , type=int , default=20000 , help="maximum number of samples used from each input signal" )
+    parser.add_argument( "--compare-with" , default="" , help="JSON results file from an earlier run" )
+    parser.add_argument( "--signal-cache-directory" , default=generate_signal_blocks_for_testing.default_cache_directory , help="directory that holds generated test signals" )
+    parser.add_argument( "--only" , default="" , help="run only the benchmarks whose names contain this text" )
+    arguments = parser.parse_args( )
+
+    current_results = { "timestamp" : time.strftime( "%Y-%m-%dT%H:%M:%S" ) , "python_version" : platform.python_version( ) , "platform" : platform.platform( ) , "processor" : platform.processor( ) , "samples_per_block" : samples_per_block , "benchmarks" : [ ] }
+
+    with tempfile.TemporaryDirectory( ) as working_directory:
+
+
+#----------------------------------------------------------------------
+#  Get the chirp signal -- the 20000 samples written by
+#  "generate_signal_for_testing.py" -- from the signal cache, and
+#  locate the bundled recording.
+
+        parameters_for_chirp = generate_signal_blocks_for_testing.parameters_for_signal( "chirp" , sample_rate=8000 , duration_in_seconds=2.5 )
+        path_to_chirp = generate_signal_blocks_for_testing.cached_signal_file( parameters_for_chirp , arguments.signal_cache_directory )
+        input_files = { "chirp" : path_to_chirp , "recording" : path_to_bundled_recording }
+
+
+#----------------------------------------------------------------------
+#  Measure the QRST function.
+
+        for benchmark in list_transform_benchmarks( input_files , arguments.maximum_samples ):
+            if arguments.only not in benchmark[ "name" ]:
+                continue
+            # }
+            measurements = run_transform_benchmark( benchmark , working_directory )
+            result = { "name" : benchmark[ "name" ] , "signal" : benchmark[ "signal" ] , "mode" : benchmark[ "mode" ] , "number_of_octaves_for_calculations" : benchmark[ "number_of_octaves_for_calculations" ] , "number_of_samples_for_wavelength_measurement" : benchmark[ "number_of_samples_for_wavelength_measurement" ] }
+            result.update( measurements )
+            current_results[ "benchmarks" ].append( result )
+            print( "%-40s %12.1f samples/s  %10d peak bytes" % ( result[ "name" ] , result[ "samples_per_second" ] , result[ "peak_traced_python_bytes" ] ) )
+        # }
+
+
+#----------------------------------------------------------------------
+#  Measure the encoder and decoder with each input signal.
+
+        for name_of_signal in sorted( input_files ):
+            if ( arguments.only not in "encoder_%s" % name_of_signal ) and ( arguments.only not in "decoder_%s" % name_of_signal ):
+                continue
+            # }
+            ( encoder_measurements , decoder_measurements ) = run_encoder_and_decoder_benchmarks( input_files[ name_of_signal ] , working_directory )
+            for ( name_of_benchmark , measurements ) in ( ( "encoder_%s" % name_of_signal , encoder_measurements ) , ( "decoder_%s" % name_of_signal , decoder_measurements ) ):
+                result = { "name" : name_of_benchmark , "signal" : name_of_signal , "mode" : "script" }
+                result.update( measurements )
+                current_results[ "benchmarks" ].append( result )
+                print( "%-40s %12.1f samples/s  %10d peak kilobytes" % ( result[ "name" ] , result[ "samples_per_second" ] , result[ "peak_resident_kilobytes" ] ) )
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the results, and optionally compare them with earlier results.
+
+    if arguments.compare_with != "":
+        with open( arguments.compare_with ) as earlier_results_file:
+            earlier_results = json.load( earlier_results_file )
+        # }
+        write_comparison_with_earlier_results( sys.stdout , current_results , earlier_results )
+    # }
+    with open( arguments.output , "w" ) as results_file:
+        json.dump( current_results , results_file , indent=2 )
+        results_file.write( "\n" )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Run the benchmarks when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#          binary_trace_recorder.py
+#          ------------------------
+#
+#  Records internal values of the Quick Rolling Spectral Transform
+#  (QRST) function -- for the selected octaves and signals -- as
+#  fixed-size binary records in a preallocated ring buffer, which is
+#  either in memory or in a memory-mapped file.  Recording a value
+#  only packs its record into the buffer (no strings are formatted),
+#  and when the buffer is full the oldest records are overwritten.
+#  The signals are:
+#
+#      filtered_sample                 the octave's newest filtered
+#                                      sample (in the current track)
+#      applied_adjustment              the scaled sum of the
+#                                      next-higher octave's peak and
+#                                      trough adjustment values that
+#                                      was added to that sample
+#      largest_gap_to_line_of_peaks    the largest gap to the straight
+#      largest_gap_to_line_of_troughs  line when a peak pair (or trough
+#                                      pair) is found, with the
+#                                      peak-to-peak distance as the
+#                                      record's detail value
+#
+#  The recorder is used only when it is supplied to the QRST function,
+#  with:
+#
+#      recorder = binary_trace_recorder.BinaryTraceRecorder( 1000000 , file_name="trace.qrsttrace" , octaves_to_record=( 14 , 13 ) )
+#      quick_rolling_spectral_transform.enable_trace_recording( recorder )
+#      ...
+#      recorder.close( )
+#
+#  An in-memory recorder (without a file name) can be written to a
+#  file with:  recorder.save( "trace.qrsttrace" )
+#
+#  Sample usage from the command line, to convert a trace file to CSV
+#  or to text plots (like the text-waveform debugging file):
+#
+#      python binary_trace_recorder.py trace.qrsttrace --csv trace.csv
+#      python binary_trace_recorder.py trace.qrsttrace --plot trace.txt --octave 14 --signal filtered_sample
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.  NumPy is only needed to convert
+#  trace files, so it is imported when a trace file is read, and the
+#  "argparse" library is only needed from the command line, so it is
+#  imported by the "main" function.  This keeps the QRST module's
+#  import fast when it enables trace recording.
+
+import mmap
+import struct
+import sys
+
+
+#----------------------------------------------------------------------
+#  Specify the signal numbers and names.
+
+trace_signal_filtered_sample = 0
+trace_signal_applied_adjustment = 1
+trace_signal_largest_gap_to_line_of_peaks = 2
+trace_signal_largest_gap_to_line_of_troughs = 3
+
+names_of_trace_signals = ( "filtered_sample" , "applied_adjustment" , "largest_gap_to_line_of_peaks" , "largest_gap_to_line_of_troughs" )
+
+number_of_trace_signals = len( names_of_trace_signals )
+
+highest_octave = 15
+
+
+#----------------------------------------------------------------------
+#  Specify the file format.  The header contains an identifying
+#  string, the record size, the number of records the ring buffer
+#  holds, and the number of records written so far.  Each record
+#  contains:  the sample number (the QRST function's time counter,
+#  modulo 2 ** 32), the octave, the track, the signal number, a detail
+#  value (zero, or the peak-to-peak distance), and the value.  All
+#  numbers are little-endian.
+
+identifying_string = b"QRSTTRC1"
+
+struct_for_header = struct.Struct( "<8sIIQ" )
+
+struct_for_count_of_records = struct.Struct( "<Q" )
+
+position_of_count_of_records = 16
+
+size_of_header = 32
+
+struct_for_record = struct.Struct( "<IBBBBd" )
+
+size_of_record = struct_for_record.size
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that records the values.
+
+class BinaryTraceRecorder:
+
+    "Records selected QRST internal values as binary records in a ring buffer"
+
+
+#----------------------------------------------------------------------
+#  Initialize the recorder with room for the specified number of
+#  records, in memory or -- if a file name is supplied -- in a
+#  memory-mapped file of that name, which is created (or replaced).
+#  The octaves and signals (names) to record can be limited; by
+#  default everything is recorded.
+
+    def __init__( self , number_of_records , file_name=None , octaves_to_record=None , signals_to_record=None ):
+        self.capacity = number_of_records
+        self.number_of_records_written = 0
+        self.position_of_next_record = 0
+        if octaves_to_record is None:
+            octaves_to_record = range( highest_octave + 1 )
+        # }
+        if signals_to_record is None:
+            signals_to_record = names_of_trace_signals
+        # }
+        self.is_recorded_at_octave_and_signal = [ [ ( ( octave in octaves_to_record ) and ( names_of_trace_signals[ signal ] in signals_to_record ) ) for signal in range( number_of_trace_signals ) ] for octave in range( highest_octave + 1 ) ]
+
+        number_of_bytes = size_of_header + ( number_of_records * size_of_record )
+        self.file = None
+        if file_name is None:
+            self.buffer = bytearray( number_of_bytes )
+        else:
+            self.file = open( file_name , "w+b" )
+            self.file.truncate( number_of_bytes )
+            self.buffer = mmap.mmap( self.file.fileno( ) , number_of_bytes )
+        # }
+        struct_for_header.pack_into( self.buffer , 0 , identifying_string , size_of_record , number_of_records , 0 )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Record one value, if its octave and signal are selected.  The
+#  count of records in the header is updated with each record, so the
+#  file can be read while recording continues.
+
+    def record( self , sample_number , octave , track , signal , detail , value ):
+        if not self.is_recorded_at_octave_and_signal[ octave ][ signal ]:
+            return
+        # }
+        struct_for_record.pack_into( self.buffer , size_of_header + ( self.position_of_next_record * size_of_record ) , sample_number & 0xFFFFFFFF , octave , track , signal , detail , value )
+        self.position_of_next_record = self.position_of_next_record + 1
+        if self.position_of_next_record >= self.capacity:
+            self.position_of_next_record = 0
+        # }
+        self.number_of_records_written = self.number_of_records_written + 1
+        struct_for_count_of_records.pack_into( self.buffer , position_of_count_of_records , self.number_of_records_written )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the recorded trace to a file, and -- for a memory-mapped
+#  recorder -- flush it to its file or close it.
+
+    def save( self , file_name ):
+        with open( file_name , "wb" ) as output_file:
+            output_file.write( self.buffer )
+        # }
+    # }
+
+    def flush( self ):
+        if self.file is not None:
+            self.buffer.flush( )
+        # }
+    # }
+
+    def close( self ):
+        if self.file is not None:
+            self.buffer.flush( )
+            self.buffer.close( )
+            self.file.close( )
+            self.file = None
+        # }
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that reads a trace file and returns its records,
+#  from the oldest to the newest, as a NumPy structured array.  The
+#  sample numbers are unwrapped (from 32 bits) into 64-bit numbers.
+
+def read_trace_file( file_name ):
+
+    "Reads the records of a binary trace file"
+
+    import numpy
+    with open( file_name , "rb" ) as input_file:
+        contents = input_file.read( )
+    # }
+    ( identifying_string_in_file , record_size_in_file , capacity , number_of_records_written ) = struct_for_header.unpack_from( contents , 0 )
+    if ( identifying_string_in_file != identifying_string ) or ( record_size_in_file != size_of_record ):
+        return ( 1 )
+    # }
+    record_type = numpy.dtype( [ ( "sample_number" , "<u4" ) , ( "octave" , "u1" ) , ( "track" , "u1" ) , ( "signal" , "u1" ) , ( "detail" , "u1" ) , ( "value" , "<f8" ) ] )
+    all_records = numpy.frombuffer( contents , dtype=record_type , count=capacity , offset=size_of_header )
+    if number_of_records_written <= capacity:
+        records = all_records[ 0 : number_of_records_written ]
+    else:
+        position_of_oldest_record = number_of_records_written % capacity
+        records = numpy.concatenate( ( all_records[ position_of_oldest_record : ] , all_records[ 0 : position_of_oldest_record ] ) )
+    # }
+
+    unwrapped_records = numpy.zeros( len( records ) , dtype=[ ( "sample_number" , "<i8" ) , ( "octave" , "u1" ) , ( "track" , "u1" ) , ( "signal" , "u1" ) , ( "detail" , "u1" ) , ( "value" , "<f8" ) ] )
+    for field_name in ( "octave" , "track" , "signal" , "detail" , "value" ):
+        unwrapped_records[ field_name ] = records[ field_name ]
+    # }
+    sample_numbers = records[ "sample_number" ].astype( numpy.int64 )
+    number_of_wraps = numpy.cumsum( numpy.concatenate( ( [ 0 ] , ( numpy.diff( sample_numbers ) < - ( 2 ** 31 ) ).astype( numpy.int64 ) ) ) )
+    unwrapped_records[ "sample_number" ] = sample_numbers + ( number_of_wraps * ( 2 ** 32 ) )
+    return unwrapped_records
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that converts a trace file to CSV or to text
+#  plots, optionally only for one octave, track, or signal.  In the
+#  text plots, each record is one line, with its value shown as the
+#  position of a label (the octave, track letter, and signal number),
+#  and the scale is chosen to fit the largest value.
+
+def main( ):
+
+    "Converts a binary QRST trace file to CSV or text plots"
+
+    import argparse
+    parser = argparse.ArgumentParser( description="Convert a binary QRST trace file to CSV or text plots" )
+    parser.add_argument( "trace_file" , help="trace file written by the recorder" )
+    parser.add_argument( "--csv" , default=None , help="name of the CSV file to write" )
+    parser.add_argument( "--plot" , default=None , help="name of the text-plot file to write" )
+    parser.add_argument( "--octave" , type=int , default=None , help="only convert this octave" )
+    parser.add_argument( "--track" , type=int , default=None , help="only convert this track" )
+    parser.add_argument( "--signal" , choices=names_of_trace_signals , default=None , help="only convert this signal" )
+    arguments = parser.parse_args( )
+
+    records = read_trace_file( arguments.trace_file )
+    if isinstance( records , int ):
+        sys.stderr.write( "%s is not a QRST trace file\n" % arguments.trace_file )
+        sys.exit( 1 )
+    # }
+    if arguments.octave is not None:
+        records = records[ records[ "octave" ] == arguments.octave ]
+    # }
+    if arguments.track is not None:
+        records = records[ records[ "track" ] == arguments.track ]
+    # }
+    if arguments.signal is not None:
+        records = records[ records[ "signal" ] == names_of_trace_signals.index( arguments.signal ) ]
+    # }
+
+    if arguments.csv is not None:
+        with open( arguments.csv , "w" ) as csv_file:
+            csv_file.write( "sample_number,octave,track,signal,detail,value\n" )
+            for record in records.tolist( ):
+                csv_file.write( "%d,%d,%d,%s,%d,%r\n" % ( record[ 0 ] , record[ 1 ] , record[ 2 ] , names_of_trace_signals[ record[ 3 ] ] , record[ 4 ] , record[ 5 ] ) )
+            # }
+        # }
+    # }
+
+    if arguments.plot is not None:
+        import numpy
+        import generate_plot_strings_for_block
+        largest_value = float( numpy.max( numpy.abs( records[ "value" ] ) ) ) if len( records ) > 0 else 0.0
+        scale_for_plotting = 0.95 / largest_value if largest_value > 0 else 1.0
+        letter_for_track = [ "a" , "b" ]
+        strings_to_show = [ "%02d%s%d" % ( record[ 1 ] , letter_for_track[ record[ 2 ] % 2 ] , record[ 3 ] ) for record in records.tolist( ) ]
+        with open( arguments.plot , "w" ) as plot_file:
+            plot_file.write( "Trace plot of %s (scale %g)\n\n" % ( arguments.trace_file , scale_for_plotting ) )
+            generate_plot_strings_for_block.write_plot_strings_for_block( plot_file , records[ "value" ] , strings_to_show , scale_for_plotting )
+        # }
+    # }
+
+    sys.stdout.write( "%d records converted\n" % len( records ) )
+
+# }
+
+
+if __name__ == "__main__":
+    main( )
+# }
@@ -0,0 +1,442 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#          columnar_result_store.py
+#          ------------------------
+#
+#  Stores the octave results of the Quick Rolling Spectral Transform
+#  (QRST) at full precision in a directory, with one file per column
+#  per octave, so that analytics can read a single octave -- across a
+#  whole day of audio -- without reading any other octave's results.
+#  The columns are:
+#
+#      time          the sample number at which the result became
+#                    available (64-bit integer)
+#      amplitude     the amplitude, as returned (64-bit floating point)
+#      wavelength    the scaled wavelength count (32-bit integer)
+#
+#  Each column file -- such as "octave_14_time.raw" -- contains only
+#  the raw little-endian values, one after another, so results are
+#  added by appending to the files, and a column is read by mapping
+#  its file into memory as a NumPy array.  The file "columns.json"
+#  describes the columns and the QRST parameters, and records the
+#  number of samples stored so far.  Within each octave the times
+#  increase, so a range of times is found with a binary search.
+#
+#  The writer collects results in memory and appends them to the
+#  files in batches.  If writing is interrupted, the columns of an
+#  octave can have different lengths; a reader only uses the results
+#  that are complete in all the columns, and a writer that reopens
+#  the store removes the incomplete results before appending.
+#
+#  Sample usage, to store the results of a block of samples:
+#
+#      writer = columnar_result_store.ColumnarResultWriter( "qrst_results" , sample_rate=8000 , number_of_octaves_for_calculations=8 , number_of_samples_for_wavelength_measurement=24 )
+#      ...
+#      writer.append_block_results( first_sample_number , list_of_octave_results )
+#      ...
+#      writer.close( number_of_samples_processed )
+#
+#  and to read one octave:
+#
+#      reader = columnar_result_store.ColumnarResultReader( "qrst_results" )
+#      columns = reader.read_octave( 14 )
+#      columns[ "time" ] , columns[ "amplitude" ] , columns[ "wavelength" ]
+#
+#  Sample usage from the command line, to summarize the stored octaves
+#  or write one octave (between two times) as CSV:
+#
+#      python columnar_result_store.py qrst_results
+#      python columnar_result_store.py qrst_results --octave 14 --from-seconds 60 --to-seconds 120 --csv octave_14.csv
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.  NumPy is only needed to read the
+#  store, so it is imported by the functions that read it.
+
+import argparse
+import array
+import json
+import os
+import sys
+
+
+#----------------------------------------------------------------------
+#  Specify the columns:  the name, the "array" type code used while
+#  writing, and the NumPy type used while reading.
+
+column_names = ( "time" , "amplitude" , "wavelength" )
+
+type_code_for_column = { "time" : "q" , "amplitude" : "d" , "wavelength" : "i" }
+
+numpy_type_for_column = { "time" : "<i8" , "amplitude" : "<f8" , "wavelength" : "<i4" }
+
+size_of_value_in_column = { "time" : 8 , "amplitude" : 8 , "wavelength" : 4 }
+
+
+#----------------------------------------------------------------------
+#  Specify the file names and the format version.
+
+name_of_description_file = "columns.json"
+
+format_version = 1
+
+default_maximum_number_of_pending_results = 4096
+
+highest_octave = 15
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the name of the file that holds a
+#  column of an octave.
+
+def path_to_column_file( directory , octave , column_name ):
+
+    "Returns the path to the file of one column of one octave"
+
+    return os.path.join( directory , "octave_%02d_%s.raw" % ( octave , column_name ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the number of results at an octave
+#  that are complete in all the columns.
+
+def number_of_complete_results( directory , octave ):
+
+    "Returns the number of results stored in every column of an octave"
+
+    number_of_results = None
+    for column_name in column_names:
+        path_to_file = path_to_column_file( directory , octave , column_name )
+        if os.path.exists( path_to_file ):
+            number_of_results_in_column = os.path.getsize( path_to_file ) // size_of_value_in_column[ column_name ]
+        else:
+            number_of_results_in_column = 0
+        # }
+        if ( number_of_results is None ) or ( number_of_results_in_column < number_of_results ):
+            number_of_results = number_of_results_in_column
+        # }
+    # }
+    return number_of_results
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that reads the description of a store.
+
+def read_store_description( directory ):
+
+    "Reads the description file of a columnar result store"
+
+    with open( os.path.join( directory , name_of_description_file ) ) as description_file:
+        description = json.load( description_file )
+    # }
+    if ( description.get( "format_version" ) != format_version ) or ( description.get( "columns" ) != numpy_type_for_column ):
+        raise ValueError( "%s does not contain a QRST columnar result store" % directory )
+    # }
+    return description
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes the description of a store, replacing
+#  the file in one step.
+
+def write_store_description( directory , description ):
+
+    "Writes the description file of a columnar result store"
+
+    path_to_description = os.path.join( directory , name_of_description_file )
+    with open( path_to_description + ".tmp" , "w" ) as description_file:
+        json.dump( description , description_file , indent=2 , sort_keys=True )
+        description_file.write( "\n" )
+    # }
+    os.replace( path_to_description + ".tmp" , path_to_description )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that appends results to a store.
+
+class ColumnarResultWriter:
+
+    "Appends QRST octave results to a columnar result store"
+
+
+#----------------------------------------------------------------------
+#  Create the store, or open an existing one for appending.  When a
+#  store is reopened, incomplete results are removed, the supplied
+#  parameters must match the stored ones, and the sample numbers
+#  supplied to the append functions -- which count from the start of
+#  this writer's stream -- are stored after the samples already in
+#  the store.
+
+    def __init__( self , directory , sample_rate=None , number_of_octaves_for_calculations=None , number_of_samples_for_wavelength_measurement=None , maximum_number_of_pending_results=default_maximum_number_of_pending_results ):
+        self.directory = directory
+        self.maximum_number_of_pending_results = maximum_number_of_pending_results
+        parameters = { "sample_rate" : sample_rate , "number_of_octaves_for_calculations" : number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : number_of_samples_for_wavelength_measurement }
+        os.makedirs( directory , exist_ok=True )
+        if os.path.exists( os.path.join( directory , name_of_description_file ) ):
+            self.description = read_store_description( directory )
+            for parameter_name in parameters:
+                if ( parameters[ parameter_name ] is not None ) and ( self.description.get( parameter_name ) is not None ) and ( parameters[ parameter_name ] != self.description[ parameter_name ] ):
+                    raise ValueError( "the %s of the store in %s is %s, not %s" % ( parameter_name , directory , self.description[ parameter_name ] , parameters[ parameter_name ] ) )
+                # }
+            # }
+        else:
+            self.description = { "format_version" : format_version , "columns" : numpy_type_for_column , "number_of_samples" : 0 }
+            self.description.update( parameters )
+            write_store_description( directory , self.description )
+        # }
+
+        self.first_sample_number = self.description[ "number_of_samples" ]
+        self.number_of_pending_results = 0
+        self.pending_values_at_octave_and_column = [ dict( [ ( column_name , array.array( type_code_for_column[ column_name ] ) ) for column_name in column_names ] ) for octave in range( highest_octave + 1 ) ]
+        for octave in range( highest_octave + 1 ):
+            number_of_results = number_of_complete_results( directory , octave )
+            for column_name in column_names:
+                path_to_file = path_to_column_file( directory , octave , column_name )
+                if os.path.exists( path_to_file ) and ( os.path.getsize( path_to_file ) > number_of_results * size_of_value_in_column[ column_name ] ):
+                    os.truncate( path_to_file , number_of_results * size_of_value_in_column[ column_name ] )
+                # }
+            # }
+            if number_of_results > 0:
+                last_time = array.array( type_code_for_column[ "time" ] )
+                with open( path_to_column_file( directory , octave , "time" ) , "rb" ) as time_file:
+                    time_file.seek( ( number_of_results - 1 ) * size_of_value_in_column[ "time" ] )
+                    last_time.frombytes( time_file.read( size_of_value_in_column[ "time" ] ) )
+                # }
+                if sys.byteorder == "big":
+                    last_time.byteswap( )
+                # }
+                self.first_sample_number = max( self.first_sample_number , last_time[ 0 ] + 1 )
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Append one result.  The results are written when enough of them
+#  are pending.
+
+    def append_result( self , sample_number , octave , amplitude , scaled_wavelength ):
+        pending_values = self.pending_values_at_octave_and_column[ octave ]
+        pending_values[ "time" ].append( self.first_sample_number + sample_number )
+        pending_values[ "amplitude" ].append( amplitude )
+        pending_values[ "wavelength" ].append( scaled_wavelength )
+        self.number_of_pending_results = self.number_of_pending_results + 1
+        if self.number_of_pending_results >= self.maximum_number_of_pending_results:
+            self.flush( )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Append the results returned by the QRST function for one sample
+#  (the octaves with a non-zero wavelength count), or the list of
+#  results returned by the "quick_rolling_spectral_transform_for_block"
+#  function for a block that starts at the specified sample number.
+
+    def append_sample_results( self , sample_number , returned_tuple ):
+        for octave in range( highest_octave , -1 , -1 ):
+            if returned_tuple[ 1 ][ octave ] != 0:
+                self.append_result( sample_number , octave , returned_tuple[ 0 ][ octave ] , returned_tuple[ 1 ][ octave ] )
+            # }
+        # }
+    # }
+
+    def append_block_results( self , first_sample_number , list_of_octave_results ):
+        for ( sample_offset , octave , amplitude , scaled_wavelength ) in list_of_octave_results:
+            self.append_result( first_sample_number + sample_offset , octave , amplitude , scaled_wavelength )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Append the pending results to the column files.  Each octave's
+#  time column is written last, so an interrupted write never stores
+#  a time without its amplitude and wavelength.
+
+    def flush( self ):
+        for octave in range( highest_octave + 1 ):
+            pending_values = self.pending_values_at_octave_and_column[ octave ]
+            if len( pending_values[ "time" ] ) == 0:
+                continue
+            # }
+            for column_name in ( "amplitude" , "wavelength" , "time" ):
+                if sys.byteorder == "big":
+                    pending_values[ column_name ].byteswap( )
+                # }
+                with open( path_to_column_file( self.directory , octave , column_name ) , "ab" ) as column_file:
+                    pending_values[ column_name ].tofile( column_file )
+                # }
+                del pending_values[ column_name ][ : ]
+            # }
+        # }
+        self.number_of_pending_results = 0
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the pending results, and record in the description the number
+#  of samples in the store, including the specified number of samples
+#  processed by this writer's stream.
+
+    def close( self , number_of_samples_processed=0 ):
+        self.flush( )
+        self.description[ "number_of_samples" ] = self.first_sample_number + number_of_samples_processed
+        write_store_description( self.directory , self.description )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that reads a store.  Each read maps the column
+#  files into memory again, so results appended meanwhile are
+#  included.
+
+class ColumnarResultReader:
+
+    "Reads octave columns from a columnar result store as memory-mapped arrays"
+
+    def __init__( self , directory ):
+        self.directory = directory
+        self.description = read_store_description( directory )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the octaves that have results, and the number of results at
+#  an octave.
+
+    def octaves_in_store( self ):
+        return [ octave for octave in range( highest_octave , -1 , -1 ) if number_of_complete_results( self.directory , octave ) > 0 ]
+    # }
+
+    def number_of_results( self , octave ):
+        return number_of_complete_results( self.directory , octave )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the columns of an octave as a dictionary of read-only
+#  memory-mapped arrays, optionally only the specified columns.
+
+    def read_octave( self , octave , columns_to_read=column_names ):
+        import numpy
+        number_of_results = number_of_complete_results( self.directory , octave )
+        columns = { }
+        for column_name in columns_to_read:
+            if number_of_results == 0:
+                columns[ column_name ] = numpy.zeros( 0 , dtype=numpy_type_for_column[ column_name ] )
+            else:
+                columns[ column_name ] = numpy.memmap( path_to_column_file( self.directory , octave , column_name ) , dtype=numpy_type_for_column[ column_name ] , mode="r" , shape=( number_of_results , ) )
+            # }
+        # }
+        return columns
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the columns of an octave for the results whose times are in
+#  the specified range (including the first sample number, but not the
+#  last one).  The range is found with a binary search of the time
+#  column, so only the pages holding those results are read.
+
+    def read_octave_between_samples( self , octave , first_sample_number , last_sample_number , columns_to_read=column_names ):
+        import numpy
+        columns = self.read_octave( octave , columns_to_read=tuple( set( columns_to_read ) | set( [ "time" ] ) ) )
+        first_position = int( numpy.searchsorted( columns[ "time" ] , first_sample_number , side="left" ) )
+        last_position = int( numpy.searchsorted( columns[ "time" ] , last_sample_number , side="left" ) )
+        return dict( [ ( column_name , columns[ column_name ][ first_position : last_position ] ) for column_name in columns_to_read ] )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that summarizes a store, or writes one octave
+#  as CSV.  Times are converted to seconds with the stored sample
+#  rate (or 8000 samples per second if none is stored).
+
+def main( ):
+
+    "Summarizes a QRST columnar result store, or writes one octave as CSV"
+
+    import numpy
+
+    parser = argparse.ArgumentParser( description="Summarize a QRST columnar result store, or write one octave as CSV" )
+    parser.add_argument( "store_directory" , help="directory that holds the store" )
+    parser.add_argument( "--octave" , type=int , default=None , help="only use this octave" )
+    parser.add_argument( "--from-seconds" , type=float , default=None , help="only use results at or after this time" )
+    parser.add_argument( "--to-seconds" , type=float , default=None , help="only use results before this time" )
+    parser.add_argument( "--csv" , default=None , help="name of the CSV file to write (requires --octave)" )
+    arguments = parser.parse_args( )
+
+    reader = ColumnarResultReader( arguments.store_directory )
+    sample_rate = reader.description.get( "sample_rate" ) or 8000
+    first_sample_number = 0
+    if arguments.from_seconds is not None:
+        first_sample_number = int( arguments.from_seconds * sample_rate )
+    # }
+    last_sample_number = 2 ** 62
+    if arguments.to_seconds is not None:
+        last_sample_number = int( arguments.to_seconds * sample_rate )
+    # }
+    octaves_to_use = reader.octaves_in_store( )
+    if arguments.octave is not None:
+        octaves_to_use = [ arguments.octave ]
+    # }
+
+    if arguments.csv is not None:
+        if arguments.octave is None:
+            sys.stderr.write( "--csv requires --octave\n" )
+            sys.exit( 1 )
+        # }
+        columns = reader.read_octave_between_samples( arguments.octave , first_sample_number , last_sample_number )
+        with open( arguments.csv , "w" ) as csv_file:
+            csv_file.write( "time,amplitude,wavelength\n" )
+            for ( time , amplitude , wavelength ) in zip( columns[ "time" ].tolist( ) , columns[ "amplitude" ].tolist( ) , columns[ "wavelength" ].tolist( ) ):
+                csv_file.write( "%d,%r,%d\n" % ( time , amplitude , wavelength ) )
+            # }
+        # }
+        sys.stdout.write( "%d results written\n" % len( columns[ "time" ] ) )
+        return
+    # }
+
+    sys.stdout.write( "%d samples (%.1f seconds) stored\n" % ( reader.description[ "number_of_samples" ] , reader.description[ "number_of_samples" ] / sample_rate ) )
+    for octave in octaves_to_use:
+        columns = reader.read_octave_between_samples( octave , first_sample_number , last_sample_number )
+        if len( columns[ "time" ] ) == 0:
+            sys.stdout.write( "octave %2d:  no results\n" % octave )
+            continue
+        # }
+        sys.stdout.write( "octave %2d:  %10d results  from %10.3f to %10.3f seconds  mean amplitude %10.3f  mean wavelength %6.1f\n" % ( octave , len( columns[ "time" ] ) , columns[ "time" ][ 0 ] / sample_rate , columns[ "time" ][ -1 ] / sample_rate , float( numpy.mean( columns[ "amplitude" ] ) ) , float( numpy.mean( columns[ "wavelength" ] ) ) ) )
+    # }
+
+# }
+
+
+if __name__ == "__main__":
+    main( )
+# }
@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        compare_quick_rolling_spectral_transform_with_stft.py
+#        -----------------------------------------------------
+#
+#  Compares the accuracy and the cost of the Quick Rolling Spectral
+#  Transform (QRST) with the accuracy and cost of a Short-Time Fourier
+#  Transform (STFT) calculated with NumPy, using the same signals:
+#  a multi-tone signal with one tone of known frequency and amplitude
+#  within each octave, and a chirp with a known instantaneous frequency.
+#
+#  For each engine and each signal the following are reported:
+#  processor time per second of audio, peak memory, latency, and --
+#  at each octave -- the frequency error and the amplitude error.
+#
+#  The QRST octave numbers are used for both engines.  Octave 15 is
+#  centered at one third of the sample rate (a cycle distance of
+#  3 samples), and each lower octave is centered at half the frequency
+#  of the next-higher octave.  A QRST result at an octave -- with its
+#  scaled wavelength count from 64 to 255 -- is converted to a
+#  frequency using the wavelength count of 128 at the center of the
+#  octave.  QRST amplitudes are in the same units as the input
+#  samples.
+#
+#  Sample usage:
+#
+#      python compare_quick_rolling_spectral_transform_with_stft.py --sample-rate 16000 --duration 2
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Specify the settings.
+
+directory_containing_this_code = os.path.dirname( os.path.abspath( __file__ ) )
+
+highest_octave = 15
+
+number_of_octaves_for_calculations = 8
+
+number_of_samples_for_wavelength_measurement = 24
+
+output_wavelength_value_at_center_of_octave = 128
+
+cycle_distance_at_center_of_octave = 3
+
+number_of_samples_traced_for_memory = 2000
+
+stft_frame_length = 1024
+
+stft_hop_length = 256
+
+
+#----------------------------------------------------------------------
+#  Specify the octaves that the QRST function calculates.  (The QRST
+#  function's octave loop stops one octave above the octave that
+#  equals the highest octave minus the number of octaves.)
+
+list_of_compared_octaves = list( range( highest_octave , highest_octave + 1 - number_of_octaves_for_calculations , -1 ) )
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define functions that return the frequency at the center of an
+#  octave, and the octave whose range -- which extends a factor of the
+#  square root of two above and below the center -- contains a
+#  frequency.
+
+def frequency_at_center_of_octave( octave , sample_rate ):
+
+    "Returns the frequency at the center of a QRST octave"
+
+    return sample_rate / ( cycle_distance_at_center_of_octave * ( 2 ** ( highest_octave - octave ) ) )
+
+# }
+
+
+def octave_containing_frequency( frequency , sample_rate ):
+
+    "Returns the QRST octave whose range contains the specified frequency"
+
+    return highest_octave - int( numpy.floor( numpy.log2( frequency_at_center_of_octave( highest_octave , sample_rate ) / frequency ) + 0.5 ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that generates the test signals.  Each signal
+#  is returned with a function that supplies the true frequency and
+#  amplitude -- at a specified time and octave -- or "None" if the
+#  signal has no component within that octave at that time.
+
+def generate_test_signals( sample_rate , duration_in_seconds , amplitude_scale ):
+
+    "Generates the multi-tone and chirp test signals and their true frequencies and amplitudes"
+
+    number_of_samples = int( sample_rate * duration_in_seconds )
+    times = numpy.arange( number_of_samples ) / sample_rate
+    test_signals = { }
+
+
+#----------------------------------------------------------------------
+#  Both signals include the same constant offset as the signal written
+#  by "generate_signal_for_testing.py".  (Without an offset, the first
+#  sample is zero, and the QRST function's debugging plot would divide
+#  by a zero peak-to-peak distance.)
+
+    offset = 2000.0 * amplitude_scale
+
+
+#----------------------------------------------------------------------
+#  The multi-tone signal has one tone in each compared octave, placed
+#  a little away from the center of the octave, with an amplitude that
+#  is different at each octave.
+
+    true_tone_at_octave = { }
+    multi_tone_signal = numpy.zeros( number_of_samples ) + offset
+    for octave in list_of_compared_octaves:
+        position_within_octave = 1.0 + ( 0.05 * ( octave % 4 ) )
+        frequency = frequency_at_center_of_octave( octave , sample_rate ) * position_within_octave
+        amplitude = ( 1500.0 + ( 250.0 * ( octave % 3 ) ) ) * amplitude_scale
+        true_tone_at_octave[ octave ] = ( frequency , amplitude )
+        multi_tone_signal = multi_tone_signal + ( amplitude * numpy.sin( 2 * numpy.pi * frequency * times ) )
+    # }
+
+    def true_multi_tone_at_time_and_octave( time_in_seconds , octave ):
+        return true_tone_at_octave.get( octave )
+    # }
+
+    test_signals[ "multi_tone" ] = ( numpy.round( multi_tone_signal ).astype( numpy.int64 ) , true_multi_tone_at_time_and_octave )
+
+
+#----------------------------------------------------------------------
+#  The chirp sweeps -- exponentially -- from the top of the highest
+#  compared octave down to the bottom of the lowest compared octave.
+
+    chirp_amplitude = 8000.0 * amplitude_scale
+    starting_frequency = frequency_at_center_of_octave( list_of_compared_octaves[ 0 ] , sample_rate ) * 1.4
+    ending_frequency = frequency_at_center_of_octave( list_of_compared_octaves[ -1 ] , sample_rate ) / 1.4
+    sweep_rate = numpy.log( ending_frequency / starting_frequency ) / duration_in_seconds
+    chirp_phase = 2 * numpy.pi * starting_frequency * ( numpy.exp( sweep_rate * times ) - 1 ) / sweep_rate
+    chirp_signal = offset + ( chirp_amplitude * numpy.sin( chirp_phase ) )
+
+    def true_chirp_at_time_and_octave( time_in_seconds , octave ):
+        frequency = starting_frequency * numpy.exp( sweep_rate * time_in_seconds )
+        if octave_containing_frequency( frequency , sample_rate ) != octave:
+            return None
+        # }
+        return ( frequency , chirp_amplitude )
+    # }
+
+    test_signals[ "chirp" ] = ( numpy.round( chirp_signal ).astype( numpy.int64 ) , true_chirp_at_time_and_octave )
+
+    return test_signals
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the functions that run a QRST engine -- inside its own
+#  process, because the QRST function keeps its state in global
+#  variables -- and return its measurements:  a list of results
+#  (time in samples, octave, frequency, amplitude), processor time,
+#  and peak memory.  Any failure is returned to the harness instead
+#  of the measurements.
+
+def run_qrst_engine_in_process( name_of_engine , list_of_samples , sample_rate , working_directory , result_queue ):
+
+    "Runs a QRST engine in a separate process and returns its results and costs"
+
+    try:
+        result_queue.put( measure_qrst_engine( name_of_engine , list_of_samples , sample_rate , working_directory ) )
+    except Exception as error:
+        result_queue.put( { "error" : "%s: %s" % ( type( error ).__name__ , error ) } )
+    # }
+
+# }
+
+
+def measure_qrst_engine( name_of_engine , list_of_samples , sample_rate , working_directory ):
+
+    "Measures a QRST engine within the current process"
+
+    os.chdir( working_directory )
+    sys.path.insert( 0 , directory_containing_this_code )
+
+
+#----------------------------------------------------------------------
+#  Measure the peak memory over a short run.  (Memory tracing slows
+#  Python considerably, so it is not done during the timed run.)
+#  The QRST function restarts when its parameters change, so the
+#  timed run starts with a different parameter and then restores it.
+
+    tracemalloc.start( )
+    import quick_rolling_spectral_transform
+    for current_sample in list_of_samples[ 0 : number_of_samples_traced_for_memory ]:
+        quick_rolling_spectral_transform.quick_rolling_spectral_transform( current_sample , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+    # }
+    ( current_traced_bytes , peak_traced_bytes ) = tracemalloc.get_traced_memory( )
+    tracemalloc.stop( )
+    quick_rolling_spectral_transform.quick_rolling_spectral_transform( list_of_samples[ 0 ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement + 1 )
+
+
+#----------------------------------------------------------------------
+#  Run the engine.
+
+    list_of_results = [ ]
+    processor_time_at_start = time.process_time( )
+    if name_of_engine == "qrst_per_sample":
+        for time_counter in range( len( list_of_samples ) ):
+            returned_tuple = quick_rolling_spectral_transform.quick_rolling_spectral_transform( list_of_samples[ time_counter ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+            for octave in list_of_compared_octaves:
+                if returned_tuple[ 1 ][ octave ] != 0:
+                    list_of_results.append( ( time_counter , octave , returned_tuple[ 1 ][ octave ] , returned_tuple[ 0 ][ octave ] ) )
+                # }
+            # }
+        # }
+    else:
+        samples_per_block = 1024
+        for first_sample_number in range( 0 , len( list_of_samples ) , samples_per_block ):
+            for ( sample_offset , octave , amplitude , wavelength ) in quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( list_of_samples[ first_sample_number : first_sample_number + samples_per_block ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement ):
+                list_of_results.append( ( first_sample_number + sample_offset , octave , wavelength , amplitude ) )
+            # }
+        # }
+    # }
+    processor_time = time.process_time( ) - processor_time_at_start
+
+
+#----------------------------------------------------------------------
+#  Convert the wavelength counts into frequencies, and convert the
+#  time at which each result became available into the time at the
+#  middle of the measured samples.
+
+    list_of_converted_results = [ ]
+    for ( time_counter , octave , wavelength , amplitude ) in list_of_results:
+        wavelength_in_samples = ( cycle_distance_at_center_of_octave * wavelength / output_wavelength_value_at_center_of_octave ) * ( 2 ** ( highest_octave - octave ) )
+        time_at_middle_of_measurement = time_counter - int( latency_in_seconds_at_octave( name_of_engine , octave , sample_rate ) * sample_rate / 2 )
+        list_of_converted_results.append( ( time_at_middle_of_measurement , octave , sample_rate / wavelength_in_samples , amplitude ) )
+    # }
+
+    return { "results" : list_of_converted_results , "processor_seconds" : processor_time , "peak_traced_bytes" : peak_traced_bytes }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that runs a QRST engine in a new process.
+
+def run_qrst_engine( name_of_engine , signal , sample_rate , working_directory ):
+
+    "Runs a QRST engine in a separate process"
+
+    context = multiprocessing.get_context( "spawn" )
+    result_queue = context.Queue( )
+    process = context.Process( target=run_qrst_engine_in_process , args=( name_of_engine , [ int( value ) for value in signal ] , sample_rate , working_directory , result_queue ) )
+    process.start( )
+    measurements = result_queue.get( )
+    process.join( )
+    if "error" in measurements:
+        raise RuntimeError( "%s failed:  %s" % ( name_of_engine , measurements[ "error" ] ) )
+    # }
+    return measurements
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that calculates a NumPy STFT (with a Hann window)
+#  and, within each compared octave of each frame, finds the largest
+#  spectral peak.  The peak's frequency is refined by fitting a
+#  parabola through the logarithms of the three largest magnitudes.
+#  The time of each result is the middle of its frame.
+
+def run_stft_engine( signal , sample_rate ):
+
+    "Runs a NumPy STFT on a signal and returns its results and costs"
+
+    tracemalloc.start( )
+    processor_time_at_start = time.process_time( )
+    window = numpy.hanning( stft_frame_length )
+    number_of_frames = 1 + int( ( len( signal ) - stft_frame_length ) / stft_hop_length )
+    frame_starts = numpy.arange( number_of_frames ) * stft_hop_length
+    frames = signal[ frame_starts[ : , None ] + numpy.arange( stft_frame_length )[ None , : ] ] * window
+    magnitudes = numpy.abs( numpy.fft.rfft( frames , axis=1 ) )
+    frequency_per_bin = sample_rate / stft_frame_length
+
+    list_of_results = [ ]
+    for octave in list_of_compared_octaves:
+        center_frequency = frequency_at_center_of_octave( octave , sample_rate )
+        lowest_bin = max( int( numpy.ceil( ( center_frequency / numpy.sqrt( 2 ) ) / frequency_per_bin ) ) , 1 )
+        highest_bin = min( int( numpy.floor( ( center_frequency * numpy.sqrt( 2 ) ) / frequency_per_bin ) ) , magnitudes.shape[ 1 ] - 2 )
+        if highest_bin <= lowest_bin:
+            continue
+        # }
+        peak_bins = lowest_bin + numpy.argmax( magnitudes[ : , lowest_bin : highest_bin + 1 ] , axis=1 )
+        rows = numpy.arange( number_of_frames )
+        logarithm_before = numpy.log( magnitudes[ rows , peak_bins - 1 ] + 1e-12 )
+        logarithm_at_peak = numpy.log( magnitudes[ rows , peak_bins ] + 1e-12 )
+        logarithm_after = numpy.log( magnitudes[ rows , peak_bins + 1 ] + 1e-12 )
+        denominator = logarithm_before - ( 2 * logarithm_at_peak ) + logarithm_after
+        denominator[ denominator == 0 ] = -1e-12
+        bin_offset = 0.5 * ( logarithm_before - logarithm_after ) / denominator
+        frequencies = ( peak_bins + bin_offset ) * frequency_per_bin
+        amplitudes = 2 * magnitudes[ rows , peak_bins ] / numpy.sum( window )
+        for frame_number in range( number_of_frames ):
+            list_of_results.append( ( int( frame_starts[ frame_number ] + ( stft_frame_length / 2 ) ) , octave , float( frequencies[ frame_number ] ) , float( amplitudes[ frame_number ] ) ) )
+        # }
+    # }
+    processor_time = time.process_time( ) - processor_time_at_start
+    ( current_traced_bytes , peak_traced_bytes ) = tracemalloc.get_traced_memory( )
+    tracemalloc.stop( )
+
+    return { "results" : list_of_results , "processor_seconds" : processor_time , "peak_traced_bytes" : peak_traced_bytes }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that compares an engine's results with the true
+#  frequencies and amplitudes, and summarizes the errors at each
+#  octave as medians of the relative errors (in percent).
+#  Results with zero amplitude (no measurement) are counted but are
+#  not compared.
+
+def summarize_errors_at_octaves( list_of_results , true_component_at_time_and_octave , sample_rate ):
+
+    "Calculates the median frequency and amplitude errors at each octave"
+
+    summary_at_octave = { }
+    for octave in list_of_compared_octaves:
+        frequency_errors = [ ]
+        amplitude_errors = [ ]
+        count_of_results = 0
+        count_of_results_without_measurement = 0
+        for ( time_counter , result_octave , frequency , amplitude ) in list_of_results:
+            if result_octave != octave:
+                continue
+            # }
+            true_component = true_component_at_time_and_octave( time_counter / sample_rate , octave )
+            if true_component is None:
+                continue
+            # }
+            count_of_results = count_of_results + 1
+            if amplitude <= 0:
+                count_of_results_without_measurement = count_of_results_without_measurement + 1
+                continue
+            # }
+            ( true_frequency , true_amplitude ) = true_component
+            frequency_errors.append( 100.0 * abs( frequency - true_frequency ) / true_frequency )
+            amplitude_errors.append( 100.0 * abs( amplitude - true_amplitude ) / true_amplitude )
+        # }
+        summary_at_octave[ octave ] = { "results_compared" : count_of_results , "results_without_measurement" : count_of_results_without_measurement , "median_frequency_error_percent" : float( numpy.median( frequency_errors ) ) if len( frequency_errors ) > 0 else None , "median_amplitude_error_percent" : float( numpy.median( amplitude_errors ) ) if len( amplitude_errors ) > 0 else None }
+    # }
+    return summary_at_octave
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the latency of an engine at an
+#  octave:  the time from the oldest sample that contributes to a
+#  result until the result becomes available.
+#  For the QRST function this is the measurement window, which is the
+#  number of samples for wavelength measurement -- at the octave's
+#  sample rate -- plus the few delayed samples used by the octave
+#  filtering.  For the STFT it is the frame length at every octave.
+
+def latency_in_seconds_at_octave( name_of_engine , octave , sample_rate ):
+
+    "Returns an engine's latency, in seconds, at an octave"
+
+    if name_of_engine == "stft":
+        return stft_frame_length / sample_rate
+    # }
+    return ( ( number_of_samples_for_wavelength_measurement + cycle_distance_at_center_of_octave + 2 ) * ( 2 ** ( highest_octave - octave ) ) ) / sample_rate
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which runs every engine on every signal
+#  and writes the comparison.
+
+def main( ):
+
+    "Compares QRST engines with a NumPy STFT"
+
+    parser = argparse.ArgumentParser( description="Accuracy-versus-cost comparison of QRST engines and a NumPy STFT" )
+    parser.add_argument( "--sample-rate" , type=int , default=16000 , help="samples per second of the test signals" )
+    parser.add_argument( "--duration" , type=float , default=2.0 , help="seconds of audio in each test signal" )
+    parser.add_argument( "--amplitude-scale" , type=float , default=100.0 , help="scale from 16-bit sample values to QRST integer units" )
+    parser.add_argument( "--engines" , default="qrst_per_sample,qrst_block,stft" , help="comma-separated names of the engines to compare" )
+    parser.add_argument( "--output" , default="output_qrst_stft_comparison.json" , help="file that receives the JSON comparison" )
+    arguments = parser.parse_args( )
+
+    sample_rate = arguments.sample_rate
+    test_signals = generate_test_signals( sample_rate , arguments.duration , arguments.amplitude_scale )
+    comparison = { "sample_rate" : sample_rate , "duration_in_seconds" : arguments.duration , "stft_frame_length" : stft_frame_length , "stft_hop_length" : stft_hop_length , "number_of_octaves_for_calculations" : number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : number_of_samples_for_wavelength_measurement , "runs" : [ ] }
+
+    with tempfile.TemporaryDirectory( ) as working_directory:
+        for name_of_signal in sorted( test_signals ):
+            ( signal , true_component_at_time_and_octave ) = test_signals[ name_of_signal ]
+            for name_of_engine in arguments.engines.split( "," ):
+                if name_of_engine == "stft":
+                    measurements = run_stft_engine( signal.astype( numpy.float64 ) , sample_rate )
+                else:
+                    measurements = run_qrst_engine( name_of_engine , signal , sample_rate , working_directory )
+                # }
+                summary_at_octave = summarize_errors_at_octaves( measurements[ "results" ] , true_component_at_time_and_octave , sample_rate )
+                for octave in list_of_compared_octaves:
+                    summary_at_octave[ octave ][ "latency_seconds" ] = latency_in_seconds_at_octave( name_of_engine , octave , sample_rate )
+                    summary_at_octave[ octave ][ "center_frequency" ] = frequency_at_center_of_octave( octave , sample_rate )
+                # }
+                run = { "engine" : name_of_engine , "signal" : name_of_signal , "processor_seconds_per_audio_second" : measurements[ "processor_seconds" ] / arguments.duration , "peak_traced_bytes" : measurements[ "peak_traced_bytes" ] , "octaves" : summary_at_octave }
+                comparison[ "runs" ].append( run )
+
+
+#----------------------------------------------------------------------
+#  Display a summary of this run.
+
+                print( "%s on %s:  %.4f cpu seconds per audio second , %d peak bytes" % ( name_of_engine , name_of_signal , run[ "processor_seconds_per_audio_second" ] , run[ "peak_traced_bytes" ] ) )
+                for octave in list_of_compared_octaves:
+                    values = summary_at_octave[ octave ]
+                    print( "    octave %02d  (%7.1f Hz)  latency %.4f s  frequency error %s  amplitude error %s  (%d compared)" % ( octave , values[ "center_frequency" ] , values[ "latency_seconds" ] , "n/a" if values[ "median_frequency_error_percent" ] is None else "%6.1f%%" % values[ "median_frequency_error_percent" ] , "n/a" if values[ "median_amplitude_error_percent" ] is None else "%6.1f%%" % values[ "median_amplitude_error_percent" ] , values[ "results_compared" ] ) )
+                # }
+            # }
+        # }
+    # }
+
+    with open( arguments.output , "w" ) as comparison_file:
+        json.dump( comparison , comparison_file , indent=2 )
+        comparison_file.write( "\n" )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Run the comparison when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#          differential_verification.py
+#          ----------------------------
+#
+#  Checks that a faster Quick Rolling Spectral Transform (QRST) engine
+#  -- such as the batch engine or the pipelined engine -- produces the
+#  same octave results as the reference "quick_rolling_spectral_transform"
+#  function, in two ways:
+#
+#  While an engine runs, a sampled fraction of its streams is also sent
+#  -- block by block -- to the reference function, and each block's
+#  octave results are compared.  The reference function keeps its
+#  state in global variables, and each block's results depend on all
+#  the earlier samples of the stream, so the sampled unit is a stream
+#  (all of its blocks), and each sampled stream runs in its own
+#  process, alongside the engine.  On the first mismatch in a stream,
+#  the sample number and octave are logged, or an exception is raised.
+#
+#  Sample usage:
+#
+#      transform = batch_quick_rolling_spectral_transform.BatchQuickRollingSpectralTransform( number_of_streams , 7 , 24 )
+#      verifier = differential_verification.DifferentialVerifier( number_of_streams , 7 , 24 , fraction_of_streams=0.01 )
+#      verifier.start( )
+#      ...
+#      list_of_octave_results = transform.transform_block( block_of_samples_at_stream_and_time )
+#      verifier.verify_block( block_of_samples_at_stream_and_time , list_of_octave_results )
+#      ...
+#      verifier.finish( )
+#
+#  Also, a bundled corpus of golden outputs -- test signals together
+#  with the reference function's octave results for them -- can be
+#  generated, and an engine can be checked against it.
+#
+#  Sample usage from the command line:
+#
+#      python differential_verification.py --generate-golden golden_output_corpus
+#      python differential_verification.py --check-golden golden_output_corpus --engine batch
+#      python differential_verification.py --check-golden golden_output_corpus --engine block
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+
+
+#----------------------------------------------------------------------
+#  The highest octave is always 15.
+
+highest_octave = 15
+
+
+#----------------------------------------------------------------------
+#  Specify the golden-output cases:  the kind of test signal (see
+#  "generate_signal_blocks_for_testing.py"), any parameters that
+#  differ from the defaults, the QRST settings, and the block size.
+#  The multi-tone signal with no offset starts at zero, so the
+#  reference function stops at its first sample.  The silence, and the
+#  long constant run after the last burst (which begins once the
+#  stream has been active), are fast-forwarded by the block function
+#  (see "fast_forward_through_constant_samples").
+
+number_of_samples_in_golden_case = 3000
+
+list_of_golden_cases = [
+    ( "chirp" , { "chirp_length_in_samples" : 3000 } , 8 , 24 , 256 ) ,
+    ( "multi_tone" , { "frequencies" : [ 300.0 , 1700.0 ] } , 7 , 24 , 256 ) ,
+    ( "noise" , { "seed" : 2 } , 6 , 16 , 100 ) ,
+    ( "burst" , { "burst_period_in_seconds" : 0.1 } , 8 , 24 , 1000 ) ,
+    ( "silence" , { } , 5 , 12 , 77 ) ,
+    ( "chirp" , { "chirp_length_in_samples" : 2000 , "amplitude" : 30000 } , 10 , 8 , 500 ) ,
+    ( "multi_tone" , { "offset" : 0 } , 7 , 24 , 256 ) ,
+    ( "burst" , { "burst_period_in_seconds" : 0.375 , "burst_duty_cycle" : 0.25 } , 5 , 12 , 128 ) ,
+    ]
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the exception raised at the first mismatch, when mismatches
+#  are not only logged.
+
+class DifferentialVerificationMismatch( Exception ):
+
+    "Raised when an engine's octave results differ from the reference function's"
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that applies the reference function -- one sample
+#  at a time -- to a list of samples, and returns the octave results
+#  (each with the sample number at which it became available, the
+#  octave, the amplitude, and the scaled wavelength count) and the
+#  sample number at which the reference function stopped (by raising a
+#  ZeroDivisionError), or -1 if it did not stop.  The results at the
+#  same sample number are listed from the highest octave to the
+#  lowest, as in the block function.
+
+def reference_octave_results( reference_module , list_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , first_sample_number ):
+
+    "Returns the reference function's octave results for a list of samples"
+
+    list_of_octave_results = [ ]
+    lowest_octave = highest_octave - number_of_octaves_for_calculations + 1
+    for sample_offset in range( len( list_of_samples ) ):
+        try:
+            returned_tuple = reference_module.quick_rolling_spectral_transform( list_of_samples[ sample_offset ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+        except ZeroDivisionError:
+            return ( list_of_octave_results , first_sample_number + sample_offset )
+        # }
+        for octave in range( highest_octave , lowest_octave - 1 , -1 ):
+            if returned_tuple[ 1 ][ octave ] != 0:
+                list_of_octave_results.append( ( first_sample_number + sample_offset , octave , float( returned_tuple[ 0 ][ octave ] ) , int( returned_tuple[ 1 ][ octave ] ) ) )
+            # }
+        # }
+    # }
+    return ( list_of_octave_results , -1 )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the first mismatch between two lists
+#  of octave results -- as the sample number, the octave, and the
+#  result from each list (or None where a list has no such result) --
+#  or None if the lists are the same.
+
+def first_mismatch( list_of_engine_results , list_of_reference_results ):
+
+    "Returns the sample number and octave of the first differing octave result"
+
+    for result_number in range( max( len( list_of_engine_results ) , len( list_of_reference_results ) ) ):
+        engine_result = list_of_engine_results[ result_number ] if result_number < len( list_of_engine_results ) else None
+        reference_result = list_of_reference_results[ result_number ] if result_number < len( list_of_reference_results ) else None
+        if engine_result != reference_result:
+            if ( engine_result is None ) or ( ( reference_result is not None ) and ( ( reference_result[ 0 ] , - reference_result[ 1 ] ) < ( engine_result[ 0 ] , - engine_result[ 1 ] ) ) ):
+                earlier_result = reference_result
+            else:
+                earlier_result = engine_result
+            # }
+            return ( earlier_result[ 0 ] , earlier_result[ 1 ] , engine_result , reference_result )
+        # }
+    # }
+    return None
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that runs the reference function for one
+#  sampled stream, in its own process (because the reference function
+#  keeps its state in global values) and in a temporary directory
+#  (because it writes a text-waveform debugging file).  Each message
+#  contains a block's samples and the engine's octave results for the
+#  block (with sample numbers counted from the start of the stream),
+#  and "None" ends the stream.  Only the first mismatch is reported.
+
+def run_reference_for_sampled_stream( stream_number , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , input_queue , output_queue ):
+
+    "Compares the engine's octave results for one stream with the reference function"
+
+    os.chdir( tempfile.mkdtemp( prefix="qrst_verify_" ) )
+    import quick_rolling_spectral_transform
+    number_of_samples_so_far = 0
+    number_of_results_compared = 0
+    sample_number_at_stop = -1
+    is_mismatch_found = False
+    while True:
+        message = input_queue.get( )
+        if message is None:
+            break
+        # }
+        ( list_of_samples , list_of_engine_results ) = message
+        list_of_reference_results = [ ]
+        if sample_number_at_stop < 0:
+            ( list_of_reference_results , sample_number_at_stop ) = reference_octave_results( quick_rolling_spectral_transform , list_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , number_of_samples_so_far )
+        # }
+        if not is_mismatch_found:
+            mismatch = first_mismatch( list_of_engine_results , list_of_reference_results )
+            if mismatch is not None:
+                is_mismatch_found = True
+                output_queue.put( ( "mismatch" , stream_number ) + mismatch )
+            # }
+            number_of_results_compared = number_of_results_compared + len( list_of_reference_results )
+        # }
+        number_of_samples_so_far = number_of_samples_so_far + len( list_of_samples )
+    # }
+    output_queue.put( ( "done" , stream_number , number_of_samples_so_far , number_of_results_compared , sample_number_at_stop ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that verifies a sampled fraction of an engine's
+#  streams while the engine runs.
+
+class DifferentialVerifier:
+
+    "Compares a sampled fraction of an engine's streams with the reference QRST function"
+
+
+#----------------------------------------------------------------------
+#  Initialize the verifier, and choose the sampled streams (at least
+#  one, unless the fraction is zero, and at most the specified maximum,
+#  because each one needs its own process).  On a mismatch, an
+#  exception is raised if "on_mismatch" is "raise", and otherwise the
+#  mismatch is only written to the log file.  The queues are bounded,
+#  so the engine waits if the reference processes fall far behind.
+
+    def __init__( self , number_of_streams , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , fraction_of_streams=0.01 , maximum_number_of_sampled_streams=4 , on_mismatch="raise" , log_file=sys.stderr , seed=1 , queue_depth=8 ):
+        self.number_of_octaves_for_calculations = number_of_octaves_for_calculations
+        self.number_of_samples_for_wavelength_measurement = number_of_samples_for_wavelength_measurement
+        self.on_mismatch = on_mismatch
+        self.log_file = log_file
+        self.queue_depth = queue_depth
+        number_of_sampled_streams = 0
+        if fraction_of_streams > 0:
+            number_of_sampled_streams = min( max( 1 , int( round( fraction_of_streams * number_of_streams ) ) ) , maximum_number_of_sampled_streams , number_of_streams )
+        # }
+        self.sampled_stream_numbers = sorted( random.Random( seed ).sample( range( number_of_streams ) , number_of_sampled_streams ) )
+        self.number_of_samples_so_far = 0
+        self.list_of_mismatches = [ ]
+        self.list_of_summaries = [ ]
+        self.list_of_input_queues = [ ]
+        self.list_of_processes = [ ]
+        self.output_queue = None
+    # }
+
+
+#----------------------------------------------------------------------
+#  Start a reference process for each sampled stream.
+
+    def start( self ):
+        context = multiprocessing.get_context( "spawn" )
+        self.output_queue = context.Queue( )
+        for stream_number in self.sampled_stream_numbers:
+            input_queue = context.Queue( maxsize=self.queue_depth )
+            process = context.Process( target=run_reference_for_sampled_stream , args=( stream_number , self.number_of_octaves_for_calculations , self.number_of_samples_for_wavelength_measurement , input_queue , self.output_queue ) , daemon=True )
+            process.start( )
+            self.list_of_input_queues.append( input_queue )
+            self.list_of_processes.append( process )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Send one block -- as supplied to the engine, with one row per
+#  stream -- and the engine's octave results for it (as returned by
+#  the batch engine's "transform_block" method) to the reference
+#  processes, and handle any mismatches reported so far.
+
+    def verify_block( self , block_of_samples_at_stream_and_time , list_of_octave_results ):
+        import batch_quick_rolling_spectral_transform
+        number_of_samples_in_block = 0
+        for ( sampled_number , stream_number ) in enumerate( self.sampled_stream_numbers ):
+            list_of_samples = [ int( sample ) for sample in block_of_samples_at_stream_and_time[ stream_number ] ]
+            number_of_samples_in_block = len( list_of_samples )
+            list_of_engine_results = [ ( self.number_of_samples_so_far + sample_offset , octave , amplitude , scaled_wavelength ) for ( sample_offset , octave , amplitude , scaled_wavelength ) in batch_quick_rolling_spectral_transform.octave_results_for_stream( list_of_octave_results , stream_number ) ]
+            self.list_of_input_queues[ sampled_number ].put( ( list_of_samples , list_of_engine_results ) )
+        # }
+        self.number_of_samples_so_far = self.number_of_samples_so_far + number_of_samples_in_block
+        self.handle_reports( False )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Handle the reports from the reference processes:  only those
+#  already received, or -- when waiting -- until every process is
+#  done.
+
+    def handle_reports( self , is_waiting_until_done ):
+        while True:
+            try:
+                if is_waiting_until_done:
+                    if len( self.list_of_summaries ) >= len( self.list_of_processes ):
+                        return
+                    # }
+                    report = self.output_queue.get( )
+                else:
+                    report = self.output_queue.get_nowait( )
+                # }
+            except queue.Empty:
+                return
+            # }
+            if report[ 0 ] == "done":
+                self.list_of_summaries.append( report[ 1 : ] )
+                continue
+            # }
+            ( stream_number , sample_number , octave , engine_result , reference_result ) = report[ 1 : ]
+            self.list_of_mismatches.append( report[ 1 : ] )
+            description = "stream %d differs from the reference function first at sample %d , octave %d:  engine %r , reference %r" % ( stream_number , sample_number , octave , engine_result , reference_result )
+            if self.log_file is not None:
+                self.log_file.write( "[%s]\n" % description )
+                self.log_file.flush( )
+            # }
+            if self.on_mismatch == "raise":
+                raise DifferentialVerificationMismatch( description )
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  End the sampled streams, wait for the reference processes, and
+#  return the number of mismatching streams.
+
+    def finish( self ):
+        for input_queue in self.list_of_input_queues:
+            input_queue.put( None )
+        # }
+        self.handle_reports( True )
+        for process in self.list_of_processes:
+            process.join( )
+        # }
+        return len( self.list_of_mismatches )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that calculates one golden-output case with the
+#  reference function, in its own process (and temporary directory),
+#  and writes it to a file as JSON.
+
+def write_golden_case_in_process( file_name , description , list_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , samples_per_block ):
+
+    "Writes the reference function's octave results for one golden-output case"
+
+    working_directory = os.getcwd( )
+    os.chdir( tempfile.mkdtemp( prefix="qrst_golden_" ) )
+    import quick_rolling_spectral_transform
+    ( list_of_octave_results , sample_number_at_stop ) = reference_octave_results( quick_rolling_spectral_transform , list_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , 0 )
+    golden_case = { "description" : description , "number_of_octaves_for_calculations" : number_of_octaves_for_calculations , "number_of_samples_for_wavelength_measurement" : number_of_samples_for_wavelength_measurement , "samples_per_block" : samples_per_block , "sample_number_at_stop" : sample_number_at_stop , "samples" : list_of_samples , "octave_results" : list_of_octave_results }
+    with open( os.path.join( working_directory , file_name ) , "w" ) as golden_file:
+        json.dump( golden_case , golden_file , separators=( "," , ":" ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that generates the golden-output corpus in the
+#  specified directory, with one file for each case.
+
+def generate_golden_corpus( directory_name ):
+
+    "Generates the golden-output corpus with the reference QRST function"
+
+    import generate_signal_blocks_for_testing
+    os.makedirs( directory_name , exist_ok=True )
+    context = multiprocessing.get_context( "spawn" )
+    list_of_file_names = [ ]
+    for ( case_number , ( kind , specified_parameters , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , samples_per_block ) ) in enumerate( list_of_golden_cases ):
+        parameters = generate_signal_blocks_for_testing.parameters_for_signal( kind , duration_in_seconds=( number_of_samples_in_golden_case / generate_signal_blocks_for_testing.default_parameters[ "sample_rate" ] ) , **specified_parameters )
+        list_of_samples = [ int( sample ) for sample in next( generate_signal_blocks_for_testing.generate_signal_blocks( parameters , number_of_samples_in_golden_case ) ) ]
+        file_name = os.path.join( directory_name , "golden_case_%02d_%s.json" % ( case_number + 1 , kind ) )
+        description = "%s %s , %d octaves , window %d , blocks of %d" % ( kind , json.dumps( specified_parameters , sort_keys=True ) , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , samples_per_block )
+        process = context.Process( target=write_golden_case_in_process , args=( file_name , description , list_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , samples_per_block ) )
+        process.start( )
+        process.join( )
+        list_of_file_names.append( file_name )
+    # }
+    return list_of_file_names
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that applies the single-stream block function
+#  ("quick_rolling_spectral_transform_for_block") to one golden-output
+#  case, in its own process (and temporary directory), as for the
+#  reference function.  Fast-forwarding through constant runs is on,
+#  and additional measurement windows are enabled, because neither
+#  may change the results.  The results (with sample numbers counted
+#  from the start of the stream) are put into the queue.  If the block
+#  function stops (by raising a ZeroDivisionError), the results of the
+#  block in which it stopped are lost, as for any caller.
+
+def block_engine_results_in_process( list_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , samples_per_block , result_queue ):
+
+    "Applies the block function to one golden-output case"
+
+    os.chdir( tempfile.mkdtemp( prefix="qrst_golden_" ) )
+    import quick_rolling_spectral_transform
+    quick_rolling_spectral_transform.enable_constant_run_fast_forwarding( True )
+    quick_rolling_spectral_transform.enable_additional_measurement_windows( ( number_of_samples_for_wavelength_measurement * 2 , ) )
+    list_of_engine_results = [ ]
+    for first_sample_number in range( 0 , len( list_of_samples ) , samples_per_block ):
+        lists_of_octave_results_at_additional_windows = [ [ ] ]
+        try:
+            list_of_octave_results = quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( list_of_samples[ first_sample_number : first_sample_number + samples_per_block ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , lists_of_octave_results_at_additional_windows=lists_of_octave_results_at_additional_windows )
+        except ZeroDivisionError:
+            break
+        # }
+        for ( sample_offset , octave , amplitude , scaled_wavelength ) in list_of_octave_results:
+            list_of_engine_results.append( ( first_sample_number + sample_offset , octave , float( amplitude ) , int( scaled_wavelength ) ) )
+        # }
+    # }
+    result_queue.put( list_of_engine_results )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that checks an engine ("batch", "pipelined", or
+#  "block") against every case in the golden-output corpus, writes the
+#  result of each case, and returns the number of mismatching cases.
+
+def check_engine_against_golden_corpus( directory_name , engine_name , output_file ):
+
+    "Checks a QRST engine against the golden-output corpus"
+
+    import numpy
+    import batch_quick_rolling_spectral_transform
+    import pipelined_quick_rolling_spectral_transform
+    number_of_mismatching_cases = 0
+    for file_name in sorted( os.listdir( directory_name ) ):
+        if not file_name.endswith( ".json" ):
+            continue
+        # }
+        with open( os.path.join( directory_name , file_name ) ) as golden_file:
+            golden_case = json.load( golden_file )
+        # }
+        samples_at_stream_and_time = numpy.array( [ golden_case[ "samples" ] ] , dtype=numpy.int64 )
+        samples_per_block = golden_case[ "samples_per_block" ]
+        list_of_blocks = [ samples_at_stream_and_time[ : , first_sample_number : first_sample_number + samples_per_block ] for first_sample_number in range( 0 , samples_at_stream_and_time.shape[ 1 ] , samples_per_block ) ]
+        list_of_results_at_block = [ ]
+        if engine_name == "pipelined":
+            transform = pipelined_quick_rolling_spectral_transform.PipelinedQuickRollingSpectralTransform( 1 , golden_case[ "number_of_octaves_for_calculations" ] , golden_case[ "number_of_samples_for_wavelength_measurement" ] , use_threads=True )
+            list_of_results_at_block = list( transform.transform_blocks( list_of_blocks ) )
+        elif engine_name == "batch":
+            transform = batch_quick_rolling_spectral_transform.BatchQuickRollingSpectralTransform( 1 , golden_case[ "number_of_octaves_for_calculations" ] , golden_case[ "number_of_samples_for_wavelength_measurement" ] )
+            list_of_results_at_block = [ transform.transform_block( block_of_samples ) for block_of_samples in list_of_blocks ]
+        # }
+        list_of_engine_results = [ ]
+        for ( block_number , list_of_octave_results ) in enumerate( list_of_results_at_block ):
+            for ( sample_offset , octave , amplitude , scaled_wavelength ) in batch_quick_rolling_spectral_transform.octave_results_for_stream( list_of_octave_results , 0 ):
+                list_of_engine_results.append( ( ( block_number * samples_per_block ) + sample_offset , octave , amplitude , scaled_wavelength ) )
+            # }
+        # }
+        if engine_name == "block":
+            context = multiprocessing.get_context( "spawn" )
+            result_queue = context.Queue( )
+            process = context.Process( target=block_engine_results_in_process , args=( golden_case[ "samples" ] , golden_case[ "number_of_octaves_for_calculations" ] , golden_case[ "number_of_samples_for_wavelength_measurement" ] , samples_per_block , result_queue ) )
+            process.start( )
+            list_of_engine_results = result_queue.get( )
+            process.join( )
+        # }
+        list_of_golden_results = [ tuple( octave_result ) for octave_result in golden_case[ "octave_results" ] ]
+        mismatch = first_mismatch( list_of_engine_results , list_of_golden_results )
+        if mismatch is None:
+            output_file.write( "%s:  same (%d results)\n" % ( file_name , len( list_of_golden_results ) ) )
+        else:
+            number_of_mismatching_cases = number_of_mismatching_cases + 1
+            output_file.write( "%s:  differs first at sample %d , octave %d:  engine %r , golden %r\n" % ( ( file_name , ) + mismatch ) )
+        # }
+    # }
+    return number_of_mismatching_cases
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which generates the golden-output corpus
+#  or checks an engine against it.
+
+def main( ):
+
+    "Generates the golden-output corpus, or checks a QRST engine against it"
+
+    parser = argparse.ArgumentParser( description="Generate the QRST golden-output corpus, or check an engine against it" )
+    parser.add_argument( "--generate-golden" , default=None , help="directory in which to generate the corpus" )
+    parser.add_argument( "--check-golden" , default=None , help="directory of the corpus to check an engine against" )
+    parser.add_argument( "--engine" , choices=( "batch" , "pipelined" , "block" ) , default="batch" , help="engine to check" )
+    arguments = parser.parse_args( )
+
+    if arguments.generate_golden is not None:
+        for file_name in generate_golden_corpus( arguments.generate_golden ):
+            sys.stdout.write( "wrote %s\n" % file_name )
+        # }
+    # }
+    if arguments.check_golden is not None:
+        if check_engine_against_golden_corpus( arguments.check_golden , arguments.engine , sys.stdout ) > 0:
+            sys.exit( 1 )
+        # }
+    # }
+
+# }
+
+
+if __name__ == "__main__":
+    main( )
+# }
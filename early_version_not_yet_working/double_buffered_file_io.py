@@ -0,0 +1,238 @@
+#----------------------------------------------------------------------
+#
+#          double_buffered_file_io.py
+#          --------------------------
+#
+#  Overlaps file reading and writing with the Quick Rolling Spectral
+#  Transform (QRST) calculations, so disk latency does not add to the
+#  running time of the encoder and decoder, which otherwise read each
+#  sample (or compressed value) and write each record in sequence with
+#  the calculations.
+#
+#  A prefetching reader uses a background thread that reads the input
+#  file in blocks, staying up to the specified number of blocks ahead
+#  of the calculations.  A background writer collects the written
+#  bytes into blocks, and a background thread writes each full block
+#  while the next one is filled.  In each case the blocks pass through
+#  a bounded queue with one producer and one consumer, so at most the
+#  specified number of blocks wait in memory, and a full queue makes
+#  the faster side wait for the slower one.
+#
+#  The reader's "read" function returns fewer bytes than requested
+#  only at the end of the file, like a file's "read" function, and
+#  the writer's files contain exactly the bytes written, in order.  An
+#  error in a background thread is raised again in the calling thread,
+#  at the next read or when the writer is closed.
+#
+#  Sample usage:
+#
+#      input_file = double_buffered_file_io.PrefetchingReader( 'input.raw' )
+#      output_file = double_buffered_file_io.BackgroundWriter( 'output.qrst' )
+#      ...
+#      packed_value = input_file.read( 2 )
+#      ...
+#      output_file.write( packed_value )
+#      ...
+#      input_file.close( )
+#      output_file.close( )
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import queue
+import threading
+
+
+#----------------------------------------------------------------------
+#  Specify the default block size (in bytes) and the default number of
+#  blocks that can wait in each queue.
+
+default_block_size = 65536
+
+default_number_of_waiting_blocks = 2
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that reads a file ahead of its use.
+
+class PrefetchingReader:
+
+    "Reads a file in blocks on a background thread, ahead of its use"
+
+
+#----------------------------------------------------------------------
+#  Open the file and start the reading thread.
+
+    def __init__( self , file_name , block_size=default_block_size , number_of_waiting_blocks=default_number_of_waiting_blocks ):
+        self.input_file = open( file_name , "rb" )
+        self.block_size = block_size
+        self.block_queue = queue.Queue( maxsize=number_of_waiting_blocks )
+        self.stop_request = threading.Event( )
+        self.current_block = b""
+        self.position_in_current_block = 0
+        self.end_of_file_reached = False
+        self.reading_thread = threading.Thread( target=self.read_until_end_of_file , daemon=True )
+        self.reading_thread.start( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Read the blocks on the background thread.  An empty block marks the
+#  end of the file, and an exception is passed on in place of a block.
+#  While the queue is full, the stop request is checked periodically,
+#  so closing the reader early does not leave the thread waiting.
+
+    def read_until_end_of_file( self ):
+        while True:
+            try:
+                block = self.input_file.read( self.block_size )
+            except Exception as error:
+                block = error
+            # }
+            while not self.stop_request.is_set( ):
+                try:
+                    self.block_queue.put( block , timeout=0.1 )
+                    break
+                except queue.Full:
+                    continue
+                # }
+            # }
+            if self.stop_request.is_set( ) or ( not isinstance( block , bytes ) ) or ( len( block ) == 0 ):
+                return
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the requested number of bytes, or fewer at the end of the
+#  file.
+
+    def read( self , number_of_bytes ):
+        if ( self.position_in_current_block + number_of_bytes <= len( self.current_block ) ):
+            self.position_in_current_block = self.position_in_current_block + number_of_bytes
+            return self.current_block[ self.position_in_current_block - number_of_bytes : self.position_in_current_block ]
+        # }
+        list_of_pieces = [ self.current_block[ self.position_in_current_block : ] ]
+        number_of_bytes_needed = number_of_bytes - len( list_of_pieces[ 0 ] )
+        self.current_block = b""
+        self.position_in_current_block = 0
+        while ( number_of_bytes_needed > 0 ) and ( not self.end_of_file_reached ):
+            block = self.block_queue.get( )
+            if not isinstance( block , bytes ):
+                self.end_of_file_reached = True
+                raise block
+            # }
+            if len( block ) == 0:
+                self.end_of_file_reached = True
+                break
+            # }
+            if len( block ) > number_of_bytes_needed:
+                self.current_block = block
+                self.position_in_current_block = number_of_bytes_needed
+                block = block[ 0 : number_of_bytes_needed ]
+            # }
+            list_of_pieces.append( block )
+            number_of_bytes_needed = number_of_bytes_needed - len( block )
+        # }
+        return b"".join( list_of_pieces )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Stop the reading thread and close the file.
+
+    def close( self ):
+        self.stop_request.set( )
+        self.reading_thread.join( )
+        self.input_file.close( )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that writes a file behind its use.
+
+class BackgroundWriter:
+
+    "Collects written bytes into blocks, and writes them on a background thread"
+
+
+#----------------------------------------------------------------------
+#  Create the file and start the writing thread.
+
+    def __init__( self , file_name , block_size=default_block_size , number_of_waiting_blocks=default_number_of_waiting_blocks ):
+        self.output_file = open( file_name , "wb" )
+        self.block_size = block_size
+        self.block_queue = queue.Queue( maxsize=number_of_waiting_blocks )
+        self.current_block = bytearray( )
+        self.writing_error = None
+        self.writing_thread = threading.Thread( target=self.write_until_closed , daemon=True )
+        self.writing_thread.start( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the blocks on the background thread, until the "None" that
+#  marks the closing of the writer.  After an error, the remaining
+#  blocks are discarded, so the calling thread never waits for room in
+#  the queue.
+
+    def write_until_closed( self ):
+        while True:
+            block = self.block_queue.get( )
+            if block is None:
+                return
+            # }
+            if self.writing_error is None:
+                try:
+                    self.output_file.write( block )
+                except Exception as error:
+                    self.writing_error = error
+                # }
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Add bytes to the current block, and pass the block to the writing
+#  thread when it is full.
+
+    def write( self , packed_value ):
+        self.current_block += packed_value
+        if len( self.current_block ) >= self.block_size:
+            self.block_queue.put( bytes( self.current_block ) )
+            self.current_block = bytearray( )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Pass the partly filled block to the writing thread, wait until all
+#  the blocks are written, and close the file.
+
+    def close( self ):
+        if len( self.current_block ) > 0:
+            self.block_queue.put( bytes( self.current_block ) )
+            self.current_block = bytearray( )
+        # }
+        self.block_queue.put( None )
+        self.writing_thread.join( )
+        self.output_file.close( )
+        if self.writing_error is not None:
+            raise self.writing_error
+        # }
+    # }
+
+# }
@@ -0,0 +1,155 @@
+#----------------------------------------------------------------------
+#
+#          generate_plot_strings_for_block.py
+#          ----------------------------------
+#
+#  Generates the same text strings as the "generate_plot_string"
+#  function -- which horizontally displaces a specified string by a
+#  distance proportional to a value -- but for a whole block of values
+#  and strings at once.  The strings are placed into a preallocated
+#  character buffer using NumPy, so a million plot lines take seconds
+#  instead of minutes.
+#
+#  The inputs are a sequence of values, a sequence of strings to show
+#  (or a single string used for every value), and either a sequence
+#  of scales or a single scale.  The strings to show must contain
+#  only ASCII characters.
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the NumPy library.
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Initialization.  These values match the "generate_plot_string"
+#  function, which uses a line of 70 spaces.
+
+number_of_spaces = 70
+offset_for_plotting = int( number_of_spaces / 2 )
+half_of_full_distance = offset_for_plotting - 2
+
+
+#----------------------------------------------------------------------
+#  Character buffers are reused from one call to the next, one buffer
+#  for each width of plot line.  Each plot line is a ">" character,
+#  the spaces before and after the string to show, and a "<"
+#  character, so the width is the number of spaces plus the length of
+#  the string to show.
+
+character_buffer_for_width = { }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns a character buffer -- with at least
+#  the specified number of rows -- that contains the ">" and "<"
+#  characters and spaces between them.  Only the columns that are
+#  later overwritten by strings to show need to be reset to spaces.
+
+def character_buffer_with_rows( number_of_rows , width ):
+
+    "Returns a reusable buffer of blank plot lines"
+
+    character_buffer = character_buffer_for_width.get( width )
+    if ( character_buffer is None ) or ( character_buffer.shape[ 0 ] < number_of_rows ):
+        character_buffer = numpy.full( ( max( number_of_rows , 1024 ) , width ) , ord( " " ) , dtype=numpy.uint8 )
+        character_buffer[ : , 0 ] = ord( ">" )
+        character_buffer[ : , width - 1 ] = ord( "<" )
+        character_buffer_for_width[ width ] = character_buffer
+    # }
+    return character_buffer
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that generates the plot strings for a block.
+#  The position calculation is done in the same order as in the
+#  "generate_plot_string" function, so the rounding -- and therefore
+#  the output -- is identical.  Values whose position is outside the
+#  plot line are shown as text, as in "generate_plot_string".
+
+def generate_plot_strings_for_block( values_to_plot , character_strings_to_show , scales_for_plotting ):
+
+    "Generates the plot strings for a block of values in one pass"
+
+    values = numpy.asarray( values_to_plot , dtype=numpy.float64 )
+    number_of_values = len( values )
+    if isinstance( character_strings_to_show , str ):
+        character_strings_to_show = [ character_strings_to_show ] * number_of_values
+    # }
+    scales = numpy.broadcast_to( numpy.asarray( scales_for_plotting , dtype=numpy.float64 ) , ( number_of_values , ) )
+
+    positions = numpy.trunc( ( ( values * scales ) * half_of_full_distance ) + offset_for_plotting )
+    is_within_plot = ( positions >= 1 ) & ( positions < ( number_of_spaces - 1 ) )
+    positions = numpy.where( is_within_plot , positions , 1 ).astype( numpy.int64 )
+    lengths_of_strings = numpy.fromiter( ( len( character_string ) for character_string in character_strings_to_show ) , dtype=numpy.int64 , count=number_of_values )
+
+    list_of_plot_strings = [ None ] * number_of_values
+
+
+#----------------------------------------------------------------------
+#  Handle the values within the plot, one group at a time for each
+#  length of the string to show, because each length produces a
+#  different width of plot line.
+
+    for length_of_string in numpy.unique( lengths_of_strings[ is_within_plot ] ):
+        row_numbers = numpy.nonzero( is_within_plot & ( lengths_of_strings == length_of_string ) )[ 0 ]
+        width = number_of_spaces + int( length_of_string )
+        character_buffer = character_buffer_with_rows( len( row_numbers ) , width )
+        rows = character_buffer[ 0 : len( row_numbers ) ]
+        string_characters = numpy.frombuffer( "".join( [ character_strings_to_show[ row_number ] for row_number in row_numbers ] ).encode( "ascii" ) , dtype=numpy.uint8 ).reshape( len( row_numbers ) , int( length_of_string ) )
+        columns = positions[ row_numbers ][ : , None ] + numpy.arange( int( length_of_string ) )[ None , : ]
+        buffer_rows = numpy.arange( len( row_numbers ) )[ : , None ]
+        rows[ buffer_rows , columns ] = string_characters
+        plot_lines = rows.view( "S%d" % width ).ravel( )
+        for index in range( len( row_numbers ) ):
+            list_of_plot_strings[ row_numbers[ index ] ] = plot_lines[ index ].decode( "ascii" )
+        # }
+        rows[ buffer_rows , columns ] = ord( " " )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Handle the values outside the plot.
+
+    for row_number in numpy.nonzero( ~ is_within_plot )[ 0 ]:
+        list_of_plot_strings[ row_number ] = "[%s = %d]\n" % ( character_strings_to_show[ row_number ] , values_to_plot[ row_number ] )
+    # }
+
+
+#----------------------------------------------------------------------
+#  All done.
+
+    return list_of_plot_strings
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes the plot strings for a block, each
+#  followed by a newline, using a single write.
+
+def write_plot_strings_for_block( output_file , values_to_plot , character_strings_to_show , scales_for_plotting ):
+
+    "Writes the plot strings for a block of values to a file"
+
+    list_of_plot_strings = generate_plot_strings_for_block( values_to_plot , character_strings_to_show , scales_for_plotting )
+    if len( list_of_plot_strings ) > 0:
+        output_file.write( "\n".join( list_of_plot_strings ) + "\n" )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        generate_signal_blocks_for_testing.py
+#        -------------------------------------
+#
+#  Generates signals for testing and benchmarking the
+#  Quick Rolling Spectral Transform (QRST) algorithm:  multi-tone,
+#  chirp, noise, burst, and silence signals.  The signals are
+#  calculated with NumPy in blocks of samples, and each block is
+#  written to the file in a single write.
+#
+#  Each signal is fully specified by a dictionary of parameters
+#  (including a seed for the random numbers used by noise), so the same
+#  parameters always produce the same signal.  Generated files are
+#  kept in a cache directory, named according to their parameters, so
+#  that benchmarks do not need to generate them again.
+#
+#  The files contain little-endian signed 16-bit values without a
+#  header, the same as the file written by
+#  "generate_signal_for_testing.py".
+#
+#  Sample usage as a library:
+#
+#      import generate_signal_blocks_for_testing
+#      parameters = generate_signal_blocks_for_testing.parameters_for_signal( "chirp" , duration_in_seconds=3600 )
+#      path_to_file = generate_signal_blocks_for_testing.cached_signal_file( parameters )
+#
+#  Sample usage from the command line:
+#
+#      python generate_signal_blocks_for_testing.py --kind multi_tone --frequencies 440,1000 --duration 60
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Specify the kinds of signals, the default parameters, and the
+#  default number of samples calculated at a time.
+#  The chirp defaults match "generate_signal_for_testing.py".
+#  The format version is part of each cached file's name, so it must be
+#  increased whenever a change to this code changes the generated
+#  samples.
+
+names_of_signal_kinds = ( "multi_tone" , "chirp" , "noise" , "burst" , "silence" )
+
+default_parameters = { "sample_rate" : 8000 , "duration_in_seconds" : 10.0 , "offset" : 2000 , "amplitude" : 12000 , "seed" : 1 , "frequencies" : [ 440.0 , 1000.0 , 2500.0 ] , "chirp_length_in_samples" : 20000 , "starting_angle_increment" : numpy.pi / 2 , "ending_angle_increment" : numpy.pi / 256 , "burst_frequency" : 1000.0 , "burst_period_in_seconds" : 0.5 , "burst_duty_cycle" : 0.25 }
+
+default_samples_per_block = 2 ** 16
+
+signal_format_version = 1
+
+default_cache_directory = os.path.join( os.path.expanduser( "~" ) , ".cache" , "qrst_test_signals" )
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the complete parameters for a
+#  signal, using the default values for any parameters that are not
+#  specified.
+
+def parameters_for_signal( kind , **specified_parameters ):
+
+    "Returns the complete parameters for a kind of test signal"
+
+    if kind not in names_of_signal_kinds:
+        raise ValueError( "unknown kind of signal:  %s" % kind )
+    # }
+    parameters = dict( default_parameters )
+    parameters.update( specified_parameters )
+    parameters[ "kind" ] = kind
+    return parameters
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that calculates one block of samples, starting at
+#  the specified sample number, as floating-point values.  The random
+#  generator supplies the noise, so blocks of a noise signal must be
+#  calculated in order.
+
+def calculate_block_of_samples( parameters , first_sample_number , number_of_samples , random_generator ):
+
+    "Calculates a block of a test signal as floating-point values"
+
+    kind = parameters[ "kind" ]
+    sample_numbers = numpy.arange( first_sample_number , first_sample_number + number_of_samples , dtype=numpy.int64 )
+    times = sample_numbers / parameters[ "sample_rate" ]
+    amplitude = parameters[ "amplitude" ]
+
+
+#----------------------------------------------------------------------
+#  A multi-tone signal sums equal-amplitude sine waves at the
+#  specified frequencies, scaled so the sum stays within the amplitude.
+
+    if kind == "multi_tone":
+        block = numpy.zeros( number_of_samples )
+        amplitude_per_tone = amplitude / len( parameters[ "frequencies" ] )
+        for frequency in parameters[ "frequencies" ]:
+            block = block + ( amplitude_per_tone * numpy.sin( 2 * numpy.pi * frequency * times ) )
+        # }
+
+
+#----------------------------------------------------------------------
+#  A chirp changes its angle increment linearly from the starting
+#  increment to the ending increment over each chirp length, and then
+#  repeats.  The angle is the cumulative sum of the increments, which
+#  is calculated here in closed form:  the sum over the earlier whole
+#  chirps, plus the sum of the arithmetic series within this chirp.
+
+    elif kind == "chirp":
+        segment_length = parameters[ "chirp_length_in_samples" ] + 1
+        starting_increment = parameters[ "starting_angle_increment" ]
+        change_of_increment_per_sample = ( parameters[ "ending_angle_increment" ] - starting_increment ) / segment_length
+        count_within_segment = sample_numbers % segment_length
+        number_of_earlier_segments = sample_numbers // segment_length
+        angle_per_segment = ( segment_length * starting_increment ) + ( change_of_increment_per_sample * ( segment_length - 1 ) * segment_length / 2 )
+        angles = ( number_of_earlier_segments * angle_per_segment ) + ( ( count_within_segment + 1 ) * starting_increment ) + ( change_of_increment_per_sample * count_within_segment * ( count_within_segment + 1 ) / 2 )
+        block = amplitude * numpy.sin( angles )
+
+
+#----------------------------------------------------------------------
+#  Noise is uniformly distributed between the negative and positive
+#  amplitude.
+
+    elif kind == "noise":
+        block = random_generator.uniform( - amplitude , amplitude , number_of_samples )
+
+
+#----------------------------------------------------------------------
+#  A burst signal is a tone that is switched on for the duty-cycle
+#  portion of each period, and is otherwise silent.
+
+    elif kind == "burst":
+        period_in_samples = parameters[ "burst_period_in_seconds" ] * parameters[ "sample_rate" ]
+        is_on = ( numpy.mod( sample_numbers , period_in_samples ) < ( period_in_samples * parameters[ "burst_duty_cycle" ] ) )
+        block = amplitude * numpy.sin( 2 * numpy.pi * parameters[ "burst_frequency" ] * times ) * is_on
+
+
+#----------------------------------------------------------------------
+#  Silence contains only the offset.
+
+    else:
+        block = numpy.zeros( number_of_samples )
+    # }
+
+    return block + parameters[ "offset" ]
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a generator function that supplies the signal one block at
+#  a time, as little-endian signed 16-bit values.  Values outside the
+#  16-bit range are clipped.
+
+def generate_signal_blocks( parameters , samples_per_block=default_samples_per_block ):
+
+    "Supplies a test signal as blocks of 16-bit samples"
+
+    random_generator = numpy.random.default_rng( parameters[ "seed" ] )
+    total_number_of_samples = int( parameters[ "duration_in_seconds" ] * parameters[ "sample_rate" ] )
+    for first_sample_number in range( 0 , total_number_of_samples , samples_per_block ):
+        number_of_samples = min( samples_per_block , total_number_of_samples - first_sample_number )
+        block = calculate_block_of_samples( parameters , first_sample_number , number_of_samples , random_generator )
+        yield numpy.clip( numpy.trunc( block ) , -32768 , 32767 ).astype( "<i2" )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes a signal to a file, one whole block
+#  at a time.
+
+def write_signal_file( parameters , path_to_file , samples_per_block=default_samples_per_block ):
+
+    "Writes a test signal to a raw 16-bit file"
+
+    with open( path_to_file , "wb" ) as signal_file:
+        for block in generate_signal_blocks( parameters , samples_per_block ):
+            signal_file.write( block.tobytes( ) )
+        # }
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the path to a cached copy of a
+#  signal, generating the signal only if it is not already cached.
+#  The file name contains the kind of signal and a hash of all the
+#  parameters.  A new file is written under a temporary name and then
+#  renamed, so an interrupted run never leaves a partial file in the
+#  cache.
+
+def cached_signal_file( parameters , cache_directory=default_cache_directory ):
+
+    "Returns the path to a cached test signal, generating it if needed"
+
+    text_of_parameters = json.dumps( { "parameters" : parameters , "format_version" : signal_format_version } , sort_keys=True )
+    hash_of_parameters = hashlib.sha256( text_of_parameters.encode( "utf-8" ) ).hexdigest( )[ 0 : 16 ]
+    path_to_file = os.path.join( cache_directory , "%s_%s.raw" % ( parameters[ "kind" ] , hash_of_parameters ) )
+    if not os.path.exists( path_to_file ):
+        os.makedirs( cache_directory , exist_ok=True )
+        path_to_partial_file = "%s.partial.%d" % ( path_to_file , os.getpid( ) )
+        write_signal_file( parameters , path_to_partial_file )
+        os.replace( path_to_partial_file , path_to_file )
+        with open( os.path.join( cache_directory , "%s_%s.json" % ( parameters[ "kind" ] , hash_of_parameters ) ) , "w" ) as description_file:
+            description_file.write( text_of_parameters + "\n" )
+        # }
+    # }
+    return path_to_file
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which generates a signal specified on
+#  the command line, either into the cache or into a named file.
+
+def main( ):
+
+    "Generates a test signal from command-line parameters"
+
+    parser = argparse.ArgumentParser( description="Generates test signals for the QRST algorithm" )
+    parser.add_argument( "--kind" , choices=names_of_signal_kinds , default="chirp" , help="kind of signal" )
+    parser.add_argument( "--sample-rate" , type=int , default=default_parameters[ "sample_rate" ] , help="samples per second" )
+    parser.add_argument( "--duration" , type=float , default=default_parameters[ "duration_in_seconds" ] , help="seconds of audio" )
+    parser.add_argument( "--amplitude" , type=float , default=default_parameters[ "amplitude" ] , help="peak amplitude, in 16-bit sample units" )
+    parser.add_argument( "--offset" , type=float , default=default_parameters[ "offset" ] , help="constant added to every sample" )
+    parser.add_argument( "--seed" , type=int , default=default_parameters[ "seed" ] , help="seed for the noise" )
+    parser.add_argument( "--frequencies" , default=",".join( [ "%g" % frequency for frequency in default_parameters[ "frequencies" ] ] ) , help="comma-separated frequencies of a multi-tone signal" )
+    parser.add_argument( "--output" , default="" , help="file to write, instead of the cache" )
+    parser.add_argument( "--cache-directory" , default=default_cache_directory , help="directory that holds generated signals" )
+    arguments = parser.parse_args( )
+
+    parameters = parameters_for_signal( arguments.kind , sample_rate=arguments.sample_rate , duration_in_seconds=arguments.duration , amplitude=arguments.amplitude , offset=arguments.offset , seed=arguments.seed , frequencies=[ float( frequency ) for frequency in arguments.frequencies.split( "," ) ] )
+    if arguments.output != "":
+        write_signal_file( parameters , arguments.output )
+        print( arguments.output )
+    else:
+        print( cached_signal_file( parameters , arguments.cache_directory ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Generate the signal when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
+
+#----------------------------------------------------------------------
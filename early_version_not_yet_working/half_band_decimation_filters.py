@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        half_band_decimation_filters.py
+#        -------------------------------
+#
+#  Provides a selectable decimation stage for building the octaves of
+#  the Quick Rolling Spectral Transform (QRST) algorithm in block mode.
+#  Each octave's samples are calculated from every second sample of
+#  the next-higher octave, after low-pass filtering with one of these
+#  precomputed integer kernels:
+#
+#      "pair_sum"       the sum of two adjacent samples, which is the
+#                       decimation used within the QRST function
+#                       (without its peak-and-trough adjustments)
+#      "half_band_7"    half-band FIR kernels with 7 to 31 taps
+#      ...
+#      "half_band_31"
+#
+#  In a half-band kernel every second coefficient (other than the
+#  center coefficient) is zero, so the filtering is done in polyphase
+#  form:  only the output samples are calculated, and only the
+#  non-zero coefficients are used.  Each coefficient is applied to a
+#  whole block of samples at once with NumPy.  All calculations are
+#  done in integers.  As in the QRST function, each octave's samples
+#  are twice the (filtered) average of the next-higher octave's
+#  samples.
+#
+#  Longer kernels reject more of the signal that would otherwise alias
+#  into the next-lower octave, at the cost of more calculations.  To
+#  measure both, run this code from the command line:
+#
+#      python half_band_decimation_filters.py
+#
+#  Sample usage as a library:
+#
+#      cascade = half_band_decimation_filters.DecimationCascade( "half_band_15" , 7 )
+#      list_of_samples_at_octave = cascade.decimate_block( block_of_samples )
+#
+#  The batch engine (see "batch_quick_rolling_spectral_transform.py")
+#  uses a kernel -- instead of the pair sum -- to calculate each
+#  octave's samples when it is created with, for example:
+#  decimation_kernel="half_band_15"
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import sys
+import time
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Initialization.  The highest octave is always 15.  The kernel
+#  coefficients are integers that add up to a power of two, with this
+#  many bits.
+
+highest_octave = 15
+
+number_of_bits_in_kernel_sum = 14
+
+kernel_lengths_for_half_band = ( 7 , 11 , 15 , 19 , 23 , 31 )
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that calculates an integer half-band kernel with
+#  the specified number of taps (three more than a multiple of four,
+#  so that the outermost coefficients are not zero).  The kernel is a
+#  Blackman-windowed sinc function with its cutoff at half the
+#  Nyquist frequency.  The center coefficient is exactly half the sum,
+#  and the rounding of the other coefficients is corrected -- next to
+#  the center -- so that the sum is exactly a power of two.
+
+def integer_half_band_kernel( number_of_taps ):
+
+    "Calculates an integer half-band FIR kernel"
+
+    half_length = ( number_of_taps - 1 ) // 2
+    offsets = numpy.arange( - half_length , half_length + 1 )
+    coefficients = 0.5 * numpy.sinc( offsets / 2 ) * numpy.blackman( number_of_taps + 2 )[ 1 : -1 ]
+    odd_coefficients = coefficients[ offsets % 2 == 1 ]
+    odd_coefficients = odd_coefficients * ( 0.5 / numpy.sum( odd_coefficients ) )
+
+    kernel_sum = 2 ** number_of_bits_in_kernel_sum
+    integer_kernel = numpy.zeros( number_of_taps , dtype=numpy.int64 )
+    integer_kernel[ half_length ] = kernel_sum // 2
+    integer_kernel[ offsets % 2 == 1 ] = numpy.round( odd_coefficients * kernel_sum ).astype( numpy.int64 )
+    rounding_error = kernel_sum - int( numpy.sum( integer_kernel ) )
+    integer_kernel[ half_length - 1 ] = integer_kernel[ half_length - 1 ] + ( rounding_error // 2 )
+    integer_kernel[ half_length + 1 ] = integer_kernel[ half_length + 1 ] + ( rounding_error - ( rounding_error // 2 ) )
+    return tuple( integer_kernel.tolist( ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Precompute the kernels, each with the number of bits in its sum.
+#  The "pair_sum" kernel adds up to two (one bit), so -- like the other
+#  kernels, after scaling -- its output is twice the average.
+
+kernel_for_name = { "pair_sum" : ( 1 , 1 ) }
+number_of_bits_in_sum_for_name = { "pair_sum" : 1 }
+for number_of_taps in kernel_lengths_for_half_band:
+    kernel_for_name[ "half_band_%d" % number_of_taps ] = integer_half_band_kernel( number_of_taps )
+    number_of_bits_in_sum_for_name[ "half_band_%d" % number_of_taps ] = number_of_bits_in_kernel_sum
+# }
+
+names_of_kernels = tuple( [ "pair_sum" ] + [ ( "half_band_%d" % number_of_taps ) for number_of_taps in kernel_lengths_for_half_band ] )
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that decimates one octave's samples by two, one
+#  block at a time.  The last samples of each block are kept for
+#  filtering the next block, and the count of samples so far keeps
+#  each output sample aligned with every second input sample (the
+#  second, fourth, and so on), regardless of the block lengths.
+
+class HalfBandDecimator:
+
+    "Decimates a stream of integer samples by two with an integer FIR kernel"
+
+
+#----------------------------------------------------------------------
+#  Initialize the decimator for the named kernel.  Before the first
+#  sample, the earlier samples are regarded as equal to the first
+#  sample, which prevents an initial spike.
+
+    def __init__( self , kernel_name ):
+        self.kernel = kernel_for_name[ kernel_name ]
+        self.number_of_taps = len( self.kernel )
+        self.number_of_bits_in_sum = number_of_bits_in_sum_for_name[ kernel_name ]
+        self.list_of_nonzero_taps = [ ( tap , coefficient ) for ( tap , coefficient ) in enumerate( self.kernel ) if coefficient != 0 ]
+        self.earlier_samples = None
+        self.number_of_samples_so_far = 0
+    # }
+
+
+#----------------------------------------------------------------------
+#  Decimate a block of samples and return the output samples that
+#  became available, as an array of integers.  Output samples are
+#  twice the filtered average, rounded.
+
+    def decimate_block( self , block_of_samples ):
+        block_of_samples = numpy.asarray( block_of_samples , dtype=numpy.int64 )
+        number_of_samples = len( block_of_samples )
+        if number_of_samples == 0:
+            return numpy.zeros( 0 , dtype=numpy.int64 )
+        # }
+        if self.earlier_samples is None:
+            self.earlier_samples = numpy.full( self.number_of_taps - 1 , block_of_samples[ 0 ] , dtype=numpy.int64 )
+        # }
+        samples = numpy.concatenate( ( self.earlier_samples , block_of_samples ) )
+
+#  The first output sample is at the first block sample that is a
+#  second (fourth, and so on) sample overall.  Output sample "n"
+#  is the sum of each coefficient "k" times the input sample "k"
+#  positions earlier.
+
+        first_output_offset = ( self.number_of_samples_so_far + 1 ) % 2
+        number_of_outputs = ( number_of_samples - first_output_offset + 1 ) // 2
+        output_sums = numpy.zeros( number_of_outputs , dtype=numpy.int64 )
+        first_position = first_output_offset + self.number_of_taps - 1
+        for ( tap , coefficient ) in self.list_of_nonzero_taps:
+            output_sums += coefficient * samples[ ( first_position - tap ) : ( first_position - tap + ( 2 * number_of_outputs ) ) : 2 ]
+        # }
+
+        self.earlier_samples = samples[ len( samples ) - ( self.number_of_taps - 1 ) : ]
+        self.number_of_samples_so_far = self.number_of_samples_so_far + number_of_samples
+        if self.number_of_bits_in_sum == 1:
+            return output_sums
+        # }
+        return ( output_sums + ( 1 << ( self.number_of_bits_in_sum - 2 ) ) ) >> ( self.number_of_bits_in_sum - 1 )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that builds the octaves -- from octave 15 (the
+#  input samples) downward -- with one decimator for each octave
+#  transition.
+
+class DecimationCascade:
+
+    "Builds the QRST octaves of a stream, one block at a time, with a selectable kernel"
+
+
+#----------------------------------------------------------------------
+#  Initialize the cascade for the named kernel and the number of
+#  octaves, including octave 15.
+
+    def __init__( self , kernel_name , number_of_octaves ):
+        self.kernel_name = kernel_name
+        self.number_of_octaves = number_of_octaves
+        self.list_of_decimators = [ HalfBandDecimator( kernel_name ) for transition in range( number_of_octaves - 1 ) ]
+    # }
+
+
+#----------------------------------------------------------------------
+#  Decimate a block of input samples, and return a list of the samples
+#  that became available at each octave, starting with octave 15.
+
+    def decimate_block( self , block_of_samples ):
+        samples_at_octave = numpy.asarray( block_of_samples , dtype=numpy.int64 )
+        list_of_samples_at_octave = [ samples_at_octave ]
+        for decimator in self.list_of_decimators:
+            samples_at_octave = decimator.decimate_block( samples_at_octave )
+            list_of_samples_at_octave.append( samples_at_octave )
+        # }
+        return list_of_samples_at_octave
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that measures the gain of a kernel -- in one
+#  decimation -- for a sine wave at the specified frequency (as a
+#  fraction of the input's Nyquist frequency), relative to its gain at
+#  zero frequency.  Frequencies above half the Nyquist frequency
+#  appear as aliases in the output.
+
+def relative_gain_at_frequency( kernel_name , frequency_as_fraction_of_nyquist , number_of_samples=16384 ):
+
+    "Measures the relative gain of one decimation for a sine wave"
+
+    amplitude = 8000
+    sample_numbers = numpy.arange( number_of_samples )
+    sine_wave = numpy.round( amplitude * numpy.sin( numpy.pi * frequency_as_fraction_of_nyquist * sample_numbers + 0.3 ) ).astype( numpy.int64 )
+    output_samples = HalfBandDecimator( kernel_name ).decimate_block( sine_wave )
+    output_samples = output_samples[ 64 : ].astype( numpy.float64 )
+    root_mean_square_of_output = numpy.sqrt( numpy.mean( ( output_samples - numpy.mean( output_samples ) ) ** 2 ) )
+    return root_mean_square_of_output / ( 2 * amplitude / numpy.sqrt( 2 ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that writes the benchmark:  for each kernel,
+#  the number of multiplications per output sample, the throughput of
+#  a cascade of octaves, the droop within the passband, and the
+#  rejection of the frequencies that would alias into the next-lower
+#  octave, at several frequencies and at worst over the upper half of
+#  the stopband.
+
+def main( ):
+
+    "Benchmarks the cost and the aliasing rejection of each decimation kernel"
+
+    parser = argparse.ArgumentParser( description="Cost and aliasing rejection of the QRST decimation kernels" )
+    parser.add_argument( "--octaves" , type=int , default=7 , help="number of octaves in the cascade, including octave 15" )
+    parser.add_argument( "--samples" , type=int , default=2 ** 21 , help="number of input samples used to measure throughput" )
+    parser.add_argument( "--samples-per-block" , type=int , default=4096 , help="number of input samples supplied at a time" )
+    arguments = parser.parse_args( )
+
+    random_generator = numpy.random.default_rng( 1 )
+    input_samples = random_generator.integers( -12000 , 12000 , arguments.samples , dtype=numpy.int64 )
+    frequencies_for_rejection = ( 0.625 , 0.75 , 0.875 )
+    frequencies_for_worst_rejection = numpy.linspace( 0.75 , 1.0 , 41 )
+
+    sys.stdout.write( "%-14s %5s %8s %14s %8s %10s %10s %10s %10s\n" % ( "kernel" , "taps" , "mults" , "samples/sec" , "droop" , "rej@0.625" , "rej@0.75" , "rej@0.875" , "worst>0.75" ) )
+    for kernel_name in names_of_kernels:
+        cascade = DecimationCascade( kernel_name , arguments.octaves )
+        processor_time_at_start = time.process_time( )
+        for first_sample_number in range( 0 , arguments.samples , arguments.samples_per_block ):
+            cascade.decimate_block( input_samples[ first_sample_number : first_sample_number + arguments.samples_per_block ] )
+        # }
+        samples_per_second = arguments.samples / ( time.process_time( ) - processor_time_at_start )
+
+        droop_in_decibels = 20 * numpy.log10( relative_gain_at_frequency( kernel_name , 0.25 ) )
+        list_of_rejections = [ -20 * numpy.log10( relative_gain_at_frequency( kernel_name , frequency ) ) for frequency in frequencies_for_rejection ]
+        worst_rejection = min( [ -20 * numpy.log10( relative_gain_at_frequency( kernel_name , frequency ) ) for frequency in frequencies_for_worst_rejection[ : -1 ] ] )
+        number_of_multiplications = len( cascade.list_of_decimators[ 0 ].list_of_nonzero_taps ) if len( cascade.list_of_decimators ) > 0 else 0
+        sys.stdout.write( "%-14s %5d %8d %14.0f %7.2fdB %8.1fdB %8.1fdB %8.1fdB %8.1fdB\n" % ( kernel_name , len( kernel_for_name[ kernel_name ] ) , number_of_multiplications , samples_per_second , droop_in_decibels , list_of_rejections[ 0 ] , list_of_rejections[ 1 ] , list_of_rejections[ 2 ] , worst_rejection ) )
+    # }
+    sys.stdout.write( "\nFrequencies are fractions of the input's Nyquist frequency.  Droop is the gain at 0.25,\nand rejection is the attenuation of frequencies that alias into the next-lower octave.\n" )
+
+# }
+
+
+if __name__ == "__main__":
+    main( )
+# }
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        load_test_live_streams.py
+#        -------------------------
+#
+#  Measures how many concurrent live audio streams one host can
+#  analyze with the Quick Rolling Spectral Transform (QRST) function
+#  before the analysis falls behind real time.
+#
+#  Each simulated client generates a chirp signal (in the same way as
+#  "generate_signal_for_testing.py") and delivers it -- one block at a
+#  time, paced by the specified sample rate -- to its own local QRST
+#  streaming process.  The QRST function keeps its state in global
+#  variables, so each stream needs its own process.  The time at which
+#  each octave result becomes available is compared with the time at
+#  which the sample that completed the measurement was captured.
+#
+#  The number of concurrent streams is increased until the streams
+#  fall behind real time, and then a summary report is written.
+#
+#  With "--degrade", each stream uses the real-time deadline monitor
+#  (see "real_time_deadline_monitor.py"), which sheds work when the
+#  stream falls behind, and the report includes every degradation
+#  change.
+#
+#  Sample usage:
+#
+#      python load_test_live_streams.py --sample-rate 8000 --stream-counts 1,2,4,8
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from math import *
+
+
+#----------------------------------------------------------------------
+#  Specify the QRST settings used by every simulated stream.
+#  These match the settings in the sample-usage code.
+
+number_of_octaves_for_calculations = 8
+
+number_of_samples_for_wavelength_measurement = 24
+
+scale_for_amplitude = 100.0
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that generates a chirp signal for testing.
+#  The chirp is the same as the one written by
+#  "generate_signal_for_testing.py", except that the length of the
+#  chirp can be changed so that each stream carries a different signal.
+
+def generate_chirp_signal_for_testing( number_of_samples , time_span ):
+
+    "Generates a list of chirp samples, scaled into QRST integer units"
+
+    list_of_samples = [ ]
+    offset = 2000
+    amplitude_1 = 12000
+    angle_1 = 0
+    segment_length = time_span + 1
+    starting_wavelength_increment = pi / 2
+    ending_wavelength_increment = pi / 256
+    for time_counter in range( number_of_samples ):
+        time_count_within_segment = time_counter % segment_length
+        wavelength_increment_1 = ( ( time_count_within_segment * ending_wavelength_increment ) + ( ( segment_length - time_count_within_segment ) * starting_wavelength_increment ) ) / segment_length
+        angle_1 = angle_1 + wavelength_increment_1
+        waveform_sample = int( offset + ( amplitude_1 * sin( angle_1 ) ) )
+        list_of_samples.append( int( waveform_sample * scale_for_amplitude ) )
+    # }
+    return list_of_samples
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that runs in each simulated-stream process.
+#  The samples of each block are regarded as "captured" at the
+#  scheduled real-time moment of each sample, and the block is
+#  delivered when its last sample has been captured.  If the analysis
+#  of earlier blocks is still running at that moment, the block
+#  waits, and that waiting is the lag behind real time.
+
+def run_simulated_live_stream( stream_number , settings , starting_time , result_queue ):
+
+    "Delivers a paced chirp signal to a QRST streaming process and measures latencies"
+
+
+#----------------------------------------------------------------------
+#  Work in a temporary directory because the QRST function writes a
+#  text-waveform debugging file into the current directory.
+
+    os.chdir( settings[ "working_directory" ] )
+    os.makedirs( "stream_%03d" % stream_number , exist_ok=True )
+    os.chdir( "stream_%03d" % stream_number )
+    import quick_rolling_spectral_transform
+
+
+#----------------------------------------------------------------------
+#  Generate the signal before the timed part of the test begins.
+
+    sample_rate = settings[ "sample_rate" ]
+    samples_per_block = settings[ "samples_per_block" ]
+    number_of_blocks = int( ( settings[ "test_duration_in_seconds" ] * sample_rate ) / samples_per_block )
+    list_of_samples = generate_chirp_signal_for_testing( number_of_blocks * samples_per_block , 20000 + ( 1000 * stream_number ) )
+
+
+#----------------------------------------------------------------------
+#  Deliver each block at the moment its last sample is captured, or
+#  later if the analysis has fallen behind.
+
+    monitor = None
+    if settings[ "degrade" ]:
+        import real_time_deadline_monitor
+        log_of_changes = io.StringIO( )
+        monitor = real_time_deadline_monitor.RealTimeDeadlineMonitor( sample_rate , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , log_file=log_of_changes , maximum_lag_in_seconds=settings[ "maximum_allowed_lag_in_seconds" ] )
+    # }
+
+    list_of_event_latencies = [ ]
+    list_of_lags_at_block = [ ]
+    processor_time_at_start = time.process_time( )
+    for block_number in range( number_of_blocks ):
+        first_sample_number = block_number * samples_per_block
+        time_of_block_capture = starting_time + ( ( first_sample_number + samples_per_block ) / sample_rate )
+        time_now = time.monotonic( )
+        if time_now < time_of_block_capture:
+            time.sleep( time_of_block_capture - time_now )
+        # }
+
+        if monitor is None:
+            list_of_octave_results = quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( list_of_samples[ first_sample_number : first_sample_number + samples_per_block ] , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+        else:
+            list_of_octave_results = monitor.transform_block( list_of_samples[ first_sample_number : first_sample_number + samples_per_block ] , max( 0.0 , time.monotonic( ) - time_of_block_capture ) )
+        # }
+
+        time_of_completion = time.monotonic( )
+        list_of_lags_at_block.append( time_of_completion - time_of_block_capture )
+        for ( sample_offset , octave , amplitude , wavelength ) in list_of_octave_results:
+            time_of_sample_capture = starting_time + ( ( first_sample_number + sample_offset + 1 ) / sample_rate )
+            list_of_event_latencies.append( time_of_completion - time_of_sample_capture )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  All done.  Return the measurements to the harness.
+
+    stream_result = { "stream_number" : stream_number , "event_latencies" : list_of_event_latencies , "lags_at_block" : list_of_lags_at_block , "number_of_samples" : number_of_blocks * samples_per_block , "processor_time" : time.process_time( ) - processor_time_at_start , "degradation_log" : "" , "final_degradation_level" : 0 }
+    if monitor is not None:
+        stream_result[ "degradation_log" ] = log_of_changes.getvalue( )
+        stream_result[ "final_degradation_level" ] = monitor.degradation_level
+    # }
+    result_queue.put( stream_result )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the value at the specified percentile
+#  (zero to 100) of a list of values, using the nearest-rank method.
+
+def value_at_percentile( list_of_values , percentile ):
+
+    "Returns the nearest-rank percentile of a list of values"
+
+    if len( list_of_values ) == 0:
+        return 0.0
+    # }
+    sorted_values = sorted( list_of_values )
+    rank = int( ceil( ( percentile / 100.0 ) * len( sorted_values ) ) )
+    if rank < 1:
+        rank = 1
+    # }
+    return sorted_values[ rank - 1 ]
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that runs the specified number of concurrent
+#  streams and summarizes their measurements.
+#  A stream has fallen behind real time if its lag -- at the end of
+#  the test -- exceeds the allowed lag.
+
+def run_concurrent_streams( number_of_streams , settings ):
+
+    "Runs concurrent simulated streams and returns a summary of their latencies and lags"
+
+    result_queue = multiprocessing.Queue( )
+    starting_time = time.monotonic( ) + settings[ "startup_delay_in_seconds" ]
+    list_of_processes = [ ]
+    for stream_number in range( 1 , number_of_streams + 1 ):
+        process = multiprocessing.Process( target=run_simulated_live_stream , args=( stream_number , settings , starting_time , result_queue ) )
+        process.start( )
+        list_of_processes.append( process )
+    # }
+    list_of_stream_results = [ result_queue.get( ) for process in list_of_processes ]
+    for process in list_of_processes:
+        process.join( )
+    # }
+
+    all_event_latencies = [ ]
+    count_of_streams_behind_real_time = 0
+    largest_final_lag = 0.0
+    total_number_of_samples = 0
+    total_processor_time = 0.0
+    degradation_log = ""
+    highest_final_degradation_level = 0
+    for stream_result in sorted( list_of_stream_results , key=lambda stream_result : stream_result[ "stream_number" ] ):
+        if stream_result[ "degradation_log" ] != "":
+            degradation_log = degradation_log + ( "stream %d:\n" % stream_result[ "stream_number" ] ) + stream_result[ "degradation_log" ]
+        # }
+        if stream_result[ "final_degradation_level" ] > highest_final_degradation_level:
+            highest_final_degradation_level = stream_result[ "final_degradation_level" ]
+        # }
+        all_event_latencies.extend( stream_result[ "event_latencies" ] )
+        final_lag = stream_result[ "lags_at_block" ][ -1 ]
+        if final_lag > largest_final_lag:
+            largest_final_lag = final_lag
+        # }
+        if final_lag > settings[ "maximum_allowed_lag_in_seconds" ]:
+            count_of_streams_behind_real_time = count_of_streams_behind_real_time + 1
+        # }
+        total_number_of_samples = total_number_of_samples + stream_result[ "number_of_samples" ]
+        total_processor_time = total_processor_time + stream_result[ "processor_time" ]
+    # }
+
+    return { "number_of_streams" : number_of_streams , "number_of_events" : len( all_event_latencies ) , "latency_p50" : value_at_percentile( all_event_latencies , 50 ) , "latency_p90" : value_at_percentile( all_event_latencies , 90 ) , "latency_p99" : value_at_percentile( all_event_latencies , 99 ) , "latency_maximum" : value_at_percentile( all_event_latencies , 100 ) , "largest_final_lag" : largest_final_lag , "count_of_streams_behind_real_time" : count_of_streams_behind_real_time , "processor_seconds_per_audio_second" : total_processor_time * settings[ "sample_rate" ] / total_number_of_samples , "degradation_log" : degradation_log , "highest_final_degradation_level" : highest_final_degradation_level }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes the summary report.
+
+def write_load_test_report( report_file , list_of_summaries , settings ):
+
+    "Writes the load-test summary report"
+
+    report_file.write( "QRST live-stream load test\n\n" )
+    report_file.write( "sample rate:  %d samples per second\n" % settings[ "sample_rate" ] )
+    report_file.write( "block size:  %d samples\n" % settings[ "samples_per_block" ] )
+    report_file.write( "test duration:  %.1f seconds of audio per stream\n" % settings[ "test_duration_in_seconds" ] )
+    report_file.write( "octaves:  %d , samples per wavelength measurement:  %d\n" % ( number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement ) )
+    report_file.write( "allowed lag behind real time:  %.3f seconds\n" % settings[ "maximum_allowed_lag_in_seconds" ] )
+    report_file.write( "host processors:  %d\n\n" % os.cpu_count( ) )
+    report_file.write( "streams   events   latency p50   p90       p99       max       final lag   behind   cpu s per audio s\n" )
+    largest_sustained_number_of_streams = 0
+    for summary in list_of_summaries:
+        report_file.write( "%7d  %7d   %9.4f  %8.4f  %8.4f  %8.4f  %9.4f  %7d   %8.3f\n" % ( summary[ "number_of_streams" ] , summary[ "number_of_events" ] , summary[ "latency_p50" ] , summary[ "latency_p90" ] , summary[ "latency_p99" ] , summary[ "latency_maximum" ] , summary[ "largest_final_lag" ] , summary[ "count_of_streams_behind_real_time" ] , summary[ "processor_seconds_per_audio_second" ] ) )
+        if summary[ "count_of_streams_behind_real_time" ] == 0:
+            largest_sustained_number_of_streams = summary[ "number_of_streams" ]
+        # }
+    # }
+    report_file.write( "\n" )
+    if ( len( list_of_summaries ) > 0 ) and ( list_of_summaries[ -1 ][ "count_of_streams_behind_real_time" ] > 0 ):
+        report_file.write( "Processing fell behind real time at %d concurrent streams.\n" % list_of_summaries[ -1 ][ "number_of_streams" ] )
+    else:
+        report_file.write( "Processing did not fall behind real time at any tested stream count.\n" )
+    # }
+    report_file.write( "Largest sustained number of concurrent streams:  %d\n" % largest_sustained_number_of_streams )
+    if settings[ "degrade" ]:
+        for summary in list_of_summaries:
+            report_file.write( "\nDegradation changes with %d concurrent streams (highest final level %d):\n" % ( summary[ "number_of_streams" ] , summary[ "highest_final_degradation_level" ] ) )
+            report_file.write( summary[ "degradation_log" ] if summary[ "degradation_log" ] != "" else "none\n" )
+        # }
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which increases the number of concurrent
+#  streams until processing falls behind real time.
+
+def main( ):
+
+    "Runs the live-stream load test and writes the summary report"
+
+    parser = argparse.ArgumentParser( description="Load test for concurrent live QRST streams" )
+    parser.add_argument( "--sample-rate" , type=int , default=8000 , help="samples per second of each simulated stream" )
+    parser.add_argument( "--samples-per-block" , type=int , default=256 , help="number of samples delivered at a time" )
+    parser.add_argument( "--test-duration" , type=float , default=10.0 , help="seconds of audio delivered by each stream" )
+    parser.add_argument( "--stream-counts" , default="1,2,4,8,16,32" , help="comma-separated numbers of concurrent streams to try" )
+    parser.add_argument( "--maximum-allowed-lag" , type=float , default=0.25 , help="seconds of lag that count as falling behind real time" )
+    parser.add_argument( "--degrade" , action="store_true" , help="shed work with the real-time deadline monitor when a stream falls behind" )
+    parser.add_argument( "--report" , default="output_load_test_report.txt" , help="file that receives the summary report" )
+    arguments = parser.parse_args( )
+    if arguments.samples_per_block < 1:
+        parser.error( "--samples-per-block must be at least 1" )
+    # }
+    if ( arguments.test_duration * arguments.sample_rate ) < arguments.samples_per_block:
+        parser.error( "--test-duration must be long enough for at least one block of --samples-per-block samples" )
+    # }
+
+    settings = { "sample_rate" : arguments.sample_rate , "samples_per_block" : arguments.samples_per_block , "test_duration_in_seconds" : arguments.test_duration , "maximum_allowed_lag_in_seconds" : arguments.maximum_allowed_lag , "startup_delay_in_seconds" : 2.0 , "degrade" : arguments.degrade }
+
+    sys.path.insert( 0 , os.path.dirname( os.path.abspath( __file__ ) ) )
+    list_of_summaries = [ ]
+    with tempfile.TemporaryDirectory( ) as working_directory:
+        settings[ "working_directory" ] = working_directory
+        for number_of_streams in [ int( count ) for count in arguments.stream_counts.split( "," ) ]:
+            summary = run_concurrent_streams( number_of_streams , settings )
+            list_of_summaries.append( summary )
+            print( "[%d streams:  p99 latency %.4f s , final lag %.4f s , %d behind]" % ( number_of_streams , summary[ "latency_p99" ] , summary[ "largest_final_lag" ] , summary[ "count_of_streams_behind_real_time" ] ) )
+            if summary[ "count_of_streams_behind_real_time" ] > 0:
+                break
+            # }
+        # }
+    # }
+
+    with open( arguments.report , "w" ) as report_file:
+        write_load_test_report( report_file , list_of_summaries , settings )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Run the load test when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,250 @@
+#----------------------------------------------------------------------
+#
+#          metrics_exporter.py
+#          -------------------
+#
+#  Collects counters and gauges for a long-running Quick Rolling
+#  Spectral Transform (QRST) job, and publishes them -- in the
+#  Prometheus text format -- to a file and/or a local HTTP endpoint.
+#  The values are:
+#
+#      qrst_samples_processed_total     input samples transformed
+#      qrst_octave_events_total         measurements emitted, per octave
+#      qrst_records_written_total       records written to the .qrst file
+#      qrst_records_suppressed_total    octave values (one per octave
+#                                       per sample) not written because
+#                                       the octave's amplitude and
+#                                       wavelength did not change since
+#                                       the previous sample
+#      qrst_bytes_written_total         bytes written to the .qrst file
+#      qrst_processing_lag_seconds      elapsed time minus the duration
+#                                       of the processed audio (negative
+#                                       when ahead of real time)
+#      qrst_stage_seconds_total         cumulative time per QRST stage
+#      qrst_stage_calls_total           calls per QRST stage
+#
+#  The stage values are only published when stage-profiling counters
+#  (see "stage_profiling_counters.py") are supplied.
+#
+#  The processing loop only adds to plain integer attributes (no locks
+#  and no formatting), and a background thread periodically formats
+#  the values, replaces the file, and updates the text served over
+#  HTTP, so publishing never waits for the processing loop, or the
+#  reverse.  Sample usage:
+#
+#      metrics = metrics_exporter.TransformMetrics( 8000 )
+#      publisher = metrics_exporter.MetricsPublisher( metrics , file_name="qrst.prom" , port=9464 )
+#      publisher.start( )
+#      ...
+#      metrics.samples_processed = metrics.samples_processed + 1
+#      ...
+#      publisher.stop( )
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import http.server
+import os
+import threading
+import time
+
+
+#----------------------------------------------------------------------
+#  The highest octave is always 15.
+
+highest_octave = 15
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that holds the counters.  The processing loop
+#  updates the attributes directly.
+
+class TransformMetrics:
+
+    "Holds the counters of a QRST job, for publishing as metrics"
+
+
+#----------------------------------------------------------------------
+#  Initialize the counters to zero.  The sample rate is used to
+#  convert the number of processed samples into seconds of audio.
+
+    def __init__( self , sample_rate , stage_profiling_counters=None ):
+        self.sample_rate = sample_rate
+        self.stage_profiling_counters = stage_profiling_counters
+        self.samples_processed = 0
+        self.events_at_octave = [ 0 for octave in range( highest_octave + 1 ) ]
+        self.records_written = 0
+        self.records_suppressed = 0
+        self.bytes_written = 0
+        self.starting_time = time.monotonic( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the processing lag:  the elapsed time minus the duration of
+#  the audio processed so far.
+
+    def processing_lag_in_seconds( self ):
+        return ( time.monotonic( ) - self.starting_time ) - ( self.samples_processed / self.sample_rate )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the values in the Prometheus text format.  The counters are
+#  copied first, so the text is consistent even if the processing
+#  loop changes them meanwhile.
+
+    def prometheus_text( self ):
+        samples_processed = self.samples_processed
+        events_at_octave = list( self.events_at_octave )
+        lines = [ ]
+        lines.append( "# HELP qrst_samples_processed_total Input samples transformed." )
+        lines.append( "# TYPE qrst_samples_processed_total counter" )
+        lines.append( "qrst_samples_processed_total %d" % samples_processed )
+        lines.append( "# HELP qrst_octave_events_total Measurements emitted by the transform." )
+        lines.append( "# TYPE qrst_octave_events_total counter" )
+        for octave in range( highest_octave + 1 ):
+            if events_at_octave[ octave ] > 0:
+                lines.append( "qrst_octave_events_total{octave=\"%d\"} %d" % ( octave , events_at_octave[ octave ] ) )
+            # }
+        # }
+        lines.append( "# HELP qrst_records_written_total Records written to the QRST file." )
+        lines.append( "# TYPE qrst_records_written_total counter" )
+        lines.append( "qrst_records_written_total %d" % self.records_written )
+        lines.append( "# HELP qrst_records_suppressed_total Octave values not written because the amplitude and wavelength did not change since the previous sample." )
+        lines.append( "# TYPE qrst_records_suppressed_total counter" )
+        lines.append( "qrst_records_suppressed_total %d" % self.records_suppressed )
+        lines.append( "# HELP qrst_bytes_written_total Bytes written to the QRST file." )
+        lines.append( "# TYPE qrst_bytes_written_total counter" )
+        lines.append( "qrst_bytes_written_total %d" % self.bytes_written )
+        lines.append( "# HELP qrst_processing_lag_seconds Elapsed time minus the duration of the processed audio." )
+        lines.append( "# TYPE qrst_processing_lag_seconds gauge" )
+        lines.append( "qrst_processing_lag_seconds %.6f" % self.processing_lag_in_seconds( ) )
+        if self.stage_profiling_counters is not None:
+            snapshot_of_stages = self.stage_profiling_counters.snapshot( )
+            lines.append( "# HELP qrst_stage_seconds_total Cumulative time spent in each QRST stage." )
+            lines.append( "# TYPE qrst_stage_seconds_total counter" )
+            for stage_name in snapshot_of_stages:
+                lines.append( "qrst_stage_seconds_total{stage=\"%s\"} %.6f" % ( stage_name , snapshot_of_stages[ stage_name ][ "seconds" ] ) )
+            # }
+            lines.append( "# HELP qrst_stage_calls_total Calls to each QRST stage." )
+            lines.append( "# TYPE qrst_stage_calls_total counter" )
+            for stage_name in snapshot_of_stages:
+                lines.append( "qrst_stage_calls_total{stage=\"%s\"} %d" % ( stage_name , snapshot_of_stages[ stage_name ][ "calls" ] ) )
+            # }
+        # }
+        return "\n".join( lines ) + "\n"
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that publishes the metrics from a background
+#  thread, to a file (which is replaced in one step, so a reader never
+#  sees a partly written file) and/or to a local HTTP endpoint (which
+#  serves the most recently formatted text at any path).
+
+class MetricsPublisher:
+
+    "Publishes QRST metrics periodically, in the Prometheus text format"
+
+
+#----------------------------------------------------------------------
+#  Initialize the publisher.  Nothing is published until it starts.
+
+    def __init__( self , metrics , file_name=None , port=None , interval_in_seconds=5.0 ):
+        self.metrics = metrics
+        self.file_name = file_name
+        self.port = port
+        self.interval_in_seconds = interval_in_seconds
+        self.latest_text = metrics.prometheus_text( )
+        self.stop_request = threading.Event( )
+        self.publishing_thread = None
+        self.http_server = None
+    # }
+
+
+#----------------------------------------------------------------------
+#  Format the metrics, and write them to the file.
+
+    def publish( self ):
+        self.latest_text = self.metrics.prometheus_text( )
+        if self.file_name is not None:
+            temporary_file_name = self.file_name + ".tmp"
+            with open( temporary_file_name , "w" ) as metrics_file:
+                metrics_file.write( self.latest_text )
+            # }
+            os.replace( temporary_file_name , self.file_name )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Start the HTTP server (if a port is specified) and the thread that
+#  publishes the metrics at each interval.
+
+    def start( self ):
+        if self.port is not None:
+            publisher = self
+
+            class MetricsRequestHandler( http.server.BaseHTTPRequestHandler ):
+
+                def do_GET( self ):
+                    body = publisher.latest_text.encode( "utf-8" )
+                    self.send_response( 200 )
+                    self.send_header( "Content-Type" , "text/plain; version=0.0.4" )
+                    self.send_header( "Content-Length" , str( len( body ) ) )
+                    self.end_headers( )
+                    self.wfile.write( body )
+                # }
+
+                def log_message( self , format , *arguments ):
+                    pass
+                # }
+
+            # }
+
+            self.http_server = http.server.ThreadingHTTPServer( ( "127.0.0.1" , self.port ) , MetricsRequestHandler )
+            self.http_server.daemon_threads = True
+            threading.Thread( target=self.http_server.serve_forever , daemon=True ).start( )
+        # }
+        self.publish( )
+        self.publishing_thread = threading.Thread( target=self.publish_until_stopped , daemon=True )
+        self.publishing_thread.start( )
+    # }
+
+    def publish_until_stopped( self ):
+        while not self.stop_request.wait( self.interval_in_seconds ):
+            self.publish( )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Stop publishing, after publishing the final values.
+
+    def stop( self ):
+        self.stop_request.set( )
+        if self.publishing_thread is not None:
+            self.publishing_thread.join( )
+            self.publishing_thread = None
+        # }
+        self.publish( )
+        if self.http_server is not None:
+            self.http_server.shutdown( )
+            self.http_server.server_close( )
+            self.http_server = None
+        # }
+    # }
+
+# }
@@ -0,0 +1,567 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        pipelined_quick_rolling_spectral_transform.py
+#        ---------------------------------------------
+#
+#  Applies the Quick Rolling Spectral Transform (QRST) algorithm to
+#  long-running streams as a pipeline of workers, with each worker
+#  handling a group of octaves.  The octaves are calculated by the
+#  batch engine (see "batch_quick_rolling_spectral_transform.py"), so
+#  the pipeline handles one or many streams in lockstep.
+#
+#  Each octave only depends on the next-higher octave's filtered
+#  samples and adjustment values, and only on values that can no
+#  longer change:  the peak-and-trough adjustments only change the
+#  most recent saved samples, and the next-lower octave only uses the
+#  oldest saved samples.  So each worker passes its lowest octave's
+#  final values -- one for each time that octave fires, which is the
+#  decimated stream -- down to the next worker.  Only the first worker
+#  receives the input samples.  The next worker keeps a copy of the
+#  saved samples of that octave, updated with the final values, and
+#  calculates its own octaves from them, stepping only over the times
+#  at which the final values arrive, so its work shrinks with its
+#  octaves' firing rate.  The blocks pass between workers through
+#  bounded queues, so a slow worker holds back the workers before it,
+#  instead of letting blocks pile up.  Each worker puts its own octave
+#  results into its own bounded results queue, from which they are
+#  collected.
+#
+#  The results are the same as the batch engine's results for the same
+#  blocks, in the same order.  Only the first worker -- which receives
+#  every input sample, and also adds the octave-14 sums that the batch
+#  engine includes in its peak-to-peak tracking -- can tell when a
+#  stream stops, so the stopped streams' results are set to zero when
+#  the results are collected.
+#
+#  Each worker measures the time it spends calculating, waiting for
+#  its next block, and waiting for room in the next queue, so the
+#  octave groups can be balanced.  By default the octaves are grouped
+#  so that each worker has about the same number of octave firings
+#  (octave 15 fires at every sample, octave 14 at every second sample,
+#  and so on).  The workers are processes, or optionally threads.
+#
+#  Sample usage:
+#
+#      pipeline = pipelined_quick_rolling_spectral_transform.PipelinedQuickRollingSpectralTransform( number_of_streams , 7 , 24 , list_of_octave_groups=[ ( 15 , ) , ( 14 , 13 , 12 , 11 , 10 ) ] )
+#      for list_of_octave_results in pipeline.transform_blocks( iterable_of_blocks ):
+#          ...
+#      pipeline.write_utilisation_report( sys.stdout )
+#
+#  Sample usage from the command line, to measure the throughput and
+#  the utilisation of each worker:
+#
+#      python pipelined_quick_rolling_spectral_transform.py --streams 64 --octave-groups 1,5
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+import numpy
+
+import batch_quick_rolling_spectral_transform
+
+from batch_quick_rolling_spectral_transform import BatchQuickRollingSpectralTransform
+
+
+#----------------------------------------------------------------------
+#  Initialization.  After an octave fires -- and its peak-and-trough
+#  adjustments are done -- the saved sample just before the adjusted
+#  samples is final.  That final sample is what is passed down to the
+#  next worker.
+
+highest_octave = batch_quick_rolling_spectral_transform.highest_octave
+
+number_of_saved_samples_per_octave = batch_quick_rolling_spectral_transform.number_of_saved_samples_per_octave
+
+final_sample_pointer = int( min( batch_quick_rolling_spectral_transform.adjusted_sample_pointers ) ) - 1
+
+octave_with_peak_to_peak_tracking = batch_quick_rolling_spectral_transform.octave_with_line_crossing_cycle_counter
+
+default_queue_depth = 4
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that groups the calculated octaves (from the
+#  highest) for the specified number of workers, so that each group has
+#  about the same number of octave firings.  Each worker gets at least
+#  one octave.
+
+def balanced_octave_groups( calculated_octaves , number_of_workers ):
+
+    "Groups the octaves so that each worker has about the same amount of work"
+
+    number_of_workers = max( 1 , min( number_of_workers , len( calculated_octaves ) ) )
+    firings_at_octave = { octave : 1 / ( 2 ** ( highest_octave - octave ) ) for octave in calculated_octaves }
+    total_firings = sum( firings_at_octave.values( ) )
+    list_of_octave_groups = [ ]
+    octaves_in_group = [ ]
+    firings_so_far = 0
+    for ( octave_number , octave ) in enumerate( calculated_octaves ):
+        octaves_in_group.append( octave )
+        firings_so_far = firings_so_far + firings_at_octave[ octave ]
+        number_of_octaves_left = len( calculated_octaves ) - octave_number - 1
+        number_of_workers_left = number_of_workers - len( list_of_octave_groups ) - 1
+        if ( number_of_workers_left > 0 ) and ( ( firings_so_far >= ( total_firings * ( len( list_of_octave_groups ) + 1 ) / number_of_workers ) ) or ( number_of_octaves_left <= number_of_workers_left ) ):
+            list_of_octave_groups.append( tuple( octaves_in_group ) )
+            octaves_in_group = [ ]
+        # }
+    # }
+    list_of_octave_groups.append( tuple( octaves_in_group ) )
+    return list_of_octave_groups
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that groups the calculated octaves according to
+#  the numbers of octaves for each worker, such as "1,2,3".  Return
+#  ( 1 ) if the numbers do not add up to the number of octaves.
+
+def octave_groups_from_sizes( calculated_octaves , list_of_group_sizes ):
+
+    "Groups the octaves according to the number of octaves for each worker"
+
+    if ( sum( list_of_group_sizes ) != len( calculated_octaves ) ) or ( min( list_of_group_sizes ) < 1 ):
+        return ( 1 )
+    # }
+    list_of_octave_groups = [ ]
+    first_octave_number = 0
+    for group_size in list_of_group_sizes:
+        list_of_octave_groups.append( tuple( calculated_octaves[ first_octave_number : first_octave_number + group_size ] ) )
+        first_octave_number = first_octave_number + group_size
+    # }
+    return list_of_octave_groups
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class for one stage of the pipeline, which calculates a
+#  group of octaves with its own batch engine.  Within that engine,
+#  the saved samples of the octave just above the group are the copy
+#  that is updated with the final values from the previous stage.
+
+class OctaveGroupStage:
+
+    "Calculates one group of octaves for all streams"
+
+
+#----------------------------------------------------------------------
+#  Initialize the stage.  Only the first stage -- which receives every
+#  input sample -- tracks the peak-to-peak distance that can stop a
+#  stream, so in the other stages the tracked distance is made
+#  infinite.
+
+    def __init__( self , number_of_streams , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , octaves_in_group , is_tracking_peak_to_peak , has_next_stage ):
+        self.engine = BatchQuickRollingSpectralTransform( number_of_streams , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+        self.octaves_in_group = tuple( octaves_in_group )
+        self.octave_above_group = self.octaves_in_group[ 0 ] + 1
+        self.lowest_octave_in_group = self.octaves_in_group[ -1 ]
+        self.is_tracking_peak_to_peak = is_tracking_peak_to_peak
+        self.has_next_stage = has_next_stage
+        self.is_adding_octave_sums_to_peak_to_peak = is_tracking_peak_to_peak and ( octave_with_peak_to_peak_tracking in self.engine.calculated_octaves ) and ( octave_with_peak_to_peak_tracking not in self.octaves_in_group )
+        if not is_tracking_peak_to_peak:
+            self.engine.maximum_sample_value_at_stream[ : ] = numpy.inf
+            self.engine.minimum_sample_value_at_stream[ : ] = - numpy.inf
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Put a final value -- received from the previous stage -- into the
+#  copy of the saved samples of the octave above the group, after
+#  making room for it.  Both copies of the stored value are updated.
+
+    def add_final_value_from_previous_stage( self , track , filtered_samples , adjustment_values ):
+        octave = self.octave_above_group
+        self.engine.advance_history( octave , track )
+        position = ( self.engine.position_of_oldest_sample_at_octave_and_track[ octave ][ track ] + final_sample_pointer ) % number_of_saved_samples_per_octave
+        for stored_position in ( position , position + number_of_saved_samples_per_octave ):
+            self.engine.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ][ track ][ : , stored_position ] = filtered_samples
+            self.engine.adjustment_at_stream_and_peaks_or_troughs_and_position_at_octave_and_track[ octave ][ track ][ : , : , stored_position ] = adjustment_values
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Handle the group's octaves that fire at the engine's current time,
+#  and -- for the next stage -- collect the group's lowest octave's
+#  final value if that octave fired.
+
+    def handle_firings( self , sample_offset , current_samples , list_of_octave_results , lists_of_final_values ):
+        engine = self.engine
+        for octave in self.octaves_in_group:
+            if engine.octave_fires( octave ):
+                measurement = engine.handle_octave_firing( octave , current_samples )
+                if measurement is not None:
+                    list_of_octave_results.append( ( sample_offset , octave ) + measurement )
+                # }
+            # }
+        # }
+        if self.has_next_stage and engine.octave_fires( self.lowest_octave_in_group ):
+            ( track , other_track ) = engine.tracks_at_octave( self.lowest_octave_in_group )
+            lists_of_final_values[ 0 ].append( sample_offset )
+            lists_of_final_values[ 1 ].append( track )
+            lists_of_final_values[ 2 ].append( engine.saved_samples( self.lowest_octave_in_group , track )[ : , final_sample_pointer ].copy( ) )
+            lists_of_final_values[ 3 ].append( engine.saved_adjustment_values( self.lowest_octave_in_group , track )[ : , : , final_sample_pointer ].copy( ) )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Calculate the first group's octaves -- which include octave 15 --
+#  for one block of input samples (with one row per sample time).
+#  When octave 14 belongs to a later stage, the sums of two input
+#  samples that the batch engine adds to the peak-to-peak tracking at
+#  octave 14 are added here, so that this stage can tell when a
+#  stream stops.
+
+    def process_input_block( self , samples_at_time_and_stream ):
+        engine = self.engine
+        list_of_octave_results = [ ]
+        lists_of_final_values = ( [ ] , [ ] , [ ] , [ ] )
+        for sample_offset in range( samples_at_time_and_stream.shape[ 0 ] ):
+            current_samples = samples_at_time_and_stream[ sample_offset ]
+            engine.start_sample_time( current_samples )
+            self.handle_firings( sample_offset , current_samples , list_of_octave_results , lists_of_final_values )
+            if self.is_adding_octave_sums_to_peak_to_peak and engine.octave_fires( octave_with_peak_to_peak_tracking ):
+                higher_samples = engine.saved_samples( highest_octave , 0 )
+                sum_of_two_samples_at_higher_octave = higher_samples[ : , batch_quick_rolling_spectral_transform.delayed_sample_pointer ] + higher_samples[ : , batch_quick_rolling_spectral_transform.delayed_sample_pointer + 1 ]
+                numpy.maximum( engine.maximum_sample_value_at_stream , sum_of_two_samples_at_higher_octave , out=engine.maximum_sample_value_at_stream )
+                numpy.minimum( engine.minimum_sample_value_at_stream , sum_of_two_samples_at_higher_octave , out=engine.minimum_sample_value_at_stream )
+            # }
+            engine.number_of_samples_so_far = engine.number_of_samples_so_far + 1
+        # }
+        return ( list_of_octave_results , self.final_values_for_next_stage( lists_of_final_values ) )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Calculate a later group's octaves for one block, stepping only over
+#  the times at which the octave above the group fired -- as received
+#  from the previous stage -- because the group's octaves only fire at
+#  some of those times.  The time counter at each of those times is
+#  calculated from the sample number, as the batch engine counts it.
+#  Before the first block, the saved samples are set to each stream's
+#  first sample, as in the batch engine.
+
+    def process_final_values( self , number_of_samples_in_block , first_samples , final_values_from_previous_stage ):
+        engine = self.engine
+        if ( engine.number_of_samples_so_far == 0 ) and ( first_samples is not None ):
+            for octave in engine.calculated_octaves:
+                for track in range( batch_quick_rolling_spectral_transform.number_of_tracks ):
+                    engine.filtered_sample_at_stream_and_position_at_octave_and_track[ octave ][ track ][ ... ] = first_samples[ : , None ]
+                # }
+            # }
+        # }
+        list_of_octave_results = [ ]
+        lists_of_final_values = ( [ ] , [ ] , [ ] , [ ] )
+        if final_values_from_previous_stage is not None:
+            ( offsets_of_received_values , tracks_of_received_values , received_filtered_samples , received_adjustment_values ) = final_values_from_previous_stage
+            for value_number in range( len( offsets_of_received_values ) ):
+                sample_offset = int( offsets_of_received_values[ value_number ] )
+                engine.time_counter = ( engine.number_of_samples_so_far + sample_offset + 1 ) % ( ( 2 ** ( highest_octave * 4 ) ) + 1 )
+                self.add_final_value_from_previous_stage( int( tracks_of_received_values[ value_number ] ) , received_filtered_samples[ value_number ] , received_adjustment_values[ value_number ] )
+                self.handle_firings( sample_offset , None , list_of_octave_results , lists_of_final_values )
+            # }
+        # }
+        engine.number_of_samples_so_far = engine.number_of_samples_so_far + number_of_samples_in_block
+        return ( list_of_octave_results , self.final_values_for_next_stage( lists_of_final_values ) )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the collected final values -- the sample offsets and tracks
+#  at which the group's lowest octave fired, and that octave's final
+#  filtered samples and adjustment values at those times -- as arrays,
+#  or None if there are none.
+
+    def final_values_for_next_stage( self , lists_of_final_values ):
+        if ( not self.has_next_stage ) or ( len( lists_of_final_values[ 0 ] ) == 0 ):
+            return None
+        # }
+        return tuple( [ numpy.array( list_of_values ) for list_of_values in lists_of_final_values ] )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that runs one stage -- in a worker process or
+#  thread -- until the end of the blocks.  Each message to the first
+#  stage contains the block number and the input samples (one row per
+#  sample time).  Each message to a later stage contains the block
+#  number, the number of samples in the block, each stream's first
+#  sample (in the first block only), and the previous stage's final
+#  values, so only the decimated stream passes down the pipeline.
+#  Each stage puts its own octave results for each block -- and, from
+#  the first stage, the sample numbers at which the streams stopped
+#  -- into its own results queue.  The last message has no block
+#  number, and the stage then puts its utilisation into its results
+#  queue.
+
+def run_octave_group_stage( stage_arguments , input_queue , output_queue , results_queue ):
+
+    "Runs one stage of the pipeline"
+
+    stage = OctaveGroupStage( *stage_arguments )
+    number_of_blocks = 0
+    seconds_calculating = 0
+    seconds_waiting_for_input = 0
+    seconds_waiting_for_output = 0
+    time_at_start = time.perf_counter( )
+    while True:
+        time_before_input = time.perf_counter( )
+        message = input_queue.get( )
+        time_after_input = time.perf_counter( )
+        seconds_waiting_for_input = seconds_waiting_for_input + ( time_after_input - time_before_input )
+        if message[ 0 ] is None:
+            break
+        # }
+        sample_number_at_stop_for_stream = None
+        if stage.is_tracking_peak_to_peak:
+            ( block_number , samples_at_time_and_stream ) = message
+            number_of_samples_in_block = samples_at_time_and_stream.shape[ 0 ]
+            first_samples = samples_at_time_and_stream[ 0 ].copy( ) if ( stage.engine.number_of_samples_so_far == 0 ) and ( number_of_samples_in_block > 0 ) else None
+            ( list_of_octave_results , final_values_for_next_stage ) = stage.process_input_block( samples_at_time_and_stream )
+            sample_number_at_stop_for_stream = stage.engine.sample_number_at_stop_for_stream.copy( )
+        else:
+            ( block_number , number_of_samples_in_block , first_samples , final_values_from_previous_stage ) = message
+            ( list_of_octave_results , final_values_for_next_stage ) = stage.process_final_values( number_of_samples_in_block , first_samples , final_values_from_previous_stage )
+        # }
+        time_before_output = time.perf_counter( )
+        seconds_calculating = seconds_calculating + ( time_before_output - time_after_input )
+        if output_queue is not None:
+            output_queue.put( ( block_number , number_of_samples_in_block , first_samples , final_values_for_next_stage ) )
+        # }
+        results_queue.put( ( block_number , number_of_samples_in_block , sample_number_at_stop_for_stream , list_of_octave_results ) )
+        seconds_waiting_for_output = seconds_waiting_for_output + ( time.perf_counter( ) - time_before_output )
+        number_of_blocks = number_of_blocks + 1
+    # }
+    if output_queue is not None:
+        output_queue.put( ( None , ) )
+    # }
+    seconds_in_total = time.perf_counter( ) - time_at_start
+    utilisation_of_stage = ( stage.octaves_in_group , number_of_blocks , seconds_calculating , seconds_waiting_for_input , seconds_waiting_for_output , seconds_in_total )
+    results_queue.put( ( None , utilisation_of_stage ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that runs the pipeline.
+
+class PipelinedQuickRollingSpectralTransform:
+
+    "Applies the QRST algorithm to streams with a pipeline of octave-group workers"
+
+
+#----------------------------------------------------------------------
+#  Initialize the pipeline.  The octave groups are listed from the
+#  highest octaves to the lowest, and together they must contain the
+#  calculated octaves in order.  If they are not specified, the
+#  octaves are grouped for the specified number of workers.
+
+    def __init__( self , number_of_streams , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , list_of_octave_groups=None , number_of_workers=2 , queue_depth=default_queue_depth , use_threads=False ):
+        self.number_of_streams = number_of_streams
+        self.number_of_octaves_for_calculations = number_of_octaves_for_calculations
+        self.number_of_samples_for_wavelength_measurement = number_of_samples_for_wavelength_measurement
+        self.calculated_octaves = tuple( range( highest_octave , highest_octave + 1 - number_of_octaves_for_calculations , -1 ) )
+        if list_of_octave_groups is None:
+            list_of_octave_groups = balanced_octave_groups( self.calculated_octaves , number_of_workers )
+        # }
+        self.list_of_octave_groups = [ tuple( octaves_in_group ) for octaves_in_group in list_of_octave_groups ]
+        self.queue_depth = queue_depth
+        self.use_threads = use_threads
+        self.list_of_utilisation_at_stage = [ ]
+    # }
+
+
+#----------------------------------------------------------------------
+#  Apply the QRST algorithm to each block from an iterable of blocks
+#  -- each as accepted by the batch engine's "transform_block" method
+#  -- and yield each block's list of octave results, in the same form
+#  and order as that method.  A separate thread supplies the blocks
+#  to the first stage, so that reading the blocks overlaps with
+#  collecting the results.  If the octave groups or the measurement
+#  length are not valid, nothing is yielded.
+
+    def transform_blocks( self , iterable_of_blocks ):
+        is_valid = ( self.number_of_samples_for_wavelength_measurement >= 8 ) and ( len( self.list_of_octave_groups ) > 0 ) and ( min( [ len( octaves_in_group ) for octaves_in_group in self.list_of_octave_groups ] ) > 0 )
+        if ( not is_valid ) or ( tuple( [ octave for octaves_in_group in self.list_of_octave_groups for octave in octaves_in_group ] ) != self.calculated_octaves ):
+            return
+        # }
+        number_of_stages = len( self.list_of_octave_groups )
+
+
+#----------------------------------------------------------------------
+#  Start the workers, connected by bounded queues.  Each stage also has
+#  its own bounded results queue.
+
+        if self.use_threads:
+            queue_class = queue.Queue
+            worker_class = threading.Thread
+        else:
+            queue_class = multiprocessing.Queue
+            worker_class = multiprocessing.Process
+        # }
+        list_of_queues = [ queue_class( maxsize=self.queue_depth ) for queue_number in range( number_of_stages ) ] + [ None ]
+        list_of_results_queues = [ queue_class( maxsize=self.queue_depth ) for queue_number in range( number_of_stages ) ]
+        list_of_workers = [ ]
+        for ( stage_number , octaves_in_group ) in enumerate( self.list_of_octave_groups ):
+            stage_arguments = ( self.number_of_streams , self.number_of_octaves_for_calculations , self.number_of_samples_for_wavelength_measurement , octaves_in_group , stage_number == 0 , stage_number < ( number_of_stages - 1 ) )
+            worker = worker_class( target=run_octave_group_stage , args=( stage_arguments , list_of_queues[ stage_number ] , list_of_queues[ stage_number + 1 ] , list_of_results_queues[ stage_number ] ) , daemon=True )
+            worker.start( )
+            list_of_workers.append( worker )
+        # }
+
+        def supply_blocks( ):
+            for ( block_number , block_of_samples_at_stream_and_time ) in enumerate( iterable_of_blocks ):
+                samples_at_time_and_stream = numpy.ascontiguousarray( numpy.asarray( block_of_samples_at_stream_and_time ).astype( numpy.float64 ).T )
+                list_of_queues[ 0 ].put( ( block_number , samples_at_time_and_stream ) )
+            # }
+            list_of_queues[ 0 ].put( ( None , ) )
+        # }
+        supplying_thread = threading.Thread( target=supply_blocks , daemon=True )
+        supplying_thread.start( )
+
+
+#----------------------------------------------------------------------
+#  Collect each block's results from every stage, in the order of the
+#  stages.  The results are put in the order of the batch engine -- by
+#  sample offset, and from the highest octave to the lowest -- and the
+#  results of stopped streams (as told by the first stage) are set to
+#  zero.
+
+        number_of_samples_so_far = 0
+        while True:
+            list_of_messages = [ results_queue.get( ) for results_queue in list_of_results_queues ]
+            if list_of_messages[ 0 ][ 0 ] is None:
+                self.list_of_utilisation_at_stage = [ message[ 1 ] for message in list_of_messages ]
+                break
+            # }
+            ( block_number , number_of_samples_in_block , sample_number_at_stop_for_stream , list_of_octave_results ) = list_of_messages[ 0 ]
+            for message in list_of_messages[ 1 : ]:
+                list_of_octave_results.extend( message[ 3 ] )
+            # }
+            list_of_octave_results.sort( key=lambda octave_result : ( octave_result[ 0 ] , - octave_result[ 1 ] ) )
+            is_stopping_at_stream = sample_number_at_stop_for_stream >= 0
+            for ( sample_offset , octave , amplitudes , scaled_wavelength_counts ) in list_of_octave_results:
+                is_stopped_at_stream = is_stopping_at_stream & ( sample_number_at_stop_for_stream <= ( number_of_samples_so_far + sample_offset ) )
+                amplitudes[ is_stopped_at_stream ] = 0
+                scaled_wavelength_counts[ is_stopped_at_stream ] = 0
+            # }
+            number_of_samples_so_far = number_of_samples_so_far + number_of_samples_in_block
+            yield list_of_octave_results
+        # }
+
+        supplying_thread.join( )
+        for worker in list_of_workers:
+            worker.join( )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the utilisation of each stage from the most recent run:  the
+#  fraction of the time spent calculating, waiting for the previous
+#  stage (or for the blocks), and waiting for room in the next stage's
+#  queue (or for the results to be collected).  The stage with the
+#  highest calculating fraction limits the throughput.
+
+    def write_utilisation_report( self , output_file ):
+        output_file.write( "%-5s %-24s %7s %10s %10s %10s\n" % ( "stage" , "octaves" , "blocks" , "busy" , "wait-in" , "wait-out" ) )
+        for ( stage_number , utilisation_of_stage ) in enumerate( self.list_of_utilisation_at_stage ):
+            ( octaves_in_group , number_of_blocks , seconds_calculating , seconds_waiting_for_input , seconds_waiting_for_output , seconds_in_total ) = utilisation_of_stage
+            seconds_in_total = max( seconds_in_total , 1e-9 )
+            output_file.write( "%-5d %-24s %7d %9.1f%% %9.1f%% %9.1f%%\n" % ( stage_number , ",".join( [ str( octave ) for octave in octaves_in_group ] ) , number_of_blocks , 100 * seconds_calculating / seconds_in_total , 100 * seconds_waiting_for_input / seconds_in_total , 100 * seconds_waiting_for_output / seconds_in_total ) )
+        # }
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the function that measures the throughput of the pipeline
+#  -- in elapsed time, because the stages run at the same time --
+#  compared with the batch engine on its own, checks that the results
+#  are the same, and writes the utilisation of each stage.
+
+def main( ):
+
+    "Measures the throughput and the stage utilisation of the pipelined QRST engine"
+
+    parser = argparse.ArgumentParser( description="Throughput and stage utilisation of the pipelined QRST engine" )
+    parser.add_argument( "--streams" , type=int , default=64 , help="number of streams" )
+    parser.add_argument( "--samples-per-stream" , type=int , default=16384 , help="number of samples delivered to each stream" )
+    parser.add_argument( "--samples-per-block" , type=int , default=1024 , help="number of samples delivered at a time" )
+    parser.add_argument( "--octaves" , type=int , default=7 , help="number_of_octaves_for_calculations" )
+    parser.add_argument( "--wavelength-samples" , type=int , default=24 , help="number_of_samples_for_wavelength_measurement" )
+    parser.add_argument( "--octave-groups" , default=None , help="comma-separated numbers of octaves for each worker, from the highest octave (default:  balanced)" )
+    parser.add_argument( "--workers" , type=int , default=2 , help="number of workers, when the octave groups are balanced" )
+    parser.add_argument( "--queue-depth" , type=int , default=default_queue_depth , help="number of blocks each queue can hold" )
+    parser.add_argument( "--threads" , action="store_true" , help="use threads instead of processes" )
+    arguments = parser.parse_args( )
+
+    samples_at_stream_and_time = batch_quick_rolling_spectral_transform.generate_chirps_for_streams( arguments.streams , arguments.samples_per_stream )
+    list_of_blocks = [ samples_at_stream_and_time[ : , first_sample_number : first_sample_number + arguments.samples_per_block ] for first_sample_number in range( 0 , arguments.samples_per_stream , arguments.samples_per_block ) ]
+    number_of_stream_samples = arguments.streams * arguments.samples_per_stream
+
+    transform = BatchQuickRollingSpectralTransform( arguments.streams , arguments.octaves , arguments.wavelength_samples )
+    time_at_start = time.perf_counter( )
+    list_of_batch_results = [ transform.transform_block( block_of_samples ) for block_of_samples in list_of_blocks ]
+    seconds_for_batch_engine = time.perf_counter( ) - time_at_start
+    sys.stdout.write( "batch engine:      %12.0f samples per second\n" % ( number_of_stream_samples / seconds_for_batch_engine ) )
+
+    calculated_octaves = tuple( range( highest_octave , highest_octave + 1 - arguments.octaves , -1 ) )
+    list_of_octave_groups = None
+    if arguments.octave_groups is not None:
+        list_of_octave_groups = octave_groups_from_sizes( calculated_octaves , [ int( text ) for text in arguments.octave_groups.split( "," ) ] )
+        if list_of_octave_groups == ( 1 ):
+            sys.stdout.write( "The octave groups must add up to %d octaves.\n" % len( calculated_octaves ) )
+            return
+        # }
+    # }
+    pipeline = PipelinedQuickRollingSpectralTransform( arguments.streams , arguments.octaves , arguments.wavelength_samples , list_of_octave_groups=list_of_octave_groups , number_of_workers=arguments.workers , queue_depth=arguments.queue_depth , use_threads=arguments.threads )
+    time_at_start = time.perf_counter( )
+    list_of_pipeline_results = list( pipeline.transform_blocks( list_of_blocks ) )
+    seconds_for_pipeline = time.perf_counter( ) - time_at_start
+    sys.stdout.write( "pipelined engine:  %12.0f samples per second  (%.2f times the batch engine)\n" % ( number_of_stream_samples / seconds_for_pipeline , seconds_for_batch_engine / seconds_for_pipeline ) )
+
+    is_same = len( list_of_pipeline_results ) == len( list_of_batch_results )
+    for ( list_of_batch_octave_results , list_of_pipeline_octave_results ) in zip( list_of_batch_results , list_of_pipeline_results ):
+        is_same = is_same and ( len( list_of_batch_octave_results ) == len( list_of_pipeline_octave_results ) )
+        for ( batch_octave_result , pipeline_octave_result ) in zip( list_of_batch_octave_results , list_of_pipeline_octave_results ):
+            is_same = is_same and ( batch_octave_result[ 0 : 2 ] == pipeline_octave_result[ 0 : 2 ] ) and numpy.array_equal( batch_octave_result[ 2 ] , pipeline_octave_result[ 2 ] ) and numpy.array_equal( batch_octave_result[ 3 ] , pipeline_octave_result[ 3 ] )
+        # }
+    # }
+    sys.stdout.write( "results are %s\n\n" % ( "the same as the batch engine's" if is_same else "DIFFERENT from the batch engine's" ) )
+    pipeline.write_utilisation_report( sys.stdout )
+
+# }
+
+
+if __name__ == "__main__":
+    main( )
+# }
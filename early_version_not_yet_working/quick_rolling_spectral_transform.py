@@ -183,34 +183,14 @@ word_for_peaks_or_troughs = [ "peaks" , "troughs" ]
 
 bit_representing_octave_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-filtered_sample_at_octave_and_track_and_time_offset = [ [ [ 0 for sample_time in range( number_of_saved_samples_per_octave ) ] for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ]
-
-peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset = [ [ [ [ 0 for sample_time in range( number_of_saved_samples_per_octave ) ] for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ] for peaks_or_troughs in ( 0 , 1 ) ]
-
-unramped_sample_at_octave_and_track_and_time_offset = [ [ [ 0 for sample_time in range( number_of_saved_samples_per_octave ) ] for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ]
-
 previous_amplitude_contribution_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-single_sample_at_octave_and_time_offset = [ [ 0 for sample_time in range( number_of_saved_samples_per_octave ) ] for octave in range( highest_octave_plus_one ) ]
-
 positive_gap_to_line_at_position = [ 0 for position in range( number_of_saved_samples_per_octave + 1 ) ]
 
-distance_total_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
-
-count_of_peaks_and_troughs_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
-
 distance_between_peaks_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
 distance_between_troughs_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-count_of_peaks_at_octave_separated_by_distance = [ [ 0 for distance in range( maximum_distance_for_valid_cycle + 1 ) ] for octave in range( highest_octave_plus_one ) ]
-
-count_of_troughs_at_octave_separated_by_distance = [ [ 0 for distance in range( maximum_distance_for_valid_cycle + 1 ) ] for octave in range( highest_octave_plus_one ) ]
-
-accumulated_amplitude_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
-
-accumulated_amplitude_at_octave_and_distance = [ [ 0 for distance in range( maximum_distance_for_valid_cycle + 1 ) ] for octave in range( highest_octave_plus_one ) ]
-
 integer_number_for_unit_scale_factor = number_of_samples_for_wavelength_measurement
 
 scaled_wavelength_count_that_begins_overlap_with_next_higher_octave = int( number_of_samples_for_wavelength_measurement * 0.875 * integer_number_for_unit_scale_factor )
@@ -221,22 +201,14 @@ scaled_wavelength_count_that_begins_overlap_with_next_lower_octave = int( number
 
 scale_factor_for_overlap_with_next_lower_octave = integer_number_for_unit_scale_factor / ( int( number_of_samples_for_wavelength_measurement * 1.75 ) - scaled_wavelength_count_that_begins_overlap_with_next_lower_octave )
 
-sample_counter_at_octave = [ number_of_samples_for_wavelength_measurement for count in range( highest_octave_plus_one ) ]
-
 final_accumulated_amplitude_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
 wavelength_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
 accumulated_amplitude_total_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-number_of_accumuated_samples_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
-
 scaled_wavelength_count_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-distance_from_most_recent_peak_or_trough_pair_at_octave = [ [ ( maximum_considered_distance_to_recent_peak_or_trough + 1 ) for octave in range( highest_octave_plus_one ) ] for peak_or_trough in ( 0 , 1 ) ]
-
-amplitude_at_most_recent_peak_or_trough_pair_at_octave = [ [ 0 for octave in range( highest_octave_plus_one ) ] for peak_or_trough in ( 0 , 1 ) ]
-
 sample_at_time_offset = [ 0 for sample_time in range( 8 ) ]
 
 value_to_display_for_debugging_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
@@ -263,10 +235,383 @@ import generate_plot_string
 
 
 #----------------------------------------------------------------------
-#  Open the text-waveform output file.
+#  The function that generates plot strings for a whole block of
+#  values at once is imported when the first plot lines are written,
+#  because the NumPy library it needs is slow to import.  If NumPy is
+#  not available, the plot strings are generated one at a time.
+
+generate_plot_strings_for_block = None
+
+import_of_generate_plot_strings_for_block_attempted = 0
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the "time" library and the stage numbers of the
+#  stage-profiling counters.  These are only used when the
+#  stage-profiling counters are enabled.
+
+import time
+
+import stage_profiling_counters
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the "atexit" library, which is used to write any
+#  remaining plot lines.
+
+import atexit
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the "array" and "sys" libraries, which are used
+#  to interpret blocks of samples supplied as buffers of bytes.
+
+import array
+import sys
+
+
+#----------------------------------------------------------------------
+#  The state of the stream is stored in flat typed arrays, instead of
+#  nested lists, so that each value takes 4 or 8 bytes instead of a
+#  pointer to a separate object.  The filtered samples are integers
+#  stored in 64 bits, because each lower octave roughly doubles the
+#  range of the samples, so large input samples exceed 32 bits at the
+#  lowest octaves.  The distances from the most recent peak or trough
+#  pairs are also stored in 64 bits, because they keep increasing
+#  while no pair is found.  The other counts fit in 32 bits.  The
+#  adjustment values can have fractions.
+#  The saved samples and adjustment values are only stored for the
+#  calculated octaves.  A value's position is the position at which
+#  its octave and track (and for adjustment values, peaks or troughs)
+#  begins, plus its sample pointer.  The values for peaks and for
+#  troughs at each octave (the distance from, and the amplitude at,
+#  the most recent pair) are at the position "peaks_or_troughs" times
+#  the number of octaves, plus the octave.
+
+lowest_octave_with_saved_samples = highest_octave
+
+position_of_samples_at_octave_and_track = [ [ None for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ]
+
+position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track = [ [ [ None for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ] for peaks_or_troughs in ( 0 , 1 ) ]
+
+filtered_sample_at_octave_and_track_and_time_offset = array.array( 'q' )
+
+peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset = array.array( 'd' )
+
+distance_total_at_octave = array.array( 'i' , [ 0 ] * highest_octave_plus_one )
+
+count_of_peaks_and_troughs_at_octave = array.array( 'i' , [ 0 ] * highest_octave_plus_one )
+
+accumulated_amplitude_at_octave = array.array( 'd' , [ 0 ] * highest_octave_plus_one )
+
+sample_counter_at_octave = array.array( 'i' , [ number_of_samples_for_wavelength_measurement ] * highest_octave_plus_one )
+
+number_of_accumuated_samples_at_octave = array.array( 'i' , [ 0 ] * highest_octave_plus_one )
+
+distance_from_most_recent_peak_or_trough_pair_at_octave = array.array( 'q' , [ maximum_considered_distance_to_recent_peak_or_trough + 1 ] * ( 2 * highest_octave_plus_one ) )
+
+amplitude_at_most_recent_peak_or_trough_pair_at_octave = array.array( 'd' , [ 0 ] * ( 2 * highest_octave_plus_one ) )
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that allocates the saved samples -- all equal to
+#  the specified initial sample -- and the adjustment values -- all
+#  zero -- for the octaves calculated with the specified number of
+#  octaves, and calculates the position of each octave and track.
+
+def allocate_saved_samples_for_octaves( number_of_octaves_for_calculations , initial_sample ):
+
+    "Allocates the saved samples and adjustment values of the calculated octaves"
+
+    global lowest_octave_with_saved_samples
+    global filtered_sample_at_octave_and_track_and_time_offset
+    global peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset
+
+    lowest_octave_with_saved_samples = max( 0 , min( highest_octave , highest_octave_plus_one - number_of_octaves_for_calculations + 1 ) )
+    number_of_octaves_with_saved_samples = highest_octave_plus_one - lowest_octave_with_saved_samples
+    for octave in range( highest_octave_plus_one ):
+        for track in range( number_of_tracks ):
+            if octave >= lowest_octave_with_saved_samples:
+                octave_and_track_number = ( ( octave - lowest_octave_with_saved_samples ) * number_of_tracks ) + track
+                position_of_samples_at_octave_and_track[ octave ][ track ] = octave_and_track_number * number_of_saved_samples_per_octave
+                for peaks_or_troughs in ( 0 , 1 ):
+                    position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] = ( ( peaks_or_troughs * number_of_octaves_with_saved_samples * number_of_tracks ) + octave_and_track_number ) * number_of_saved_samples_per_octave
+                # }
+            else:
+                position_of_samples_at_octave_and_track[ octave ][ track ] = None
+                for peaks_or_troughs in ( 0 , 1 ):
+                    position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] = None
+                # }
+            # }
+        # }
+    # }
+    number_of_saved_values = number_of_octaves_with_saved_samples * number_of_tracks * number_of_saved_samples_per_octave
+    filtered_sample_at_octave_and_track_and_time_offset = array.array( 'q' , [ initial_sample ] ) * number_of_saved_values
+    peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset = array.array( 'd' , [ 0 ] ) * ( 2 * number_of_saved_values )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the number of bytes used by the
+#  state of the stream, which depends on the number of calculated
+#  octaves.  The state is in the typed arrays, whose values are
+#  counted, and in the lists of values at each octave (and at each
+#  additional window), which are counted as the list plus each of its
+#  values as a separate object (found with "sys.getsizeof"), although
+#  small integers are shared, so that part is an upper bound.  Values
+#  that only change when the parameters change (such as the positions
+#  of the octaves and tracks), values that are only used within one
+#  call, and the values used for debugging output, are not included.
+
+def bytes_used_per_stream( ):
+
+    "Returns the number of bytes used by the state of the stream"
+
+    number_of_bytes = 0
+    for typed_array in ( filtered_sample_at_octave_and_track_and_time_offset , peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset , distance_total_at_octave , count_of_peaks_and_troughs_at_octave , accumulated_amplitude_at_octave , sample_counter_at_octave , number_of_accumuated_samples_at_octave , distance_from_most_recent_peak_or_trough_pair_at_octave , amplitude_at_most_recent_peak_or_trough_pair_at_octave , distance_total_at_window_and_octave , count_of_peaks_and_troughs_at_window_and_octave , accumulated_amplitude_at_window_and_octave , number_of_accumulated_samples_at_window_and_octave ):
+        number_of_bytes = number_of_bytes + ( typed_array.itemsize * len( typed_array ) )
+    # }
+    for list_of_values in ( bit_representing_octave_at_octave , previous_amplitude_contribution_at_octave , distance_between_peaks_at_octave , distance_between_troughs_at_octave , final_accumulated_amplitude_at_octave , wavelength_at_octave , accumulated_amplitude_total_at_octave , scaled_wavelength_count_at_octave , count_of_quiet_firings_at_octave , number_of_firings_at_octave , number_of_skipped_peak_searches_at_octave , final_accumulated_amplitude_at_window_and_octave , scaled_wavelength_count_at_window_and_octave ):
+        number_of_bytes = number_of_bytes + sys.getsizeof( list_of_values ) + sum( [ sys.getsizeof( value ) for value in list_of_values ] )
+    # }
+    return number_of_bytes
+
+# }
+
+allocate_saved_samples_for_octaves( number_of_octaves_for_calculations , 0 )
+
+
+#----------------------------------------------------------------------
+#  The stage-profiling counters are not used unless they are supplied
+#  by calling the "enable_stage_profiling" function.  When they are
+#  not used, each stage only checks this value.
+
+active_stage_profiling_counters = None
+
+
+#----------------------------------------------------------------------
+#  The binary trace recorder is not used unless it is supplied by
+#  calling the "enable_trace_recording" function.  When it is not
+#  used, each place that records values only checks this value.
+#  The recorder's module (which supplies the signal numbers) is only
+#  imported when the recorder is enabled, so that importing this
+#  module stays fast.
+
+active_trace_recorder = None
+
+binary_trace_recorder = None
+
+
+#----------------------------------------------------------------------
+#  Adaptive octave skipping is not used unless it is enabled by calling
+#  the "enable_adaptive_octave_skipping" function, which supplies the
+#  silence threshold.  The variance that is compared with the threshold
+#  is calculated from the filtered samples that the peak-and-trough
+#  search examines.  The counts of firings and of skipped searches at
+#  each octave are used to report the compute saved.
+
+silence_variance_threshold = None
+
+number_of_quiet_firings_before_skipping = 8
+
+number_of_samples_for_silence_variance = 7
+
+count_of_quiet_firings_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+
+number_of_firings_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+
+number_of_skipped_peak_searches_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+
+
+#----------------------------------------------------------------------
+#  Runs of constant samples (such as digital silence) are
+#  fast-forwarded by the block function (see the
+#  "fast_forward_through_constant_samples" function) unless this is
+#  disabled by calling the "enable_constant_run_fast_forwarding"
+#  function.  Within a block, the check for a stream that has settled
+#  on a constant sample is done at this interval of samples.
+
+constant_runs_are_fast_forwarded = True
+
+interval_between_checks_for_settled_constant_sample = 64
+
+
+#----------------------------------------------------------------------
+#  Measurements over additional numbers of samples (additional
+#  measurement windows) are not made unless they are specified by
+#  calling the "enable_additional_measurement_windows" function.  The
+#  additional windows share the decimation and the peak-and-trough
+#  search, and each one only has its own accumulated values and
+#  results, which are saved at the position of the window number
+#  times the number of octaves, plus the octave.
+
+numbers_of_samples_for_additional_measurement_windows = ( )
+
+distance_total_at_window_and_octave = array.array( 'i' )
+
+count_of_peaks_and_troughs_at_window_and_octave = array.array( 'i' )
+
+accumulated_amplitude_at_window_and_octave = array.array( 'd' )
+
+number_of_accumulated_samples_at_window_and_octave = array.array( 'i' )
+
+final_accumulated_amplitude_at_window_and_octave = [ ]
+
+scaled_wavelength_count_at_window_and_octave = [ ]
+
+
+#----------------------------------------------------------------------
+#  For debugging, specify which octaves to view.
+#  To view none of the octave-specific uncommented-out debugging info,
+#  set this list to a single value of zero.
+#  To change which information (for the selected octaves) to display
+#  for debugging, comment-out code later in the function to hide
+#  what you don't want to view, and un-comment the write statements
+#  that write the information you want to view.
+
+octaves_to_view = ( 14 , )
+#  octaves_to_view = ( 15 , 14 , 13 , 12 , 11 , 10 , 9 , )
+
+
+#----------------------------------------------------------------------
+#  The text-waveform output file is not opened until something is
+#  written to it, so importing this code does not create the file.
+
+text_waveform_file = None
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the text-waveform output file,
+#  opening it the first time.
+
+def text_waveform_file_for_writing( ):
+
+    "Returns the text-waveform output file, opening it if needed"
+
+    global text_waveform_file
+    if text_waveform_file is None:
+        text_waveform_file = open( 'output_text_waveform_debug_qrst.txt' , 'w' )
+        text_waveform_file.write( "%s" % "Waveform input plot with debug data:\n(Plot scale changes when needed to fit new data)\n\n" )
+    # }
+    return text_waveform_file
+
+# }
+
+
+#----------------------------------------------------------------------
+#  The plot lines written to the text-waveform file are collected --
+#  as their values, strings to show, and scales -- and then generated
+#  and written together, in batches.  Any plot lines not yet written
+#  are written when the program exits.
+
+values_for_pending_plot_lines = [ ]
+strings_for_pending_plot_lines = [ ]
+scales_for_pending_plot_lines = [ ]
+
+maximum_number_of_pending_plot_lines = 4096
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that generates and writes the pending plot lines.
+
+def write_pending_plot_lines( ):
+
+    "Writes the collected plot lines to the text-waveform file"
+
+    global generate_plot_strings_for_block
+    global import_of_generate_plot_strings_for_block_attempted
+
+    if len( values_for_pending_plot_lines ) > 0:
+        if import_of_generate_plot_strings_for_block_attempted == 0:
+            import_of_generate_plot_strings_for_block_attempted = 1
+            try:
+                import generate_plot_strings_for_block
+            except ImportError:
+                generate_plot_strings_for_block = None
+            # }
+        # }
+        if generate_plot_strings_for_block is not None:
+            generate_plot_strings_for_block.write_plot_strings_for_block( text_waveform_file_for_writing( ) , values_for_pending_plot_lines , strings_for_pending_plot_lines , scales_for_pending_plot_lines )
+        else:
+            for pointer in range( len( values_for_pending_plot_lines ) ):
+                string_to_write = generate_plot_string.generate_plot_string( values_for_pending_plot_lines[ pointer ] , strings_for_pending_plot_lines[ pointer ] , scales_for_pending_plot_lines[ pointer ] )
+                text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
+            # }
+        # }
+        del values_for_pending_plot_lines[ : ]
+        del strings_for_pending_plot_lines[ : ]
+        del scales_for_pending_plot_lines[ : ]
+    # }
+
+# }
+
+atexit.register( write_pending_plot_lines )
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that adds a plot line to the pending plot lines.
+
+def add_plot_line( value_to_plot , character_string_to_show , scale_for_plotting ):
+
+    "Collects a plot line to be written to the text-waveform file"
+
+    values_for_pending_plot_lines.append( value_to_plot )
+    strings_for_pending_plot_lines.append( character_string_to_show )
+    scales_for_pending_plot_lines.append( scale_for_plotting )
+    if len( values_for_pending_plot_lines ) >= maximum_number_of_pending_plot_lines:
+        write_pending_plot_lines( )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that calculates the amplitude and the scaled
+#  wavelength count at the end of a measurement window, from the
+#  accumulated values, in the same way as the QRST function does for
+#  its own measurement window.  It is used for the additional
+#  measurement windows.
+
+def measurement_result_from_accumulated_values( octave , count_of_peaks_and_troughs , distance_total , accumulated_amplitude ):
+
+    "Returns the amplitude and scaled wavelength count of a measurement window"
+
+    if ( count_of_peaks_and_troughs > 0 ) and ( distance_total > 0 ) and ( accumulated_amplitude > 0 ):
+        scaled_wavelength_count = int( ( output_wavelength_value_at_center_of_octave * distance_total ) / ( count_of_peaks_and_troughs * cycle_distance_at_center_of_octave ) )
+        if scaled_wavelength_count > output_wavelength_value_at_top_of_octave:
+            scaled_wavelength_count = output_wavelength_value_at_top_of_octave
+        elif scaled_wavelength_count < output_wavelength_value_at_bottom_of_octave:
+            scaled_wavelength_count = output_wavelength_value_at_bottom_of_octave
+        # }
+    else:
+        scaled_wavelength_count = 0
+        accumulated_amplitude = 0
+    # }
+    if count_of_peaks_and_troughs > 0:
+        final_accumulated_amplitude = accumulated_amplitude / count_of_peaks_and_troughs
+    else:
+        final_accumulated_amplitude = accumulated_amplitude
+    # }
+    if octave == highest_octave:
+        scale_value_for_output_amplitude = 1
+    else:
+        scale_value_for_output_amplitude = ( 1 / 1.4 ) ** ( highest_octave - octave )
+    # }
+    final_accumulated_amplitude = final_accumulated_amplitude * scale_value_for_output_amplitude
+    if final_accumulated_amplitude < 1:
+        scaled_wavelength_count = output_wavelength_value_at_center_of_octave
+        final_accumulated_amplitude = 0
+    # }
+    return ( final_accumulated_amplitude , scaled_wavelength_count )
 
-text_waveform_file = open( 'output_text_waveform_debug_qrst.txt' , 'w' )
-text_waveform_file.write( "%s" % "Waveform input plot with debug data:\n(Plot scale changes when needed to fit new data)\n\n" )
+# }
 
 
 #----------------------------------------------------------------------
@@ -290,16 +635,13 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
     global previous_number_of_octaves_for_calculations
     global previous_number_of_samples_for_wavelength_measurement
     global filtered_sample_at_octave_and_track_and_time_offset
-    global unramped_sample_at_octave_and_track_and_time_offset
     global peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset
-    global single_sample_at_octave_and_time_offset
     global most_recent_sample_pointer
     global next_most_recent_sample_pointer
     global delayed_sample_pointer
     global number_of_tracks
     global sample_counter_at_octave
     global distance_total_at_octave
-    global accumulated_amplitude_at_octave_and_distance
     global final_accumulated_amplitude_at_octave
     global wavelength_at_octave
     global accumulated_amplitude_at_octave
@@ -316,8 +658,6 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
     global count_of_peaks_and_troughs_at_octave
     global distance_between_peaks_at_octave
     global distance_between_troughs_at_octave
-    global count_of_peaks_at_octave_separated_by_distance
-    global count_of_troughs_at_octave_separated_by_distance
     global maximum_considered_distance_to_recent_peak_or_trough
     global value_to_display_for_debugging_at_octave
     global previous_time_here
@@ -360,16 +700,18 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
             bit_representing_octave_at_octave[ octave ] = 2 ** ( highest_octave - octave )
         # }
 
-        filtered_sample_at_octave_and_track_and_time_offset = [ [ [ initial_sample for sample_time in range( number_of_saved_samples_per_octave ) ] for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ]
-
-        peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset = [ [ [ [ 0 for sample_time in range( number_of_saved_samples_per_octave ) ] for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ] for peaks_or_troughs in ( 0 , 1 ) ]
+        allocate_saved_samples_for_octaves( number_of_octaves_for_calculations , initial_sample )
 
-        sample_counter_at_octave = [ number_of_samples_for_wavelength_measurement for count in range( highest_octave_plus_one ) ]
+        for octave in range( highest_octave_plus_one ):
+            sample_counter_at_octave[ octave ] = number_of_samples_for_wavelength_measurement
+            number_of_accumuated_samples_at_octave[ octave ] = 0
+        # }
+        for position_at_window_and_octave in range( len( number_of_accumulated_samples_at_window_and_octave ) ):
+            number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ] = 0
+        # }
 
         accumulated_amplitude_total_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-        number_of_accumuated_samples_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
-
     # }
 
 
@@ -394,7 +736,7 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
     if not_first_time_in_function != 1:
         not_first_time_in_function = 1
         initial_sample = current_sample
-        filtered_sample_at_octave_and_track_and_time_offset = [ [ [ initial_sample for sample_time in range( number_of_saved_samples_per_octave ) ] for track in range( number_of_tracks ) ] for octave in range( highest_octave_plus_one ) ]
+        filtered_sample_at_octave_and_track_and_time_offset[ : ] = array.array( 'q' , [ initial_sample ] ) * len( filtered_sample_at_octave_and_track_and_time_offset )
         bit_representing_octave_at_octave[ highest_octave ] = 1
         for octave in range( highest_octave ):
             bit_representing_octave_at_octave[ octave ] = 2 ** ( highest_octave - octave )
@@ -410,27 +752,19 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
         final_accumulated_amplitude_at_octave[ octave ] = 0
         scaled_wavelength_count_at_octave[ octave ] = 0
     # }
-
-
-#----------------------------------------------------------------------
-#  For debugging, specify which octaves to view.
-#  To view none of the octave-specific uncommented-out debugging info,
-#  set this list to a single value of zero.
-#  To change which information (for the selected octaves) to display
-#  for debugging, comment-out code later in the function to hide
-#  what you don't want to view, and un-comment the write statements
-#  that write the information you want to view.
-
-    octaves_to_view = ( 14 , )
-#    octaves_to_view = ( 15 , 14 , 13 , 12 , 11 , 10 , 9 , )
+    for position_at_window_and_octave in range( len( final_accumulated_amplitude_at_window_and_octave ) ):
+        final_accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] = 0
+        scaled_wavelength_count_at_window_and_octave[ position_at_window_and_octave ] = 0
+    # }
 
 
 #----------------------------------------------------------------------
 #  For debugging purposes, indicate which octaves are being viewed.
 
     if time_counter == 1:
+        write_pending_plot_lines( )
         for octave_to_view in octaves_to_view:
-            text_waveform_file.write( "[viewing octave %d which has bit-representation of %d]\n" % ( octave_to_view , bit_representing_octave_at_octave[ octave_to_view ] ) )
+            text_waveform_file_for_writing( ).write( "[viewing octave %d which has bit-representation of %d]\n" % ( octave_to_view , bit_representing_octave_at_octave[ octave_to_view ] ) )
         # }
     # }
 
@@ -453,8 +787,8 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 #  of the input sample.
 
     scale_for_plotting = 0.5 / half_of_latest_peak_to_peak_distance_so_far
-    string_to_write = generate_plot_string.generate_plot_string( current_sample , "**" , scale_for_plotting )
-#    text_waveform_file.write( "%s\n" % ( string_to_write ) )
+#    string_to_write = generate_plot_string.generate_plot_string( current_sample , "**" , scale_for_plotting )
+#    text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
 
 
 #----------------------------------------------------------------------
@@ -500,15 +834,16 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 #  room for the newest samples.
 #  Also set the most recent peak-or-trough adjustment values to zero.
 
-            for sample_pointer in range( number_of_saved_samples_per_octave - 1 ):
-                filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ sample_pointer ] = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ sample_pointer + 1 ]
-                for peaks_or_troughs in ( 0 , 1 ):
-                    peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer ] = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer + 1 ]
-                # }
+            if active_stage_profiling_counters is not None:
+                time_at_start_of_stage = time.perf_counter( )
             # }
-            sample_pointer = most_recent_sample_pointer
+
+            position_of_samples = position_of_samples_at_octave_and_track[ octave ][ track ]
+            filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples : position_of_samples + number_of_saved_samples_per_octave - 1 ] = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples + 1 : position_of_samples + number_of_saved_samples_per_octave ]
             for peaks_or_troughs in ( 0 , 1 ):
-                peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer ] = 0
+                position_of_adjustment_values = position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ]
+                peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values : position_of_adjustment_values + number_of_saved_samples_per_octave - 1 ] = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values + 1 : position_of_adjustment_values + number_of_saved_samples_per_octave ]
+                peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values + most_recent_sample_pointer ] = 0
             # }
 
 
@@ -538,19 +873,66 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 
             scale_for_adjustment_values = 0.5
             if octave == highest_octave:
-                filtered_sample_at_octave_and_track_and_time_offset[ octave ][ 0 ][ most_recent_sample_pointer ] = current_sample
+                filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ 0 ] + most_recent_sample_pointer ] = current_sample
                 sum_of_adjustment_values = 0
                 sum_of_two_samples_at_higher_octave = current_sample
             elif octave == highest_octave - 1:
-                sum_of_two_samples_at_higher_octave = filtered_sample_at_octave_and_track_and_time_offset[ octave + 1 ][ 0 ][ delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ octave + 1 ][ 0 ][ delayed_sample_pointer + 1 ]
-                sum_of_adjustment_values = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks ][ octave + 1 ][ 0 ][ delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ troughs ][ octave + 1 ][ 0 ][ delayed_sample_pointer + 1 ]
-                filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ most_recent_sample_pointer ] = int( sum_of_two_samples_at_higher_octave + ( sum_of_adjustment_values * scale_for_adjustment_values ) )
+                sum_of_two_samples_at_higher_octave = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave + 1 ][ 0 ] + delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave + 1 ][ 0 ] + delayed_sample_pointer + 1 ]
+                sum_of_adjustment_values = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks ][ octave + 1 ][ 0 ] + delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ troughs ][ octave + 1 ][ 0 ] + delayed_sample_pointer + 1 ]
+                filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + most_recent_sample_pointer ] = int( sum_of_two_samples_at_higher_octave + ( sum_of_adjustment_values * scale_for_adjustment_values ) )
             else:
-                sum_of_four_samples_at_higher_octave = filtered_sample_at_octave_and_track_and_time_offset[ octave + 1 ][ 0 ][ delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ octave + 1 ][ 0 ][ delayed_sample_pointer + 1 ] + filtered_sample_at_octave_and_track_and_time_offset[ octave + 1 ][ 1 ][ delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ octave + 1 ][ 1 ][ delayed_sample_pointer + 1 ]
+                sum_of_four_samples_at_higher_octave = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave + 1 ][ 0 ] + delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave + 1 ][ 0 ] + delayed_sample_pointer + 1 ] + filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave + 1 ][ 1 ] + delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave + 1 ][ 1 ] + delayed_sample_pointer + 1 ]
 
-                sum_of_adjustment_values = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks ][ octave + 1 ][ track ][ delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ troughs ][ octave + 1 ][ track ][ delayed_sample_pointer + 1 ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks ][ octave + 1 ][ other_track ][ delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ troughs ][ octave + 1 ][ other_track ][ delayed_sample_pointer + 1 ]
+                sum_of_adjustment_values = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks ][ octave + 1 ][ track ] + delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ troughs ][ octave + 1 ][ track ] + delayed_sample_pointer + 1 ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks ][ octave + 1 ][ other_track ] + delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ troughs ][ octave + 1 ][ other_track ] + delayed_sample_pointer + 1 ]
 
-                filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ most_recent_sample_pointer ] = int( ( sum_of_four_samples_at_higher_octave / 2 ) + ( sum_of_adjustment_values * scale_for_adjustment_values ) )
+                filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + most_recent_sample_pointer ] = int( ( sum_of_four_samples_at_higher_octave / 2 ) + ( sum_of_adjustment_values * scale_for_adjustment_values ) )
+            # }
+
+            if active_stage_profiling_counters is not None:
+                active_stage_profiling_counters.add_to_stage( stage_profiling_counters.stage_decimation , octave , time.perf_counter( ) - time_at_start_of_stage , 1 )
+            # }
+
+            if active_trace_recorder is not None:
+                active_trace_recorder.record( time_counter , octave , track , binary_trace_recorder.trace_signal_filtered_sample , 0 , filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples + most_recent_sample_pointer ] )
+                active_trace_recorder.record( time_counter , octave , track , binary_trace_recorder.trace_signal_applied_adjustment , 0 , sum_of_adjustment_values * scale_for_adjustment_values )
+            # }
+
+
+#----------------------------------------------------------------------
+#  If adaptive octave skipping is enabled, calculate the variance of
+#  this octave's most recent filtered samples (in the current track).
+#  The threshold applies to the highest octave, and is scaled by the
+#  square of the gain at this octave, because each lower octave's
+#  filtered samples are twice as large.  The comparison is done in
+#  integers, without dividing by the number of samples.
+#  If the octave has been quiet for enough firings in a row, skip the
+#  peak-and-trough search (by testing no peak-to-peak distances) until
+#  the variance rises above the threshold again.  The decimation above
+#  still runs, and the measurement window still advances, so results
+#  are still returned on schedule.
+#  With a threshold of zero, only a run of identical samples is
+#  regarded as quiet, and the peak-and-trough search never finds
+#  anything in such a run, so the results are unchanged.
+
+            peak_to_peak_distances_to_test = ( 2 , 3 , 4 )
+            if silence_variance_threshold is not None:
+                number_of_firings_at_octave[ octave ] = number_of_firings_at_octave[ octave ] + 1
+                sum_of_samples = 0
+                sum_of_squared_samples = 0
+                for sample_pointer in range( most_recent_sample_pointer - number_of_samples_for_silence_variance + 1 , most_recent_sample_pointer + 1 ):
+                    sample_value = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + sample_pointer ]
+                    sum_of_samples = sum_of_samples + sample_value
+                    sum_of_squared_samples = sum_of_squared_samples + ( sample_value * sample_value )
+                # }
+                if ( ( number_of_samples_for_silence_variance * sum_of_squared_samples ) - ( sum_of_samples * sum_of_samples ) ) <= ( silence_variance_threshold * ( bit_representing_octave_at_octave[ octave ] ** 2 ) * ( number_of_samples_for_silence_variance ** 2 ) ):
+                    count_of_quiet_firings_at_octave[ octave ] = count_of_quiet_firings_at_octave[ octave ] + 1
+                else:
+                    count_of_quiet_firings_at_octave[ octave ] = 0
+                # }
+                if count_of_quiet_firings_at_octave[ octave ] >= number_of_quiet_firings_before_skipping:
+                    peak_to_peak_distances_to_test = ( )
+                    number_of_skipped_peak_searches_at_octave[ octave ] = number_of_skipped_peak_searches_at_octave[ octave ] + 1
+                # }
             # }
 
             if ( octave in octaves_to_view) and ( octave > 0 ) and ( octave < highest_octave ):
@@ -562,16 +944,13 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                 # }
 
                 sample_to_view = sum_of_two_samples_at_higher_octave
-                string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "[%02d%s]" % ( ( octave + 1 ) , letter_for_track[ track ] ) ) , scale_for_plotting )
-                text_waveform_file.write( "%s\n" % ( string_to_write ) )
+                add_plot_line( sample_to_view , ( "[%02d%s]" % ( ( octave + 1 ) , letter_for_track[ track ] ) ) , scale_for_plotting )
 
                 sample_to_view = sum_of_adjustment_values * scale_for_adjustment_values
-                string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "<adj%02d%s>" % ( octave , letter_for_track[ track ] ) ) , scale_for_plotting )
-                text_waveform_file.write( "%s\n" % ( string_to_write ) )
+                add_plot_line( sample_to_view , ( "<adj%02d%s>" % ( octave , letter_for_track[ track ] ) ) , scale_for_plotting )
 
-                sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ most_recent_sample_pointer ] / 4
-                string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "%02d%s" % ( octave , letter_for_track[ track ] ) ) , scale_for_plotting )
-                text_waveform_file.write( "%s\n" % ( string_to_write ) )
+                sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + most_recent_sample_pointer ] / 4
+                add_plot_line( sample_to_view , ( "%02d%s" % ( octave , letter_for_track[ track ] ) ) , scale_for_plotting )
 
             # }
 
@@ -601,18 +980,23 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 #  The wavelength at the center of the octave has a cycle distance of 3.
 #  Either 5, 6, or 7 samples are involved in this calculation.
 
+                if active_stage_profiling_counters is not None:
+                    time_at_start_of_stage = time.perf_counter( )
+                    count_of_gap_to_line_evaluations = 0
+                # }
+
                 match_at_distance = 0
-                for peak_to_peak_distance_being_tested in ( 2, 3, 4 ):
+                for peak_to_peak_distance_being_tested in peak_to_peak_distances_to_test:
                     if match_at_distance == 0:
                         number_of_samples_involved = peak_to_peak_distance_being_tested + 3
-                        slope = ( ( filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ next_most_recent_sample_pointer ] * peak_or_trough_multiplier ) - ( filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ next_most_recent_sample_pointer - peak_to_peak_distance_being_tested ] * peak_or_trough_multiplier ) ) / peak_to_peak_distance_being_tested
-                        straight_line_value_at_most_recent_time = ( filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ next_most_recent_sample_pointer ] * peak_or_trough_multiplier ) + slope
+                        slope = ( ( filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + next_most_recent_sample_pointer ] * peak_or_trough_multiplier ) - ( filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + next_most_recent_sample_pointer - peak_to_peak_distance_being_tested ] * peak_or_trough_multiplier ) ) / peak_to_peak_distance_being_tested
+                        straight_line_value_at_most_recent_time = ( filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + next_most_recent_sample_pointer ] * peak_or_trough_multiplier ) + slope
                         match_at_distance = peak_to_peak_distance_being_tested
                         largest_gap_to_line = 0
                         calculation_position = 0
                         for sample_pointer in range( most_recent_sample_pointer - number_of_samples_involved + 1 , most_recent_sample_pointer + 1 ):
                             if ( sample_pointer != next_most_recent_sample_pointer ) and ( sample_pointer != ( next_most_recent_sample_pointer - peak_to_peak_distance_being_tested ) ):
-                                gap_to_line = ( filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ sample_pointer ] * peak_or_trough_multiplier ) - ( straight_line_value_at_most_recent_time - ( slope * ( most_recent_sample_pointer - sample_pointer ) ) )
+                                gap_to_line = ( filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + sample_pointer ] * peak_or_trough_multiplier ) - ( straight_line_value_at_most_recent_time - ( slope * ( most_recent_sample_pointer - sample_pointer ) ) )
                                 if gap_to_line >= 0:
                                     match_at_distance = 0
                                     break
@@ -631,6 +1015,18 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                                 break
                             # }
                         # }
+
+#  For profiling, count the gap-to-line evaluations.  If the
+#  evaluation loop did not stop early, the calculation position equals
+#  the number of evaluations, otherwise it is one fewer.
+
+                        if active_stage_profiling_counters is not None:
+                            if calculation_position == peak_to_peak_distance_being_tested + 1:
+                                count_of_gap_to_line_evaluations = count_of_gap_to_line_evaluations + calculation_position
+                            else:
+                                count_of_gap_to_line_evaluations = count_of_gap_to_line_evaluations + calculation_position + 1
+                            # }
+                        # }
                     # }
                 # }
 
@@ -679,20 +1075,20 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                             if criteria_involving_next_up_octave <= 0:
                                 alias_detected_string = "alias detected"
                             # }
-#                            text_waveform_file.write( "earlier/later %d , %s in track %s , %s\n" % ( earlier_or_later_peak , word_for_peaks_or_troughs[ peaks_or_troughs ] , letter_for_track[ track ] , alias_detected_string ) )
+#                            text_waveform_file_for_writing( ).write( "earlier/later %d , %s in track %s , %s\n" % ( earlier_or_later_peak , word_for_peaks_or_troughs[ peaks_or_troughs ] , letter_for_track[ track ] , alias_detected_string ) )
                         # }
 
 
                         if ( octave in octaves_to_view) and ( octave > 0 ):
-                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ other_track ][ sample_pointer + adjustment_for_earlier_in_other_track ]
-                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
-#                            text_waveform_file.write( "%s\n" % ( string_to_write ) )
-                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ sample_pointer ]
-                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ track ] ) ) , scale_for_plotting )
-#                            text_waveform_file.write( "%s\n" % ( string_to_write ) )
-                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ other_track ][ sample_pointer + adjustment_for_later_in_other_track ]
-                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
-#                            text_waveform_file.write( "%s\n" % ( string_to_write ) )
+                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ other_track ] + sample_pointer + adjustment_for_earlier_in_other_track ]
+#                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
+#                            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
+                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + sample_pointer ]
+#                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ track ] ) ) , scale_for_plotting )
+#                            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
+                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ other_track ] + sample_pointer + adjustment_for_later_in_other_track ]
+#                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
+#                            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
                         # }
                     # }
                 # }
@@ -737,25 +1133,25 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                         # }
 
                         if ( octave in octaves_to_view) and ( octave > 0 ):
-                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ other_track ][ sample_pointer + adjustment_for_earlier_in_other_track ]
-                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
-#                            text_waveform_file.write( "%s\n" % ( string_to_write ) )
-                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ sample_pointer ]
-                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ track ] ) ) , scale_for_plotting )
-#                            text_waveform_file.write( "%s\n" % ( string_to_write ) )
-                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ other_track ][ sample_pointer + adjustment_for_later_in_other_track ]
-                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
-#                            text_waveform_file.write( "%s\n" % ( string_to_write ) )
+                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ other_track ] + sample_pointer + adjustment_for_earlier_in_other_track ]
+#                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
+#                            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
+                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + sample_pointer ]
+#                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ track ] ) ) , scale_for_plotting )
+#                            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
+                            sample_to_view = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ other_track ] + sample_pointer + adjustment_for_later_in_other_track ]
+#                            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "_%s" % ( letter_for_track[ other_track ] ) ) , scale_for_plotting )
+#                            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
                         # }
 
-                        direction_of_surrounding_samples_in_other_track = filtered_sample_at_octave_and_track_and_time_offset[ octave ][ other_track ][ sample_pointer + adjustment_for_later_in_other_track ] - filtered_sample_at_octave_and_track_and_time_offset[ octave ][ other_track ][ sample_pointer + adjustment_for_earlier_in_other_track ]
+                        direction_of_surrounding_samples_in_other_track = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ other_track ] + sample_pointer + adjustment_for_later_in_other_track ] - filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ other_track ] + sample_pointer + adjustment_for_earlier_in_other_track ]
 
                         if ( octave in octaves_to_view) and ( octave > 0 ):
                             alias_detected_string = "alias NOT detected"
                             if ( direction_of_surrounding_samples_in_other_track * direction_if_match ) <= 0:
                                 alias_detected_string = "alias detected"
                             # }
-#                            text_waveform_file.write( "earlier/later %d , %s in track %s , %s\n" % ( earlier_or_later_peak , word_for_peaks_or_troughs[ peaks_or_troughs ] , letter_for_track[ track ] , alias_detected_string ) )
+#                            text_waveform_file_for_writing( ).write( "earlier/later %d , %s in track %s , %s\n" % ( earlier_or_later_peak , word_for_peaks_or_troughs[ peaks_or_troughs ] , letter_for_track[ track ] , alias_detected_string ) )
                         # }
 
                         if ( direction_of_surrounding_samples_in_other_track * direction_if_match ) <= 0:
@@ -775,9 +1171,19 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                     distance_total_at_octave[ octave ] = distance_total_at_octave[ octave ] + match_at_distance
                     count_of_peaks_and_troughs_at_octave[ octave ] = count_of_peaks_and_troughs_at_octave[ octave ] + 1
                     accumulated_amplitude_at_octave[ octave ] = accumulated_amplitude_at_octave[ octave ] + largest_gap_to_line
+                    for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+                        position_at_window_and_octave = ( window * highest_octave_plus_one ) + octave
+                        distance_total_at_window_and_octave[ position_at_window_and_octave ] = distance_total_at_window_and_octave[ position_at_window_and_octave ] + match_at_distance
+                        count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] = count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] + 1
+                        accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] = accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] + largest_gap_to_line
+                    # }
+
+                    if active_trace_recorder is not None:
+                        active_trace_recorder.record( time_counter , octave , track , binary_trace_recorder.trace_signal_largest_gap_to_line_of_peaks + peaks_or_troughs , match_at_distance , largest_gap_to_line )
+                    # }
 
                     if ( octave in octaves_to_view) and ( octave > 0 ):
-#                        text_waveform_file.write( "%s match at octave %d and distance %d with amplitude %f\n" % ( word_for_peaks_or_troughs[ peaks_or_troughs ] , octave , match_at_distance , abs( largest_gap_to_line / 10000 ) ) )
+#                        text_waveform_file_for_writing( ).write( "%s match at octave %d and distance %d with amplitude %f\n" % ( word_for_peaks_or_troughs[ peaks_or_troughs ] , octave , match_at_distance , abs( largest_gap_to_line / 10000 ) ) )
                         pass
                     # }
 
@@ -810,18 +1216,22 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                         if ( sample_pointer == next_most_recent_sample_pointer ) or ( sample_pointer == ( next_most_recent_sample_pointer - match_at_distance ) ):
                             multiplier = peak_or_trough_multiplier * -1
                         # }
-                        if peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer ] == 0:
-                            peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer ] = half_of_cycle_amplitude * multiplier
+                        if peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] + sample_pointer ] == 0:
+                            peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] + sample_pointer ] = half_of_cycle_amplitude * multiplier
                         else:
-                            peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer ] = int( ( peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ sample_pointer ] + ( half_of_cycle_amplitude * multiplier ) ) / 2 )
+                            peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] + sample_pointer ] = int( ( peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] + sample_pointer ] + ( half_of_cycle_amplitude * multiplier ) ) / 2 )
                         # }
                     # }
                 # }
 
+                if active_stage_profiling_counters is not None:
+                    active_stage_profiling_counters.add_to_stage( stage_profiling_counters.stage_peak_trough_line_fitting , octave , time.perf_counter( ) - time_at_start_of_stage , count_of_gap_to_line_evaluations )
+                # }
+
             if ( octave in octaves_to_view) and ( octave > 0 ):
-                sample_to_view = initial_sample + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ peaks_or_troughs ][ octave ][ track ][ next_most_recent_sample_pointer ]
-                string_to_write = generate_plot_string.generate_plot_string( sample_to_view , "a" , scale_for_plotting )
-#                text_waveform_file.write( "%s\n" % ( string_to_write ) )
+                sample_to_view = initial_sample + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ] + next_most_recent_sample_pointer ]
+#                string_to_write = generate_plot_string.generate_plot_string( sample_to_view , "a" , scale_for_plotting )
+#                text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
             # }
 
 
@@ -839,10 +1249,13 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 #  the samples at which these line crossings are detected.
 
                 if match_at_distance != 0:
-                    distance_to_recent_peak_or_trough = distance_from_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ]
+                    distance_to_recent_peak_or_trough = distance_from_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ]
                     if ( distance_to_recent_peak_or_trough - match_at_distance > 2 ) and ( distance_to_recent_peak_or_trough < maximum_considered_distance_to_recent_peak_or_trough ):
-                        half_amplitude_at_recent_peak_or_trough = amplitude_at_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] / 2
-                        center_of_most_recent_peak_or_trough = ( filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ next_most_recent_sample_pointer ] - half_amplitude_at_recent_peak_or_trough ) * peak_or_trough_multiplier
+                        if active_stage_profiling_counters is not None:
+                            time_at_start_of_stage = time.perf_counter( )
+                        # }
+                        half_amplitude_at_recent_peak_or_trough = amplitude_at_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] / 2
+                        center_of_most_recent_peak_or_trough = ( filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + next_most_recent_sample_pointer ] - half_amplitude_at_recent_peak_or_trough ) * peak_or_trough_multiplier
                         center_of_previously_identified_peak_or_trough = ( straight_line_value_at_most_recent_time - half_amplitude_at_recent_peak_or_trough ) * peak_or_trough_multiplier
                         slope = ( center_of_most_recent_peak_or_trough - center_of_previously_identified_peak_or_trough ) / distance_to_recent_peak_or_trough
                         count_of_line_crossings = 1
@@ -850,9 +1263,9 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                         threshold_for_crossings = 0.2 * half_amplitude_at_recent_peak_or_trough
                         for sample_pointer_offset in range( match_at_distance , distance_to_recent_peak_or_trough + 1 ):
                             sample_pointer = most_recent_sample_pointer - sample_pointer_offset
-                            distance_from_line = center_of_most_recent_peak_or_trough - ( slope * sample_pointer_offset ) - ( filtered_sample_at_octave_and_track_and_time_offset[ octave ][ track ][ sample_pointer ] * peak_or_trough_multiplier )
+                            distance_from_line = center_of_most_recent_peak_or_trough - ( slope * sample_pointer_offset ) - ( filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ track ] + sample_pointer ] * peak_or_trough_multiplier )
 
-#                            text_waveform_file.write( "at octave %d , sample pointer is %d , distance from line is %d ,  threshold_for_crossings %d , direction_needed_for_crossing %d\n" % ( octave , sample_pointer , distance_from_line , threshold_for_crossings , direction_needed_for_crossing ) )
+#                            text_waveform_file_for_writing( ).write( "at octave %d , sample pointer is %d , distance from line is %d ,  threshold_for_crossings %d , direction_needed_for_crossing %d\n" % ( octave , sample_pointer , distance_from_line , threshold_for_crossings , direction_needed_for_crossing ) )
 
                             if ( distance_from_line * direction_needed_for_crossing ) > threshold_for_crossings:
                                 count_of_line_crossings = count_of_line_crossings + 1
@@ -865,19 +1278,29 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                         count_of_peaks_and_troughs_at_octave[ octave ] = count_of_peaks_and_troughs_at_octave[ octave ] + cycle_count
 #  if this code works, refine the next calculation...
                         accumulated_amplitude_at_octave[ octave ] = accumulated_amplitude_at_octave[ octave ] + ( largest_gap_to_line * cycle_count )
-                        distance_from_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] = 0
-                        amplitude_at_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] = 0
+                        for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+                            position_at_window_and_octave = ( window * highest_octave_plus_one ) + octave
+                            distance_total_at_window_and_octave[ position_at_window_and_octave ] = distance_total_at_window_and_octave[ position_at_window_and_octave ] + additional_distance
+                            count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] = count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] + cycle_count
+                            accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] = accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] + ( largest_gap_to_line * cycle_count )
+                        # }
+                        distance_from_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] = 0
+                        amplitude_at_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] = 0
+
+                        if active_stage_profiling_counters is not None:
+                            active_stage_profiling_counters.add_to_stage( stage_profiling_counters.stage_line_crossing_cycle_counter , octave , time.perf_counter( ) - time_at_start_of_stage , distance_to_recent_peak_or_trough - match_at_distance + 1 )
+                        # }
 
                         if ( octave in octaves_to_view) and ( octave > 0 ):
-#                            text_waveform_file.write( "at octave %d , additional %d cycles over distance %d\n" % ( octave , cycle_count , additional_distance ) )
+#                            text_waveform_file_for_writing( ).write( "at octave %d , additional %d cycles over distance %d\n" % ( octave , cycle_count , additional_distance ) )
                             pass
                         # }
 
                     # }
-                    amplitude_at_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] = largest_gap_to_line
-                    distance_from_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] = 0
+                    amplitude_at_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] = largest_gap_to_line
+                    distance_from_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] = 0
                 # }
-                distance_from_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] = distance_from_most_recent_peak_or_trough_pair_at_octave[ peaks_or_troughs ][ octave ] + 1
+                distance_from_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] = distance_from_most_recent_peak_or_trough_pair_at_octave[ ( peaks_or_troughs * highest_octave_plus_one ) + octave ] + 1
 
 
 #----------------------------------------------------------------------
@@ -893,6 +1316,9 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 
             number_of_accumuated_samples_at_octave[ octave ] = number_of_accumuated_samples_at_octave[ octave ] + 1
             if number_of_accumuated_samples_at_octave[ octave ] >= number_of_samples_for_wavelength_measurement:
+                if active_stage_profiling_counters is not None:
+                    time_at_start_of_stage = time.perf_counter( )
+                # }
 
 
 #----------------------------------------------------------------------
@@ -918,7 +1344,7 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
                 # }
 
                 if ( octave in octaves_to_view) and ( octave > 0 ) and ( accumulated_amplitude_at_octave[ octave ] > 0 ):
-#                    text_waveform_file.write( "time diff %d  octave %d  dist %d  cyclecount %d  wavelength %d  amplitude %f\n" % ( time_counter - previous_time_here , octave, distance_total_at_octave[ octave ] , count_of_peaks_and_troughs_at_octave[ octave ] , scaled_wavelength_count , ( ( accumulated_amplitude_at_octave[ octave ] * 100 ) / latest_peak_to_peak_distance_so_far ) ) )
+#                    text_waveform_file_for_writing( ).write( "time diff %d  octave %d  dist %d  cyclecount %d  wavelength %d  amplitude %f\n" % ( time_counter - previous_time_here , octave, distance_total_at_octave[ octave ] , count_of_peaks_and_troughs_at_octave[ octave ] , scaled_wavelength_count , ( ( accumulated_amplitude_at_octave[ octave ] * 100 ) / latest_peak_to_peak_distance_so_far ) ) )
                     previous_time_here = time_counter
                 # }
 
@@ -1005,6 +1431,27 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 #  to return an octave's results.
 
                 number_of_accumuated_samples_at_octave[ octave ] = 0
+
+                if active_stage_profiling_counters is not None:
+                    active_stage_profiling_counters.add_to_stage( stage_profiling_counters.stage_measurement_window_finalization , octave , time.perf_counter( ) - time_at_start_of_stage , 1 )
+                # }
+            # }
+
+
+#----------------------------------------------------------------------
+#  Do the same for each additional measurement window, using its own
+#  accumulated values and its own number of samples.
+
+            for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+                position_at_window_and_octave = ( window * highest_octave_plus_one ) + octave
+                number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ] = number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ] + 1
+                if number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ] >= numbers_of_samples_for_additional_measurement_windows[ window ]:
+                    ( final_accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] , scaled_wavelength_count_at_window_and_octave[ position_at_window_and_octave ] ) = measurement_result_from_accumulated_values( octave , count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] , distance_total_at_window_and_octave[ position_at_window_and_octave ] , accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] )
+                    accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] = 0
+                    count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] = 0
+                    distance_total_at_window_and_octave[ position_at_window_and_octave ] = 0
+                    number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ] = 0
+                # }
             # }
 
 
@@ -1038,14 +1485,14 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 
     for octave in octaves_to_view:
         if final_accumulated_amplitude_at_octave[ octave ] > 1:
-#            text_waveform_file.write( "[result for octave %d:  wavelength %d  amplitude %f percent\n" % ( octave , scaled_wavelength_count_at_octave[ octave ] , ( ( final_accumulated_amplitude_at_octave[ octave ] * 100 ) / latest_peak_to_peak_distance_so_far ) ) )
+#            text_waveform_file_for_writing( ).write( "[result for octave %d:  wavelength %d  amplitude %f percent\n" % ( octave , scaled_wavelength_count_at_octave[ octave ] , ( ( final_accumulated_amplitude_at_octave[ octave ] * 100 ) / latest_peak_to_peak_distance_so_far ) ) )
 
             sample_to_view = final_accumulated_amplitude_at_octave[ octave ]
             while abs( sample_to_view * scale_for_plotting_amplitude_result ) > 0.95:
                 scale_for_plotting_amplitude_result = 0.8 * scale_for_plotting_amplitude_result
             # }
-            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "AMPL_%d_oct%02d" % ( final_accumulated_amplitude_at_octave[ octave ] , octave ) ) , scale_for_plotting_amplitude_result )
-#            text_waveform_file.write( "%s\n" % ( string_to_write ) )
+#            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "AMPL_%d_oct%02d" % ( final_accumulated_amplitude_at_octave[ octave ] , octave ) ) , scale_for_plotting_amplitude_result )
+#            text_waveform_file_for_writing( ).write( "%s\n" % ( string_to_write ) )
 
             sample_to_view = scaled_wavelength_count_at_octave[ octave ] - output_wavelength_value_at_center_of_octave
             while abs( sample_to_view * scale_for_plotting_wavelength_result ) > 0.95:
@@ -1054,8 +1501,7 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
             amplitude_stars = [ "+" for position in range( 20 ) ]
             string_indicating_amplitude = "".join( amplitude_stars[ 0 : int( final_accumulated_amplitude_at_octave[ octave ] * scale_for_plotting_amplitude_result * 5 ) ] )
 
-            string_to_write = generate_plot_string.generate_plot_string( sample_to_view , ( "WAVL=%d oct%02d %s" % ( scaled_wavelength_count_at_octave[ octave ] , octave , string_indicating_amplitude ) ) , scale_for_plotting_wavelength_result )
-            text_waveform_file.write( "%s\n" % ( string_to_write ) )
+            add_plot_line( sample_to_view , ( "WAVL=%d oct%02d %s" % ( scaled_wavelength_count_at_octave[ octave ] , octave , string_indicating_amplitude ) ) , scale_for_plotting_wavelength_result )
 
         # }
     # }
@@ -1073,4 +1519,609 @@ def quick_rolling_spectral_transform( current_sample, number_of_octaves_for_calc
 # }
 
 
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that enables the stage-profiling counters (an
+#  object created from the "StageProfilingCounters" class in
+#  "stage_profiling_counters.py"), or disables them when the supplied
+#  value is "None".
+
+def enable_stage_profiling( counters ):
+
+    "Supplies the counters that collect per-stage profiling information"
+
+    global active_stage_profiling_counters
+    active_stage_profiling_counters = counters
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that enables the binary trace recorder (an object
+#  created from the "BinaryTraceRecorder" class in
+#  "binary_trace_recorder.py"), or disables it when the supplied value
+#  is "None".
+
+def enable_trace_recording( recorder ):
+
+    "Supplies the recorder that records selected internal values"
+
+    global active_trace_recorder
+    global binary_trace_recorder
+    if recorder is not None:
+        import binary_trace_recorder
+    # }
+    active_trace_recorder = recorder
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that enables adaptive octave skipping, with the
+#  specified silence threshold (a variance, in squared sample units at
+#  the highest octave) and the number of quiet firings in a row after
+#  which an octave's peak-and-trough search is skipped.  A threshold
+#  of "None" disables it.  The counts used for the report are reset.
+
+def enable_adaptive_octave_skipping( threshold , number_of_quiet_firings=8 ):
+
+    "Enables skipping the peak-and-trough search at quiet octaves"
+
+    global silence_variance_threshold
+    global number_of_quiet_firings_before_skipping
+    silence_variance_threshold = threshold
+    number_of_quiet_firings_before_skipping = number_of_quiet_firings
+    for octave in range( highest_octave_plus_one ):
+        count_of_quiet_firings_at_octave[ octave ] = 0
+        number_of_firings_at_octave[ octave ] = 0
+        number_of_skipped_peak_searches_at_octave[ octave ] = 0
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes -- for each octave that has fired
+#  since adaptive octave skipping was enabled -- the number of firings,
+#  the number of skipped peak-and-trough searches, and the percentage
+#  skipped, followed by the totals.  Each skipped search saves the
+#  line fitting at up to three peak-to-peak distances, for peaks and
+#  for troughs.
+
+def write_adaptive_octave_skipping_report( output_file ):
+
+    "Writes how many peak-and-trough searches were skipped at each octave"
+
+    total_number_of_firings = 0
+    total_number_of_skipped_searches = 0
+    for octave in range( highest_octave , -1 , -1 ):
+        if number_of_firings_at_octave[ octave ] > 0:
+            output_file.write( "octave %2d:  %10d firings  %10d searches skipped  (%5.1f percent)\n" % ( octave , number_of_firings_at_octave[ octave ] , number_of_skipped_peak_searches_at_octave[ octave ] , ( 100.0 * number_of_skipped_peak_searches_at_octave[ octave ] ) / number_of_firings_at_octave[ octave ] ) )
+            total_number_of_firings = total_number_of_firings + number_of_firings_at_octave[ octave ]
+            total_number_of_skipped_searches = total_number_of_skipped_searches + number_of_skipped_peak_searches_at_octave[ octave ]
+        # }
+    # }
+    if total_number_of_firings > 0:
+        output_file.write( "all octaves:  %10d firings  %10d searches skipped  (%5.1f percent)\n" % ( total_number_of_firings , total_number_of_skipped_searches , ( 100.0 * total_number_of_skipped_searches ) / total_number_of_firings ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that enables (or disables) fast-forwarding
+#  through runs of constant samples in the block function.
+
+def enable_constant_run_fast_forwarding( is_enabled ):
+
+    "Enables or disables fast-forwarding through runs of constant samples"
+
+    global constant_runs_are_fast_forwarded
+    constant_runs_are_fast_forwarded = is_enabled
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns whether the stream has settled on
+#  the specified constant sample, which means that processing more of
+#  the same sample -- one at a time -- would not change any saved
+#  sample, adjustment value, or amplitude-and-wavelength accumulator,
+#  and would not find any peaks or troughs.  That is the case when:
+#  the saved samples of the highest octave all equal the sample; the
+#  saved samples of each lower calculated octave (in both tracks) all
+#  equal the value calculated from the octave above (twice its value,
+#  because the adjustment values are zero); all the adjustment values
+#  are zero; no peaks or troughs have been counted in any current
+#  measurement window (including the additional windows); and the sample (and, at a viewed octave, the
+#  sum of two higher-octave samples) is within the range tracked for
+#  the debugging output.
+#  While a stream has not settled -- such as within a few measurement
+#  windows (at the lowest calculated octave) after the samples became
+#  constant -- the samples are processed one at a time.
+#  If the debugging-output range is less than two, the QRST function
+#  raises a ZeroDivisionError for every sample, so the stream is never
+#  regarded as settled, and the error is still raised.  The stream is
+#  also not regarded as settled when stage profiling, trace recording,
+#  or adaptive octave skipping is enabled (because they observe each
+#  firing), or when the parameters differ from the previous call
+#  (because the function restarts).
+
+def has_settled_on_constant_sample( current_sample , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement ):
+
+    "Returns whether processing more of the same sample would not change the state"
+
+    if ( not_first_time_in_function != 1 ) or ( number_of_octaves_for_calculations != previous_number_of_octaves_for_calculations ) or ( number_of_samples_for_wavelength_measurement != previous_number_of_samples_for_wavelength_measurement ):
+        return False
+    # }
+    if ( active_stage_profiling_counters is not None ) or ( active_trace_recorder is not None ) or ( silence_variance_threshold is not None ):
+        return False
+    # }
+    calculated_octaves = range( highest_octave , highest_octave_plus_one - number_of_octaves_for_calculations , -1 )
+    if len( calculated_octaves ) == 0:
+        return False
+    # }
+    if filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ highest_octave ][ 0 ] + most_recent_sample_pointer ] != current_sample:
+        return False
+    # }
+    if ( current_sample > maximum_sample_value ) or ( current_sample < minimum_sample_value ) or ( int( ( maximum_sample_value - minimum_sample_value ) / 2 ) == 0 ):
+        return False
+    # }
+    for octave in octaves_to_view:
+        if ( octave in calculated_octaves ) and ( octave != highest_octave - 1 ):
+            return False
+        # }
+    # }
+    if ( ( highest_octave - 1 ) in calculated_octaves ) and ( ( highest_octave - 1 ) in octaves_to_view ) and ( ( ( current_sample + current_sample ) > maximum_sample_value ) or ( ( current_sample + current_sample ) < minimum_sample_value ) ):
+        return False
+    # }
+
+    settled_value = current_sample
+    for octave in calculated_octaves:
+        tracks_in_use = ( 0 , 1 )
+        if octave == highest_octave:
+            tracks_in_use = ( 0 , )
+        else:
+
+#  The float round-trip matches the rounding of the QRST function,
+#  which adds the (zero) adjustment values as floating-point numbers.
+
+            settled_value = int( float( 2 * settled_value ) )
+        # }
+        for track in tracks_in_use:
+            position_of_samples = position_of_samples_at_octave_and_track[ octave ][ track ]
+            if filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples : position_of_samples + number_of_saved_samples_per_octave ].count( settled_value ) != number_of_saved_samples_per_octave:
+                return False
+            # }
+            for peaks_or_troughs in ( 0 , 1 ):
+                position_of_adjustment_values = position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks_or_troughs ][ octave ][ track ]
+                if peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values : position_of_adjustment_values + number_of_saved_samples_per_octave ].count( 0 ) != number_of_saved_samples_per_octave:
+                    return False
+                # }
+            # }
+        # }
+        if ( count_of_peaks_and_troughs_at_octave[ octave ] != 0 ) or ( distance_total_at_octave[ octave ] != 0 ) or ( accumulated_amplitude_at_octave[ octave ] != 0 ):
+            return False
+        # }
+        for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+            position_at_window_and_octave = ( window * highest_octave_plus_one ) + octave
+            if ( count_of_peaks_and_troughs_at_window_and_octave[ position_at_window_and_octave ] != 0 ) or ( distance_total_at_window_and_octave[ position_at_window_and_octave ] != 0 ) or ( accumulated_amplitude_at_window_and_octave[ position_at_window_and_octave ] != 0 ):
+                return False
+            # }
+        # }
+    # }
+    return True
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the offsets -- from the time counter
+#  at the start -- of the samples at which an octave's measurement
+#  window ends during the specified number of firings of the octave,
+#  given the number of samples already accumulated in the window.
+
+def sample_offsets_of_window_endings( number_of_accumulated_samples , number_of_samples_for_wavelength_measurement , number_of_firings , time_counter_at_start , samples_between_firings ):
+
+    "Returns the sample offsets at which a measurement window ends during a number of firings"
+
+    list_of_sample_offsets = [ ]
+    for firing_number in range( number_of_samples_for_wavelength_measurement - number_of_accumulated_samples , number_of_firings + 1 , number_of_samples_for_wavelength_measurement ):
+        time_of_firing = ( ( time_counter_at_start // samples_between_firings ) + firing_number ) * samples_between_firings
+        list_of_sample_offsets.append( time_of_firing - time_counter_at_start - 1 )
+    # }
+    return list_of_sample_offsets
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that fast-forwards -- in closed form -- through
+#  the specified number of samples that all equal the sample on which
+#  the stream has settled (see the "has_settled_on_constant_sample"
+#  function), and appends the octave results to the list (in the form
+#  used by the block function, with the sample offsets counted from
+#  the specified offset of the first sample).  The results of the
+#  additional measurement windows are appended to the supplied lists
+#  (one for each window), if they are supplied.
+#  In a settled stream, each firing of an octave only advances its
+#  counters:  the sample counter, the number of accumulated samples,
+#  and -- at a viewed octave, where the QRST function's line-crossing
+#  section runs (after the trough search) -- the distance from the
+#  most recent trough pair.
+#  Each measurement window ends with no peaks or troughs, which gives
+#  an amplitude of zero and the wavelength count at the center of the
+#  octave.  At a viewed octave, each firing adds the same plot lines
+#  (except for the track letter) as when processed one sample at a
+#  time.  The number of samples fast-forwarded is returned; it is zero
+#  if the time counter would reach one (which writes the debugging
+#  header), or would wrap around, or if a distance would exceed the
+#  range of its saved value.  The results are the same as processing
+#  the samples one at a time.
+
+def fast_forward_through_constant_samples( number_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , offset_of_first_sample , list_of_octave_results , lists_of_octave_results_at_additional_windows=None ):
+
+    "Advances a settled stream through a run of constant samples in closed form"
+
+    global time_counter
+    global latest_peak_to_peak_distance_so_far
+    global scale_for_plotting
+
+    time_counter_at_start = time_counter
+    time_counter_at_end = time_counter + number_of_samples
+    if ( number_of_samples <= 0 ) or ( time_counter_at_start < 1 ) or ( time_counter_at_end > 2 ** ( highest_octave * 4 ) ):
+        return 0
+    # }
+    calculated_octaves = range( highest_octave , highest_octave_plus_one - number_of_octaves_for_calculations , -1 )
+    number_of_firings_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+    for octave in calculated_octaves:
+        samples_between_firings = 1
+        if octave < highest_octave:
+            samples_between_firings = bit_representing_octave_at_octave[ octave ]
+        # }
+        number_of_firings_at_octave[ octave ] = ( time_counter_at_end // samples_between_firings ) - ( time_counter_at_start // samples_between_firings )
+        if ( octave in octaves_to_view ) and ( octave > 0 ) and ( distance_from_most_recent_peak_or_trough_pair_at_octave[ troughs * highest_octave_plus_one + octave ] + number_of_firings_at_octave[ octave ] > 2 ** ( 8 * distance_from_most_recent_peak_or_trough_pair_at_octave.itemsize - 1 ) - 1 ):
+            return 0
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Advance each octave's counters, and collect the times at which its
+#  measurement windows end.
+
+    list_of_window_endings = [ ]
+    lists_of_window_endings_at_additional_windows = [ [ ] for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ) ]
+    for octave in calculated_octaves:
+        samples_between_firings = 1
+        if octave < highest_octave:
+            samples_between_firings = bit_representing_octave_at_octave[ octave ]
+        # }
+        number_of_firings = number_of_firings_at_octave[ octave ]
+        number_of_accumulated_samples = number_of_accumuated_samples_at_octave[ octave ]
+        for sample_offset in sample_offsets_of_window_endings( number_of_accumulated_samples , number_of_samples_for_wavelength_measurement , number_of_firings , time_counter_at_start , samples_between_firings ):
+            list_of_window_endings.append( ( sample_offset , - octave ) )
+        # }
+        number_of_accumuated_samples_at_octave[ octave ] = ( number_of_accumulated_samples + number_of_firings ) % number_of_samples_for_wavelength_measurement
+        for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+            position_at_window_and_octave = ( window * highest_octave_plus_one ) + octave
+            number_of_accumulated_samples = number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ]
+            for sample_offset in sample_offsets_of_window_endings( number_of_accumulated_samples , numbers_of_samples_for_additional_measurement_windows[ window ] , number_of_firings , time_counter_at_start , samples_between_firings ):
+                lists_of_window_endings_at_additional_windows[ window ].append( ( sample_offset , - octave ) )
+            # }
+            number_of_accumulated_samples_at_window_and_octave[ position_at_window_and_octave ] = ( number_of_accumulated_samples + number_of_firings ) % numbers_of_samples_for_additional_measurement_windows[ window ]
+        # }
+
+        sample_counter = sample_counter_at_octave[ octave ]
+        if number_of_firings <= sample_counter:
+            sample_counter_at_octave[ octave ] = sample_counter - number_of_firings
+        else:
+            sample_counter_at_octave[ octave ] = ( number_of_samples_for_wavelength_measurement - 1 ) - ( ( number_of_firings - sample_counter - 1 ) % number_of_samples_for_wavelength_measurement )
+        # }
+
+        if ( octave in octaves_to_view ) and ( octave > 0 ):
+            distance_from_most_recent_peak_or_trough_pair_at_octave[ troughs * highest_octave_plus_one + octave ] = distance_from_most_recent_peak_or_trough_pair_at_octave[ troughs * highest_octave_plus_one + octave ] + number_of_firings
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Add the plot lines for each firing of a viewed octave, in time
+#  order, as they would be added one at a time.
+
+    latest_peak_to_peak_distance_so_far = maximum_sample_value - minimum_sample_value
+    scale_for_plotting = 0.5 / int( latest_peak_to_peak_distance_so_far / 2 )
+    octave = highest_octave - 1
+    if ( octave in calculated_octaves ) and ( octave in octaves_to_view ):
+        position_of_higher_octave_samples = position_of_samples_at_octave_and_track[ octave + 1 ][ 0 ]
+        sum_of_two_samples_at_higher_octave = filtered_sample_at_octave_and_track_and_time_offset[ position_of_higher_octave_samples + delayed_sample_pointer ] + filtered_sample_at_octave_and_track_and_time_offset[ position_of_higher_octave_samples + delayed_sample_pointer + 1 ]
+        sum_of_adjustment_values = peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ peaks ][ octave + 1 ][ 0 ] + delayed_sample_pointer ] + peak_or_trough_based_adjustment_at_octave_and_track_and_time_offset[ position_of_adjustment_values_at_peaks_or_troughs_and_octave_and_track[ troughs ][ octave + 1 ][ 0 ] + delayed_sample_pointer + 1 ]
+        filtered_sample = filtered_sample_at_octave_and_track_and_time_offset[ position_of_samples_at_octave_and_track[ octave ][ 0 ] + most_recent_sample_pointer ]
+        values_for_firing = ( sum_of_two_samples_at_higher_octave , sum_of_adjustment_values * 0.5 , filtered_sample / 4 )
+        samples_between_firings = bit_representing_octave_at_octave[ octave ]
+        values_to_plot = [ ]
+        strings_to_show = [ ]
+        for time_of_firing in range( ( ( time_counter_at_start // samples_between_firings ) + 1 ) * samples_between_firings , time_counter_at_end + 1 , samples_between_firings ):
+            track = 0
+            if ( time_of_firing / samples_between_firings ) % 2 == 0:
+                track = 1
+            # }
+            values_to_plot.extend( values_for_firing )
+            strings_to_show.extend( ( ( "[%02d%s]" % ( ( octave + 1 ) , letter_for_track[ track ] ) ) , ( "<adj%02d%s>" % ( octave , letter_for_track[ track ] ) ) , ( "%02d%s" % ( octave , letter_for_track[ track ] ) ) ) )
+        # }
+        position_in_lines = 0
+        while position_in_lines < len( values_to_plot ):
+            number_of_lines_to_add = min( maximum_number_of_pending_plot_lines - len( values_for_pending_plot_lines ) , len( values_to_plot ) - position_in_lines )
+            values_for_pending_plot_lines.extend( values_to_plot[ position_in_lines : position_in_lines + number_of_lines_to_add ] )
+            strings_for_pending_plot_lines.extend( strings_to_show[ position_in_lines : position_in_lines + number_of_lines_to_add ] )
+            scales_for_pending_plot_lines.extend( [ scale_for_plotting ] * number_of_lines_to_add )
+            position_in_lines = position_in_lines + number_of_lines_to_add
+            if len( values_for_pending_plot_lines ) >= maximum_number_of_pending_plot_lines:
+                write_pending_plot_lines( )
+            # }
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Append the results of the measurement windows, in the order of the
+#  block function (by sample offset, and from the highest octave to
+#  the lowest).  The values returned for the last sample are also
+#  left in the return-value arrays.
+
+    list_of_window_endings.sort( )
+    for ( sample_offset , negated_octave ) in list_of_window_endings:
+        list_of_octave_results.append( ( offset_of_first_sample + sample_offset , - negated_octave , 0 , output_wavelength_value_at_center_of_octave ) )
+    # }
+    for octave in range( highest_octave_plus_one ):
+        final_accumulated_amplitude_at_octave[ octave ] = 0
+        scaled_wavelength_count_at_octave[ octave ] = 0
+    # }
+    for ( sample_offset , negated_octave ) in list_of_window_endings:
+        if sample_offset == number_of_samples - 1:
+            scaled_wavelength_count_at_octave[ - negated_octave ] = output_wavelength_value_at_center_of_octave
+        # }
+    # }
+    for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+        lists_of_window_endings_at_additional_windows[ window ].sort( )
+        for ( sample_offset , negated_octave ) in lists_of_window_endings_at_additional_windows[ window ]:
+            if lists_of_octave_results_at_additional_windows is not None:
+                lists_of_octave_results_at_additional_windows[ window ].append( ( offset_of_first_sample + sample_offset , - negated_octave , 0 , output_wavelength_value_at_center_of_octave ) )
+            # }
+        # }
+        for octave in range( highest_octave_plus_one ):
+            final_accumulated_amplitude_at_window_and_octave[ ( window * highest_octave_plus_one ) + octave ] = 0
+            scaled_wavelength_count_at_window_and_octave[ ( window * highest_octave_plus_one ) + octave ] = 0
+        # }
+        for ( sample_offset , negated_octave ) in lists_of_window_endings_at_additional_windows[ window ]:
+            if sample_offset == number_of_samples - 1:
+                scaled_wavelength_count_at_window_and_octave[ ( window * highest_octave_plus_one ) - negated_octave ] = output_wavelength_value_at_center_of_octave
+            # }
+        # }
+    # }
+    time_counter = time_counter_at_end
+    return number_of_samples
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that specifies the numbers of samples used for
+#  additional measurement windows, such as a shorter window for
+#  fast-reacting measurements and a longer one for smoothed
+#  measurements, alongside the measurement window specified in each
+#  call to the QRST function.  The additional windows share the
+#  decimation and the peak-and-trough search, so each one only adds
+#  the cost of its own accumulated values.  An empty list disables
+#  them.  Their accumulated values start from zero, and the QRST
+#  function restarts them (but not its own state) when its parameters
+#  change.  If a number of samples is less than 8, nothing is changed
+#  and an error is returned.
+
+def enable_additional_measurement_windows( numbers_of_samples_for_wavelength_measurement ):
+
+    "Specifies additional measurement windows that share the decimation and the peak-and-trough search"
+
+    global numbers_of_samples_for_additional_measurement_windows
+    global distance_total_at_window_and_octave
+    global count_of_peaks_and_troughs_at_window_and_octave
+    global accumulated_amplitude_at_window_and_octave
+    global number_of_accumulated_samples_at_window_and_octave
+    global final_accumulated_amplitude_at_window_and_octave
+    global scaled_wavelength_count_at_window_and_octave
+
+    for number_of_samples_for_wavelength_measurement in numbers_of_samples_for_wavelength_measurement:
+        if number_of_samples_for_wavelength_measurement < 8:
+            return ( 1 )
+        # }
+    # }
+    numbers_of_samples_for_additional_measurement_windows = tuple( numbers_of_samples_for_wavelength_measurement )
+    number_of_values = len( numbers_of_samples_for_additional_measurement_windows ) * highest_octave_plus_one
+    distance_total_at_window_and_octave = array.array( 'i' , [ 0 ] ) * number_of_values
+    count_of_peaks_and_troughs_at_window_and_octave = array.array( 'i' , [ 0 ] ) * number_of_values
+    accumulated_amplitude_at_window_and_octave = array.array( 'd' , [ 0 ] ) * number_of_values
+    number_of_accumulated_samples_at_window_and_octave = array.array( 'i' , [ 0 ] ) * number_of_values
+    final_accumulated_amplitude_at_window_and_octave = [ 0 for position_at_window_and_octave in range( number_of_values ) ]
+    scaled_wavelength_count_at_window_and_octave = [ 0 for position_at_window_and_octave in range( number_of_values ) ]
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns the results of an additional
+#  measurement window (numbered from zero, in the order specified) for
+#  the most recent sample, in the same form as the QRST function's
+#  return value:  the amplitudes and the scaled wavelength counts at
+#  each octave, with a non-zero wavelength count at each octave whose
+#  measurement window has just ended.
+
+def results_at_additional_measurement_window( window ):
+
+    "Returns the most recent amplitudes and wavelength counts of an additional measurement window"
+
+    position_of_window = window * highest_octave_plus_one
+    return ( tuple( final_accumulated_amplitude_at_window_and_octave[ position_of_window : position_of_window + highest_octave_plus_one ] ) , tuple( scaled_wavelength_count_at_window_and_octave[ position_of_window : position_of_window + highest_octave_plus_one ] ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Specify the sample formats that can be supplied to the block
+#  function as a buffer (such as bytes, a bytearray, a memoryview, an
+#  array, or a NumPy array), and the "array" type code for each format.
+#  All the formats are little-endian.
+
+type_code_for_sample_format = { "s16le" : "h" , "u16le" : "H" , "f32le" : "f" }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that returns a view of a buffer of samples as
+#  numeric values in the specified sample format, without copying the
+#  buffer, except on big-endian computers, where the bytes must be
+#  swapped.  A buffer that is not C-contiguous (such as a column of a
+#  two-dimensional NumPy array), or that does not hold a whole number
+#  of samples, cannot be viewed this way, and "None" is returned.
+
+def view_of_buffer_as_samples( buffer_of_samples , sample_format ):
+
+    "Returns a view of a buffer as numeric sample values"
+
+    type_code = type_code_for_sample_format[ sample_format ]
+    view_of_buffer = memoryview( buffer_of_samples )
+    if ( not view_of_buffer.c_contiguous ) or ( view_of_buffer.nbytes % array.array( type_code ).itemsize != 0 ):
+        return None
+    # }
+    view_of_samples = view_of_buffer.cast( "B" ).cast( type_code )
+    if sys.byteorder == "big":
+        view_of_samples = array.array( type_code , view_of_samples.tobytes( ) )
+        view_of_samples.byteswap( )
+    # }
+    return view_of_samples
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that applies the QRST function to a block of
+#  samples, such as a block of live audio that has just arrived.
+#  Only the octave results that became available during the block are
+#  returned, as a list of results that each contain:  the sample
+#  offset (within the block) at which the result became available,
+#  the octave number, the amplitude, and the scaled wavelength count.
+#  An octave's result becomes available when its measurement has
+#  ended, and that is indicated by a non-zero wavelength count.
+#
+#  The block can be a sequence of integer samples, or -- when a sample
+#  format is specified -- a C-contiguous buffer of samples in that
+#  format (otherwise "1" is returned, as for an unknown format).  Each
+#  buffer sample has the offset subtracted, is multiplied by the
+#  scale, and is truncated to an integer, one sample at a time, so no
+#  list of converted samples is created.  For example, unsigned 16-bit
+#  samples can use an offset of 32768, and floating-point samples
+#  between minus one and plus one can use a scale of 3276800.
+#
+#  Runs of a constant sample (such as digital silence) are
+#  fast-forwarded once the stream has settled on that sample (see the
+#  "fast_forward_through_constant_samples" function), with the same
+#  results as applying the QRST function to each sample.
+#
+#  If additional measurement windows are enabled (see the
+#  "enable_additional_measurement_windows" function) and a list of
+#  lists -- one for each additional window -- is supplied, the results
+#  of each additional window are appended to its list, in the same
+#  form as the returned results.
+
+def quick_rolling_spectral_transform_for_block( block_of_samples , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , sample_format=None , offset_for_samples=0 , scale_for_samples=1 , lists_of_octave_results_at_additional_windows=None ):
+
+    "Applies the Quick Rolling Spectral Transform (QRST) algorithmn to a block of samples"
+
+    if sample_format is not None:
+        if sample_format not in type_code_for_sample_format:
+            return ( 1 )
+        # }
+        block_of_samples = view_of_buffer_as_samples( block_of_samples , sample_format )
+        if block_of_samples is None:
+            return ( 1 )
+        # }
+    # }
+    list_of_octave_results = [ ]
+    lowest_octave = highest_octave - number_of_octaves_for_calculations + 1
+    sample_offset = 0
+    while sample_offset < len( block_of_samples ):
+        current_sample = block_of_samples[ sample_offset ]
+        if sample_format is not None:
+            current_sample = int( ( current_sample - offset_for_samples ) * scale_for_samples )
+        # }
+
+
+#----------------------------------------------------------------------
+#  If fast-forwarding is enabled, occasionally check whether the
+#  stream has settled on a constant sample, and if so, fast-forward
+#  through the rest of the run of that sample (within the block).
+
+        if constant_runs_are_fast_forwarded and ( sample_offset % interval_between_checks_for_settled_constant_sample == 0 ) and ( type( current_sample ) is int ) and has_settled_on_constant_sample( current_sample , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement ):
+            end_of_run = sample_offset + 1
+            while end_of_run < len( block_of_samples ):
+                next_sample = block_of_samples[ end_of_run ]
+                if sample_format is not None:
+                    next_sample = int( ( next_sample - offset_for_samples ) * scale_for_samples )
+                # }
+                if next_sample != current_sample:
+                    break
+                # }
+                end_of_run = end_of_run + 1
+            # }
+            if fast_forward_through_constant_samples( end_of_run - sample_offset , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , sample_offset , list_of_octave_results , lists_of_octave_results_at_additional_windows ) > 0:
+                sample_offset = end_of_run
+                continue
+            # }
+        # }
+
+
+#----------------------------------------------------------------------
+#  Otherwise apply the QRST function to this sample.
+
+        returned_tuple = quick_rolling_spectral_transform( current_sample , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+        if returned_tuple == 1:
+            return ( 1 )
+        # }
+        for octave in range( highest_octave , lowest_octave - 1 , -1 ):
+            if returned_tuple[ 1 ][ octave ] != 0:
+                list_of_octave_results.append( ( sample_offset , octave , returned_tuple[ 0 ][ octave ] , returned_tuple[ 1 ][ octave ] ) )
+            # }
+        # }
+        if lists_of_octave_results_at_additional_windows is not None:
+            for window in range( len( numbers_of_samples_for_additional_measurement_windows ) ):
+                position_of_window = window * highest_octave_plus_one
+                for octave in range( highest_octave , lowest_octave - 1 , -1 ):
+                    if scaled_wavelength_count_at_window_and_octave[ position_of_window + octave ] != 0:
+                        lists_of_octave_results_at_additional_windows[ window ].append( ( sample_offset , octave , final_accumulated_amplitude_at_window_and_octave[ position_of_window + octave ] , scaled_wavelength_count_at_window_and_octave[ position_of_window + octave ] ) )
+                    # }
+                # }
+            # }
+        # }
+        sample_offset = sample_offset + 1
+    # }
+    write_pending_plot_lines( )
+
+
+#----------------------------------------------------------------------
+#  All done.
+
+    return list_of_octave_results
+
+# }
+
+
 #----------------------------------------------------------------------
@@ -0,0 +1,185 @@
+#----------------------------------------------------------------------
+#
+#          real_time_deadline_monitor.py
+#          -----------------------------
+#
+#  Measures -- for each block of a live stream -- the time the Quick
+#  Rolling Spectral Transform (QRST) function needs, compared with the
+#  real-time budget (the duration of the block's audio), and when the
+#  host falls behind it sheds work, one degradation level at a time,
+#  and restores full quality, one level at a time, once the stream
+#  has caught up.  The degradation levels are, in order:
+#
+#      level 0        full quality
+#      level 1        skip the peak-and-trough search at quiet octaves
+#                     (adaptive octave skipping)
+#      next levels    also drop the lowest calculated octave, one more
+#                     octave at each level, down to the minimum number
+#                     of octaves
+#      last level     also widen the measurement window (if a wider
+#                     maximum window is specified)
+#
+#  Changing the number of octaves or the measurement window restarts
+#  the QRST function (its time counter and saved samples), so results
+#  for a few wavelengths after such a change come from the restarted
+#  state.  Every change of level is written to the log file (if one is
+#  supplied) and kept in a list of changes.
+#
+#  Sample usage, in a loop that receives live blocks of samples:
+#
+#      monitor = real_time_deadline_monitor.RealTimeDeadlineMonitor( 8000 , 8 , 24 , log_file=sys.stderr )
+#      ...
+#      list_of_octave_results = monitor.transform_block( block_of_samples , lag_in_seconds )
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import time
+
+import quick_rolling_spectral_transform
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that monitors the deadline and chooses the
+#  degradation level.
+
+class RealTimeDeadlineMonitor:
+
+    "Sheds QRST work when a live stream falls behind real time, and restores it afterwards"
+
+
+#----------------------------------------------------------------------
+#  Initialize the monitor, and build the list of settings at each
+#  degradation level.  The utilisation is the processing time divided
+#  by the duration of the block's audio, smoothed over recent blocks.
+#  The stream is overloaded when the smoothed utilisation exceeds the
+#  overload utilisation, or when the lag (how long ago the block's
+#  last sample was captured, when processing of the block started)
+#  exceeds the maximum lag.  The stream has caught up when -- for the
+#  specified number of blocks in a row -- the smoothed utilisation is
+#  below the recovery utilisation and the lag is below one block.
+#  After each change, the specified number of blocks pass before the
+#  next change, so the change can take effect.
+
+    def __init__( self , sample_rate , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement , log_file=None , silence_variance_threshold=10000.0 , minimum_number_of_octaves=3 , maximum_number_of_samples_for_wavelength_measurement=None , overload_utilisation=0.9 , recovery_utilisation=0.6 , maximum_lag_in_seconds=0.25 , number_of_blocks_before_restoring=20 , number_of_blocks_between_changes=4 , smoothing_factor=0.25 ):
+        self.sample_rate = sample_rate
+        self.log_file = log_file
+        self.silence_variance_threshold = silence_variance_threshold
+        self.overload_utilisation = overload_utilisation
+        self.recovery_utilisation = recovery_utilisation
+        self.maximum_lag_in_seconds = maximum_lag_in_seconds
+        self.number_of_blocks_before_restoring = number_of_blocks_before_restoring
+        self.number_of_blocks_between_changes = number_of_blocks_between_changes
+        self.smoothing_factor = smoothing_factor
+
+        self.settings_at_level = [ ( False , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement ) ]
+        self.settings_at_level.append( ( True , number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement ) )
+        for number_of_octaves in range( number_of_octaves_for_calculations - 1 , minimum_number_of_octaves - 1 , -1 ):
+            self.settings_at_level.append( ( True , number_of_octaves , number_of_samples_for_wavelength_measurement ) )
+        # }
+        if ( maximum_number_of_samples_for_wavelength_measurement is not None ) and ( maximum_number_of_samples_for_wavelength_measurement > number_of_samples_for_wavelength_measurement ):
+            self.settings_at_level.append( ( True , self.settings_at_level[ -1 ][ 1 ] , maximum_number_of_samples_for_wavelength_measurement ) )
+        # }
+
+        self.degradation_level = 0
+        self.smoothed_utilisation = 0.0
+        self.number_of_blocks_since_change = 0
+        self.number_of_caught_up_blocks = 0
+        self.number_of_samples_processed = 0
+        self.list_of_changes = [ ]
+        self.apply_settings( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Apply the settings of the current degradation level.  Adaptive
+#  octave skipping is controlled here, so it is not enabled separately
+#  while the monitor is used.
+
+    def apply_settings( self ):
+        ( skip_quiet_octaves , self.number_of_octaves_for_calculations , self.number_of_samples_for_wavelength_measurement ) = self.settings_at_level[ self.degradation_level ]
+        if skip_quiet_octaves:
+            quick_rolling_spectral_transform.enable_adaptive_octave_skipping( self.silence_variance_threshold )
+        else:
+            quick_rolling_spectral_transform.enable_adaptive_octave_skipping( None )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Describe the settings at a degradation level, for the log.
+
+    def description_of_level( self , degradation_level ):
+        ( skip_quiet_octaves , number_of_octaves , number_of_samples ) = self.settings_at_level[ degradation_level ]
+        return "level %d (%d octaves , window %d , quiet-octave skipping %s)" % ( degradation_level , number_of_octaves , number_of_samples , "on" if skip_quiet_octaves else "off" )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Change to the specified degradation level, and log the change.
+
+    def change_level( self , new_degradation_level , reason , lag_in_seconds ):
+        change = ( self.number_of_samples_processed , self.degradation_level , new_degradation_level , self.smoothed_utilisation , lag_in_seconds , reason )
+        self.list_of_changes.append( change )
+        if self.log_file is not None:
+            self.log_file.write( "[sample %d:  %s , from %s to %s , utilisation %.2f , lag %.3f s]\n" % ( self.number_of_samples_processed , reason , self.description_of_level( self.degradation_level ) , self.description_of_level( new_degradation_level ) , self.smoothed_utilisation , lag_in_seconds ) )
+            self.log_file.flush( )
+        # }
+        self.degradation_level = new_degradation_level
+        self.number_of_blocks_since_change = 0
+        self.number_of_caught_up_blocks = 0
+        self.apply_settings( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Record the processing time of one block, and change the
+#  degradation level if the stream is overloaded or has caught up.
+
+    def add_block_measurement( self , number_of_samples , processing_seconds , lag_in_seconds ):
+        budget_in_seconds = number_of_samples / self.sample_rate
+        self.smoothed_utilisation = self.smoothed_utilisation + ( self.smoothing_factor * ( ( processing_seconds / budget_in_seconds ) - self.smoothed_utilisation ) )
+        self.number_of_samples_processed = self.number_of_samples_processed + number_of_samples
+        self.number_of_blocks_since_change = self.number_of_blocks_since_change + 1
+
+        if ( self.smoothed_utilisation < self.recovery_utilisation ) and ( lag_in_seconds < budget_in_seconds ):
+            self.number_of_caught_up_blocks = self.number_of_caught_up_blocks + 1
+        else:
+            self.number_of_caught_up_blocks = 0
+        # }
+
+        if self.number_of_blocks_since_change < self.number_of_blocks_between_changes:
+            return
+        # }
+        if ( self.smoothed_utilisation > self.overload_utilisation ) or ( lag_in_seconds > self.maximum_lag_in_seconds ):
+            if self.degradation_level < len( self.settings_at_level ) - 1:
+                self.change_level( self.degradation_level + 1 , "overloaded" , lag_in_seconds )
+            # }
+        elif ( self.number_of_caught_up_blocks >= self.number_of_blocks_before_restoring ) and ( self.degradation_level > 0 ):
+            self.change_level( self.degradation_level - 1 , "caught up" , lag_in_seconds )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Transform one block with the current settings, measure it, and
+#  return the block function's list of octave results.  The lag is
+#  how far behind real time the stream was when the block was
+#  received.
+
+    def transform_block( self , block_of_samples , lag_in_seconds=0.0 ):
+        starting_time = time.perf_counter( )
+        list_of_octave_results = quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( block_of_samples , self.number_of_octaves_for_calculations , self.number_of_samples_for_wavelength_measurement )
+        self.add_block_measurement( len( block_of_samples ) , time.perf_counter( ) - starting_time , lag_in_seconds )
+        return list_of_octave_results
+    # }
+
+# }
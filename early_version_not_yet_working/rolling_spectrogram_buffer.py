@@ -0,0 +1,150 @@
+#----------------------------------------------------------------------
+#
+#          rolling_spectrogram_buffer.py
+#          -----------------------------
+#
+#  Holds the most recent history of the Quick Rolling Spectral
+#  Transform (QRST) octave results -- the amplitude and scaled
+#  wavelength at each octave -- for live displays.  Time is divided
+#  into time slots of a fixed number of samples, and only the most
+#  recent time slots are kept, in a fixed-size circular buffer.
+#
+#  Each octave result is stored in its time slot when the octave's
+#  measurement ends, in constant time.  Each time slot is stored twice,
+#  at its position in the circular buffer and at that position plus the
+#  number of time slots, so that the time slots -- ordered from the
+#  oldest to the newest -- are always a contiguous part of the buffer.
+#  This allows a display to view the history without copying it.
+#
+#  Sample usage:
+#
+#      history = rolling_spectrogram_buffer.RollingSpectrogramBuffer( 300 , 800 )
+#      history.add_octave_results_for_block( list_of_octave_results , sample_number_at_start_of_block )
+#      ( slot_numbers , amplitudes , scaled_wavelengths ) = history.views_of_time_slots( )
+#
+#  The views are only valid until the next time slot begins, so a
+#  display that runs in another thread should draw from them directly
+#  (or copy them) right after requesting them.  Results in the newest
+#  time slot can still change.
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the NumPy library.
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  The highest octave is always 15, so the octave numbers are used
+#  directly as column numbers.
+
+highest_octave = 15
+
+highest_octave_plus_one = highest_octave + 1
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that holds the history.
+
+class RollingSpectrogramBuffer:
+
+    "Holds the most recent QRST octave results in a circular buffer of time slots"
+
+
+#----------------------------------------------------------------------
+#  Initialize an empty history, as if the time slots before the first
+#  sample (which have negative slot numbers) had already been reached.
+
+    def __init__( self , number_of_time_slots , samples_per_time_slot ):
+        self.number_of_time_slots = number_of_time_slots
+        self.samples_per_time_slot = samples_per_time_slot
+        self.amplitude_at_slot_and_octave = numpy.zeros( ( 2 * number_of_time_slots , highest_octave_plus_one ) , dtype=numpy.float64 )
+        self.scaled_wavelength_at_slot_and_octave = numpy.zeros( ( 2 * number_of_time_slots , highest_octave_plus_one ) , dtype=numpy.int32 )
+        self.slot_number_at_slot = numpy.tile( numpy.arange( - number_of_time_slots , 0 , dtype=numpy.int64 ) , 2 )
+        self.newest_slot_number = -1
+    # }
+
+
+#----------------------------------------------------------------------
+#  Advance the newest time slot to the time slot that contains the
+#  specified sample number, clearing each time slot that is reached.
+#  At most all the time slots are cleared, no matter how far time
+#  advances.
+
+    def advance_to_sample( self , sample_number ):
+        slot_number = sample_number // self.samples_per_time_slot
+        if slot_number <= self.newest_slot_number:
+            return
+        # }
+        first_slot_number_to_clear = max( self.newest_slot_number + 1 , slot_number - self.number_of_time_slots + 1 )
+        for slot_number_to_clear in range( first_slot_number_to_clear , slot_number + 1 ):
+            position = slot_number_to_clear % self.number_of_time_slots
+            for position_of_copy in ( position , position + self.number_of_time_slots ):
+                self.amplitude_at_slot_and_octave[ position_of_copy ] = 0
+                self.scaled_wavelength_at_slot_and_octave[ position_of_copy ] = 0
+                self.slot_number_at_slot[ position_of_copy ] = slot_number_to_clear
+            # }
+        # }
+        self.newest_slot_number = slot_number
+    # }
+
+
+#----------------------------------------------------------------------
+#  Store one octave result at the time slot that contains the
+#  specified sample number.  Results older than the oldest time slot
+#  are ignored.
+
+    def add_octave_result( self , sample_number , octave , amplitude , scaled_wavelength ):
+        self.advance_to_sample( sample_number )
+        slot_number = sample_number // self.samples_per_time_slot
+        if slot_number <= ( self.newest_slot_number - self.number_of_time_slots ):
+            return
+        # }
+        position = slot_number % self.number_of_time_slots
+        self.amplitude_at_slot_and_octave[ position , octave ] = amplitude
+        self.amplitude_at_slot_and_octave[ position + self.number_of_time_slots , octave ] = amplitude
+        self.scaled_wavelength_at_slot_and_octave[ position , octave ] = scaled_wavelength
+        self.scaled_wavelength_at_slot_and_octave[ position + self.number_of_time_slots , octave ] = scaled_wavelength
+    # }
+
+
+#----------------------------------------------------------------------
+#  Store the octave results returned by the
+#  "quick_rolling_spectral_transform_for_block" function.  When the
+#  number of samples in the block is specified, also advance to the end
+#  of the block, so that time slots without any results (during
+#  silence) are still reached.
+
+    def add_octave_results_for_block( self , list_of_octave_results , sample_number_at_start_of_block , number_of_samples_in_block=None ):
+        for ( sample_offset , octave , amplitude , scaled_wavelength ) in list_of_octave_results:
+            self.add_octave_result( sample_number_at_start_of_block + sample_offset , octave , amplitude , scaled_wavelength )
+        # }
+        if number_of_samples_in_block is not None:
+            self.advance_to_sample( sample_number_at_start_of_block + number_of_samples_in_block - 1 )
+        # }
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return views -- not copies -- of the slot numbers, the amplitudes,
+#  and the scaled wavelengths of all the time slots, ordered from the
+#  oldest to the newest time slot.  The amplitudes and wavelengths
+#  have one row for each time slot and one column for each octave.
+
+    def views_of_time_slots( self ):
+        first_position = ( self.newest_slot_number + 1 ) % self.number_of_time_slots
+        last_position_plus_one = first_position + self.number_of_time_slots
+        return ( self.slot_number_at_slot[ first_position : last_position_plus_one ] , self.amplitude_at_slot_and_octave[ first_position : last_position_plus_one ] , self.scaled_wavelength_at_slot_and_octave[ first_position : last_position_plus_one ] )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
@@ -67,6 +67,20 @@
 import quick_rolling_spectral_transform
 
 
+#----------------------------------------------------------------------
+#  Import the double-buffered file reading and writing, which overlaps
+#  the file access with the calculations.
+
+import double_buffered_file_io
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the "argparse" library.
+#  It is used to read the optional metrics settings.
+
+import argparse
+
+
 #----------------------------------------------------------------------
 #  Specify a need for the "struct" library.
 #  It is used to pack/unpack binary data written to files.
@@ -74,6 +88,13 @@ import quick_rolling_spectral_transform
 import struct
 
 
+#----------------------------------------------------------------------
+#  Specify a need for the "sys" library.
+#  It is used to write the plot data.
+
+import sys
+
+
 #----------------------------------------------------------------------
 #  Specify a need for the math library.
 #  It is only needed for the "sine" function.
@@ -102,111 +123,188 @@ highest_octave = 15
 highest_octave_plus_one = highest_octave + 1
 
 
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which compresses the test signal into a
+#  QRST file and writes the spectrum as "ploticus" data.  Optionally
+#  the job's counters -- samples processed, events per octave, records
+#  written and suppressed, bytes written, processing lag, and (with
+#  "--profile-stages") the time in each QRST stage -- are published
+#  in the Prometheus text format (see "metrics_exporter.py"), with:
+#
+#      python sample_usage_of_quick_rolling_spectral_transform.py --metrics-file qrst.prom --metrics-port 9464
+#
+#  Optionally the octave results are also stored at full precision in
+#  a columnar result store (see "columnar_result_store.py"), with:
+#
+#      python sample_usage_of_quick_rolling_spectral_transform.py --columnar-store qrst_results
+
+def main( ):
+
+    "Compresses the test signal with the Quick Rolling Spectral Transform"
+
+    parser = argparse.ArgumentParser( description="Compress the test signal with the Quick Rolling Spectral Transform" )
+    parser.add_argument( "--metrics-file" , default=None , help="file that receives the metrics in the Prometheus text format" )
+    parser.add_argument( "--metrics-port" , type=int , default=None , help="local HTTP port that serves the metrics" )
+    parser.add_argument( "--metrics-interval" , type=float , default=5.0 , help="seconds between metrics updates" )
+    parser.add_argument( "--sample-rate" , type=int , default=8000 , help="samples per second, for the processing-lag metric" )
+    parser.add_argument( "--profile-stages" , action="store_true" , help="also publish the time in each QRST stage" )
+    parser.add_argument( "--columnar-store" , default=None , help="directory of a columnar result store that receives the octave results" )
+    arguments = parser.parse_args( )
+
+
 #----------------------------------------------------------------------
 #  Initialization.
 
-maximum_time_segment_count = int( time_duration / number_of_cycles_between_accumulated_spectral_results ) + 1
+    waveform_file_integer = [ 0 for pointer in range( 200 ) ]
+
+    total_amplitude_at_wavelength = [ 0 for count in range( number_of_samples_for_wavelength_measurement + 1 ) ]
+
+    amplitude_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-waveform_file_integer = [ 0 for pointer in range( 200 ) ]
+    scaled_wavelength_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-total_amplitude_at_wavelength = [ 0 for count in range( number_of_samples_for_wavelength_measurement + 1 ) ]
+    viewed_sample_number = [ 0 for octave in range( ( highest_octave_plus_one ) * 3 ) ]
 
-amplitude_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+    previous_amplitude_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-scaled_wavelength_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+    previous_wavelength_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
 
-viewed_sample_number = [ 0 for octave in range( ( highest_octave_plus_one ) * 3 ) ]
+    highest_allowed_frequency_segment = number_of_samples_for_wavelength_measurement * highest_octave
 
-previous_amplitude_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+#  The spectrogram accumulator, which collects the power spectrum
+#  values for plotting, is imported here because the NumPy library it
+#  needs is slow to import.
 
-previous_wavelength_at_octave = [ 0 for octave in range( highest_octave_plus_one ) ]
+    import spectrogram_accumulator
 
-highest_allowed_frequency_segment = number_of_samples_for_wavelength_measurement * highest_octave
+    spectrogram = spectrogram_accumulator.SpectrogramAccumulator( highest_allowed_frequency_segment )
 
-total_amplitude_at_frequency_segment_at_time_segment = [ [ 0 for time_segment in range( maximum_time_segment_count ) ] for frequency_segment in range( highest_allowed_frequency_segment + 1 ) ]
+    time_segment_at_pending_result = [ ]
 
-bit_representing_octave_at_octave = [ ( 2 ** ( highest_octave - octave ) ) for octave in range( highest_octave + 1 ) ]
+    octave_at_pending_result = [ ]
 
-bit_representing_octave_at_octave[ highest_octave ] = 1
+    amplitude_at_pending_result = [ ]
 
-lowest_used_frequency_segment = 100
+    scaled_wavelength_at_pending_result = [ ]
 
-highest_used_frequency_segment = 0
+    maximum_number_of_pending_results = 4096
 
-highest_amplitude = 0
+    spectral_results_output_counter = number_of_cycles_between_accumulated_spectral_results
 
-spectral_results_output_counter = number_of_cycles_between_accumulated_spectral_results
+    time_segment = 0
 
-time_segment = 0
+    wavelength_value_for_compression = 0
 
-wavelength_value_for_compression = 0
+    amplitude_value_for_compression = 0
 
-amplitude_value_for_compression = 0
+    time_count_at_last_info = 0
 
-time_count_at_last_info = 0
+    max_4_bit_value = ( 2 ** 4 ) - 1
 
-max_4_bit_value = ( 2 ** 4 ) - 1
+    max_7_bit_value = ( 2 ** 7 ) - 1
 
-max_7_bit_value = ( 2 ** 7 ) - 1
+    max_8_bit_value = ( 2 ** 8 ) - 1
 
-max_8_bit_value = ( 2 ** 8 ) - 1
+    max_16_bit_value = ( 2 ** 16 ) - 1
 
-max_16_bit_value = ( 2 ** 16 ) - 1
+    max_24_bit_value = ( 2 ** 24 ) - 1
 
-max_24_bit_value = ( 2 ** 24 ) - 1
+    delay_to_plot_count = 0
 
-delay_to_plot_count = 0
+    number_of_bytes_written = 0
 
-spaces = " " , " " , " "   , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "
+    number_of_records_written = 0
+
+    spaces = " " , " " , " "   , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "  , " "
 
 
 #----------------------------------------------------------------------
-#  Open the input file that contains audio waveform data.
+#  If requested, start publishing the metrics.  Within the loop, the
+#  counters are only updated when the metrics are used.
+
+    metrics = None
+    metrics_publisher = None
+    if ( arguments.metrics_file is not None ) or ( arguments.metrics_port is not None ):
+        import metrics_exporter
+        counters = None
+        if arguments.profile_stages:
+            import stage_profiling_counters
+            counters = stage_profiling_counters.StageProfilingCounters( )
+            quick_rolling_spectral_transform.enable_stage_profiling( counters )
+        # }
+        metrics = metrics_exporter.TransformMetrics( arguments.sample_rate , stage_profiling_counters=counters )
+        metrics_publisher = metrics_exporter.MetricsPublisher( metrics , file_name=arguments.metrics_file , port=arguments.metrics_port , interval_in_seconds=arguments.metrics_interval )
+        metrics_publisher.start( )
+    # }
 
-input_waveform_file = open( 'output_binary_signal_for_testing_qrst.raw' , 'rb' , 0 )
 
-# input_waveform_file = open( 'sound_recording_votefair_ranking_unsigned_16bit_noheader.raw' , 'rb' , 0 )
+#----------------------------------------------------------------------
+#  If requested, open the columnar result store.  Results are appended
+#  after any samples already in the store.
+
+    columnar_store = None
+    if arguments.columnar_store is not None:
+        import columnar_result_store
+        columnar_store = columnar_result_store.ColumnarResultWriter( arguments.columnar_store , sample_rate=arguments.sample_rate , number_of_octaves_for_calculations=number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement=number_of_samples_for_wavelength_measurement )
+    # }
+    number_of_samples_processed = 0
 
 
 #----------------------------------------------------------------------
-#  Create the output file that contains compressed audio data.
+#  Open the input file that contains audio waveform data.  It is read
+#  ahead on a background thread.
 
-compressed_audio_file = open( 'output_binary_compressed_audio.qrst' , 'wb' , 0 )
+    input_waveform_file = double_buffered_file_io.PrefetchingReader( 'output_binary_signal_for_testing_qrst.raw' )
+
+#     input_waveform_file = open( 'sound_recording_votefair_ranking_unsigned_16bit_noheader.raw' , 'rb' , 0 )
+
+
+#----------------------------------------------------------------------
+#  Create the output file that contains compressed audio data.  It is
+#  written in blocks on a background thread.
+
+    compressed_audio_file = double_buffered_file_io.BackgroundWriter( 'output_binary_compressed_audio.qrst' )
 
 
 #----------------------------------------------------------------------
 #  Loop for each waveform sample.
 
-for time_counter in range( time_duration ):
+    for time_counter in range( time_duration ):
 
 
 #----------------------------------------------------------------------
 #  Read from the sound file, and unpack the integer value.
 #  Exit the loop at the end of the input file.
 
-    try:
-        packed_waveform_value = input_waveform_file.read( 2 )
-        waveform_sample_as_tuple = struct.unpack( "<h" , packed_waveform_value )
-    except:
-        break
-    # }
+        try:
+            packed_waveform_value = input_waveform_file.read( 2 )
+            waveform_sample_as_tuple = struct.unpack( "<h" , packed_waveform_value )
+        except:
+            break
+        # }
 
-    scale_for_amplitude = 100.0
-    waveform_sample = int( waveform_sample_as_tuple[ 0 ] * scale_for_amplitude )
+        scale_for_amplitude = 100.0
+        waveform_sample = int( waveform_sample_as_tuple[ 0 ] * scale_for_amplitude )
 
 
 #----------------------------------------------------------------------
 #  Execute the Quick Rolling Spectral Transform for the next sample,
 #  and get the results.
 
-    returned_tuple = quick_rolling_spectral_transform.quick_rolling_spectral_transform( waveform_sample, number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
+        returned_tuple = quick_rolling_spectral_transform.quick_rolling_spectral_transform( waveform_sample, number_of_octaves_for_calculations , number_of_samples_for_wavelength_measurement )
 
-#    print( returned_tuple )
+#        print( returned_tuple )
 
-    for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
-        amplitude_at_octave[ octave ] = returned_tuple[ 0 ][ octave ]
-        scaled_wavelength_at_octave[ octave ] = returned_tuple[ 1 ][ octave ]
-    # }
+        number_of_samples_processed = number_of_samples_processed + 1
+        if columnar_store is not None:
+            columnar_store.append_sample_results( time_counter , returned_tuple )
+        # }
+
+        for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
+            amplitude_at_octave[ octave ] = returned_tuple[ 0 ][ octave ]
+            scaled_wavelength_at_octave[ octave ] = returned_tuple[ 1 ][ octave ]
+        # }
 
 
 #----------------------------------------------------------------------
@@ -258,87 +356,113 @@ for time_counter in range( time_duration ):
 #......................................................................
 #  Begin a loop that handles each octave.
 
-    for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
-        if ( amplitude_at_octave[ octave ] != previous_amplitude_at_octave[ octave ] ) or ( scaled_wavelength_at_octave[ octave ] != previous_wavelength_at_octave[ octave ] ):
-            previous_amplitude_at_octave[ octave ] = amplitude_at_octave[ octave ]
-            previous_wavelength_at_octave[ octave ] = scaled_wavelength_at_octave[ octave ]
+        for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
+            if ( amplitude_at_octave[ octave ] != previous_amplitude_at_octave[ octave ] ) or ( scaled_wavelength_at_octave[ octave ] != previous_wavelength_at_octave[ octave ] ):
+                previous_amplitude_at_octave[ octave ] = amplitude_at_octave[ octave ]
+                previous_wavelength_at_octave[ octave ] = scaled_wavelength_at_octave[ octave ]
 
 
 #......................................................................
 #  If there is a long time delay that exceeds the normal 8-bit-specified
 #  time delay, create the code for one or more long delays.
 
-            time_since_last_info = time_counter - time_count_at_last_info
-            while time_since_last_info > max_8_bit_value:
+                time_since_last_info = time_counter - time_count_at_last_info
+                while time_since_last_info > max_8_bit_value:
 
-#                print( "long time delay = %d" % time_since_last_info )
+#                    print( "long time delay = %d" % time_since_last_info )
 
-                constant_indicating_time_extension = max_8_bit_value
-                ( packed_value ) = struct.pack( ">B" , constant_indicating_time_extension )
-                compressed_audio_file.write( packed_value )
-#                print( "wrote byte = %d" % constant_indicating_time_extension )
-                if time_since_last_info <= max_16_bit_value:
-                    scaled_time_extension = int( time_since_last_info / ( max_8_bit_value + 1 ) )
-                    ( packed_value ) = struct.pack( ">B" , scaled_time_extension )
+                    constant_indicating_time_extension = max_8_bit_value
+                    ( packed_value ) = struct.pack( ">B" , constant_indicating_time_extension )
                     compressed_audio_file.write( packed_value )
+                    number_of_bytes_written = number_of_bytes_written + len( packed_value )
+#                    print( "wrote byte = %d" % constant_indicating_time_extension )
+                    if time_since_last_info <= max_16_bit_value:
+                        scaled_time_extension = int( time_since_last_info / ( max_8_bit_value + 1 ) )
+                        ( packed_value ) = struct.pack( ">B" , scaled_time_extension )
+                        compressed_audio_file.write( packed_value )
+                        number_of_bytes_written = number_of_bytes_written + len( packed_value )
 
-#                    print( "wrote byte = %d" % scaled_time_extension )
+#                        print( "wrote byte = %d" % scaled_time_extension )
 
-                    time_since_last_info = time_since_last_info - ( scaled_time_extension * ( max_8_bit_value + 1 ) )
-                else:
-                    scaled_time_extension = int( int( time_since_last_info / ( max_16_bit_value + 1 ) ) % ( max_16_bit_value + 1 ) )
-                    ( packed_value ) = struct.pack( ">B" , max_8_bit_value )
-                    compressed_audio_file.write( packed_value )
+                        time_since_last_info = time_since_last_info - ( scaled_time_extension * ( max_8_bit_value + 1 ) )
+                    else:
+                        scaled_time_extension = int( int( time_since_last_info / ( max_16_bit_value + 1 ) ) % ( max_16_bit_value + 1 ) )
+                        ( packed_value ) = struct.pack( ">B" , max_8_bit_value )
+                        compressed_audio_file.write( packed_value )
+                        number_of_bytes_written = number_of_bytes_written + len( packed_value )
 
-#                    print( "wrote byte = %d" % scaled_time_extension )
+#                        print( "wrote byte = %d" % scaled_time_extension )
 
-                    ( packed_value ) = struct.pack( ">B" , scaled_time_extension )
-                    compressed_audio_file.write( packed_value )
+                        ( packed_value ) = struct.pack( ">B" , scaled_time_extension )
+                        compressed_audio_file.write( packed_value )
+                        number_of_bytes_written = number_of_bytes_written + len( packed_value )
 
-#                    print( "wrote byte = %d" % scaled_time_extension )
+#                        print( "wrote byte = %d" % scaled_time_extension )
 
-                    time_since_last_info = time_since_last_info - ( scaled_time_extension * ( max_16_bit_value + 1 ) )
+                        time_since_last_info = time_since_last_info - ( scaled_time_extension * ( max_16_bit_value + 1 ) )
+                    # }
                 # }
-            # }
 
 
 #......................................................................
 #  Calculate the 8-bit values for the wavelength and amplitude.
 
-            channel_number = 1
-            octave_number = octave
-            channel_and_octave_numbers_combined = ( channel_number * ( max_4_bit_value + 1 ) ) + octave_number
+                channel_number = 1
+                octave_number = octave
+                channel_and_octave_numbers_combined = ( channel_number * ( max_4_bit_value + 1 ) ) + octave_number
 
-            wavelength_value_for_compression = scaled_wavelength_at_octave[ octave ]
+                wavelength_value_for_compression = scaled_wavelength_at_octave[ octave ]
 
-            amplitude_value_for_compression = int( amplitude_at_octave[ octave ] / number_of_samples_for_wavelength_measurement )
-            if amplitude_value_for_compression < 0 or wavelength_value_for_compression < 1:
-                amplitude_value_for_compression = 1
-            # }
-            amplitude_value_for_compression = int( amplitude_value_for_compression * ( 2 ** ( -10 ) ) )
-            if amplitude_value_for_compression > max_8_bit_value:
-                amplitude_value_for_compression = max_8_bit_value
-            elif amplitude_value_for_compression < - max_8_bit_value:
-                amplitude_value_for_compression = - max_8_bit_value
-            # }
+                amplitude_value_for_compression = int( amplitude_at_octave[ octave ] / number_of_samples_for_wavelength_measurement )
+                if amplitude_value_for_compression < 0 or wavelength_value_for_compression < 1:
+                    amplitude_value_for_compression = 1
+                # }
+                amplitude_value_for_compression = int( amplitude_value_for_compression * ( 2 ** ( -10 ) ) )
+                if amplitude_value_for_compression > max_8_bit_value:
+                    amplitude_value_for_compression = max_8_bit_value
+                elif amplitude_value_for_compression < - max_8_bit_value:
+                    amplitude_value_for_compression = - max_8_bit_value
+                # }
 
 
 #......................................................................
 #  Write the binary QRST-compressed data to the file.
 
-            ( packed_value ) = struct.pack( ">BBBB" , time_since_last_info , channel_and_octave_numbers_combined , wavelength_value_for_compression , amplitude_value_for_compression )
-            compressed_audio_file.write( packed_value )
-            time_count_at_last_info = time_counter
+                ( packed_value ) = struct.pack( ">BBBB" , time_since_last_info , channel_and_octave_numbers_combined , wavelength_value_for_compression , amplitude_value_for_compression )
+                compressed_audio_file.write( packed_value )
+                number_of_bytes_written = number_of_bytes_written + len( packed_value )
+                number_of_records_written = number_of_records_written + 1
+                time_count_at_last_info = time_counter
 
-#            print( "[data written:  oct=%d  wav=%d  amp=%d]\n" % ( octave_number , wavelength_value_for_compression , amplitude_value_for_compression ) )
+#                print( "[data written:  oct=%d  wav=%d  amp=%d]\n" % ( octave_number , wavelength_value_for_compression , amplitude_value_for_compression ) )
 
 
 #......................................................................
-#  Repeat the loop for the next octave that has a change in amplitude
-#  or wavelength.
+#  If the metrics are used, count an octave value that is not written
+#  because its amplitude and wavelength are the same as at the
+#  previous sample.  (A measurement is always followed by a zero
+#  wavelength, so nearly all of these are the unchanged zero values
+#  between measurements.)  Then repeat the loop for the next octave.
+
+            elif metrics is not None:
+                metrics.records_suppressed = metrics.records_suppressed + 1
+            # }
+        # }
+
 
+#......................................................................
+#  Update the metrics, if they are used.
+
+        if metrics is not None:
+            for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
+                if scaled_wavelength_at_octave[ octave ] != 0:
+                    metrics.events_at_octave[ octave ] = metrics.events_at_octave[ octave ] + 1
+                # }
+            # }
+            metrics.records_written = number_of_records_written
+            metrics.bytes_written = number_of_bytes_written
+            metrics.samples_processed = metrics.samples_processed + 1
         # }
-    # }
 
 
 #----------------------------------------------------------------------
@@ -347,57 +471,41 @@ for time_counter in range( time_duration ):
 #
 #  TO DO:  Fix calculation of frequency within octave.
 #
-#  Accumulate the power spectrum values.
-
-    for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
-        scaled_wavelength_within_octave = scaled_wavelength_at_octave[ octave ]
-        adjusted_amplitude = amplitude_at_octave[ octave ] * bit_representing_octave_at_octave[ octave ]
-        if adjusted_amplitude > 0:
-
-            scale_to_calculate_frequency_within_octave = 1 / 128
-            # TO DO:  Use correct logrithmic scale to convert from wavelength to frequency (within octave).
-            frequency_within_octave = scale_to_calculate_frequency_within_octave * scaled_wavelength_within_octave
-
-            if frequency_within_octave > 1.0:
-                frequency_within_octave = 1.0
-            elif frequency_within_octave < 0.0:
-                frequency_within_octave = 0.0
-            # }
-            frequency_segment = int( 5 * ( octave + frequency_within_octave ) )
-
-#            print( "[oct %d  ;  wavelength %f  ;  freq within oct %f  ;  frequency segment %d  ;  amplitude %d]" % ( octave , wavelength_within_octave , frequency_within_octave , frequency_segment , adjusted_amplitude ) )
-
-            if ( frequency_segment < highest_allowed_frequency_segment ):
-                total_amplitude_at_frequency_segment_at_time_segment[ frequency_segment ][ time_segment ] = total_amplitude_at_frequency_segment_at_time_segment[ frequency_segment ][ time_segment ] + adjusted_amplitude
-                if total_amplitude_at_frequency_segment_at_time_segment[ frequency_segment ][ time_segment ] > highest_amplitude:
-                    highest_amplitude = total_amplitude_at_frequency_segment_at_time_segment[ frequency_segment ][ time_segment ]
-                # }
-            # }
-            if frequency_segment > highest_used_frequency_segment:
-                highest_used_frequency_segment = frequency_segment
-            # }
-            if frequency_segment < lowest_used_frequency_segment:
-                lowest_used_frequency_segment = frequency_segment
+#  Collect the octave results that contribute to the power spectrum,
+#  and add them to the spectrogram in batches.
+
+        for octave in range( highest_octave - number_of_octaves_for_calculations + 1 , highest_octave_plus_one ):
+            if amplitude_at_octave[ octave ] > 0:
+                time_segment_at_pending_result.append( time_segment )
+                octave_at_pending_result.append( octave )
+                amplitude_at_pending_result.append( amplitude_at_octave[ octave ] )
+                scaled_wavelength_at_pending_result.append( scaled_wavelength_at_octave[ octave ] )
             # }
         # }
-    # }
+        if len( octave_at_pending_result ) >= maximum_number_of_pending_results:
+            spectrogram.add_octave_results( time_segment_at_pending_result , octave_at_pending_result , amplitude_at_pending_result , scaled_wavelength_at_pending_result )
+            time_segment_at_pending_result = [ ]
+            octave_at_pending_result = [ ]
+            amplitude_at_pending_result = [ ]
+            scaled_wavelength_at_pending_result = [ ]
+        # }
 
 
 #......................................................................
 #  When requested, start accumulating the spectral-transform data
 #  into a new time segment.
 
-    if spectral_results_output_counter <= 0:
-        time_segment = time_segment + 1
-        spectral_results_output_counter = number_of_cycles_between_accumulated_spectral_results
-    # }
-    spectral_results_output_counter = spectral_results_output_counter - 1
+        if spectral_results_output_counter <= 0:
+            time_segment = time_segment + 1
+            spectral_results_output_counter = number_of_cycles_between_accumulated_spectral_results
+        # }
+        spectral_results_output_counter = spectral_results_output_counter - 1
 
 
 #----------------------------------------------------------------------
 #  Repeat the loop for the next waveform sample.
 
-# }
+    # }
 
 
 #----------------------------------------------------------------------
@@ -407,30 +515,31 @@ for time_counter in range( time_duration ):
 #  Write the spectral-transform calculated data into a file
 #  (as tab-separated values so they can be plotted).
 
-final_time_segment = time_segment - 1
-print( "#proc getdata\n\tdata:" )
-for offset_frequency_segment in range( highest_used_frequency_segment - lowest_used_frequency_segment + 1 ):
-    frequency_segment = lowest_used_frequency_segment + offset_frequency_segment
-    list_of_spectral_info_as_text = [ ]
-    list_of_spectral_info_as_text.append( ( "%d" % frequency_segment ) )
-    for time_segment in range( final_time_segment + 1 ):
-        plot_offset_per_time_segment = 3
-        value_to_plot = int( ( total_amplitude_at_frequency_segment_at_time_segment[ frequency_segment ][ time_segment ] * 80 / highest_amplitude ) + ( time_segment * plot_offset_per_time_segment ) )
-        if value_to_plot < 0:
-            value_to_plot = 0
-        # }
-        if value_to_plot > 100:
-            value_to_plot = 100
-        # }
-        list_of_spectral_info_as_text.append( ( "%d" % value_to_plot ) )
+    input_waveform_file.close( )
+    compressed_audio_file.close( )
+    spectrogram.add_octave_results( time_segment_at_pending_result , octave_at_pending_result , amplitude_at_pending_result , scaled_wavelength_at_pending_result )
+    final_time_segment = time_segment - 1
+    spectrogram.write_ploticus_data( sys.stdout , final_time_segment )
+    if metrics_publisher is not None:
+        metrics_publisher.stop( )
+    # }
+    if columnar_store is not None:
+        columnar_store.close( number_of_samples_processed )
     # }
-    output_string = "\t".join( list_of_spectral_info_as_text )
-    print( "\t%s" % output_string )
-# }
 
 
 #----------------------------------------------------------------------
 #  All done.
 
+# }
+
+
+#----------------------------------------------------------------------
+#  Compress the audio when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
 
 #----------------------------------------------------------------------
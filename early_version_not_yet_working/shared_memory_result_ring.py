@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        shared_memory_result_ring.py
+#        ----------------------------
+#
+#  Shares the octave results of one Quick Rolling Spectral Transform
+#  (QRST) stream with several consumer processes -- such as an
+#  encoder, a display, and an analytics job -- so that the QRST
+#  function runs only once.
+#
+#  The publisher writes each octave result, with a sequence number,
+#  into a ring of fixed-size records in a block of shared memory (from
+#  the "multiprocessing.shared_memory" library).  Each reader attaches
+#  to the shared memory by name, keeps track of the next sequence
+#  number it needs, and receives the new results as NumPy views into
+#  the shared memory, without copying.  A reader that falls more than
+#  one ring behind is told how many results it lost.
+#
+#  The shared memory starts with a header that contains -- as 64-bit
+#  integers -- an identifying value, the format version, the number
+#  of records in the ring, the size of each record, the sequence
+#  number after the results that the publisher is writing (the claimed
+#  end), the sequence number after the results that have been fully
+#  written (the published end), and an indication that the publisher
+#  has finished.  The publisher increases the claimed end before it
+#  overwrites any records, and increases the published end afterwards.
+#  A reader uses results only up to the published end, and after
+#  using them it checks the claimed end to find out whether any of
+#  them were overwritten while they were in use.
+#
+#  On Python versions before 3.13, readers should be started by the
+#  publisher's process with the "multiprocessing" library, so that
+#  they share its resource tracker.  Otherwise the shared memory is
+#  removed when the first reader exits.
+#
+#  Sample usage from the command line, which runs the QRST function
+#  once on a test signal and shares its results with three readers:
+#
+#      python shared_memory_result_ring.py --readers 3
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import multiprocessing
+import time
+
+from multiprocessing import shared_memory
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Specify the layout of the shared memory.
+
+record_type = numpy.dtype( [ ( "sequence_number" , "<i8" ) , ( "sample_number" , "<i8" ) , ( "octave" , "<i4" ) , ( "scaled_wavelength" , "<i4" ) , ( "amplitude" , "<f8" ) ] )
+
+identifying_value = 0x5152535452494e47
+
+format_version = 1
+
+header_position_of_identifying_value = 0
+header_position_of_format_version = 1
+header_position_of_number_of_records = 2
+header_position_of_record_size = 3
+header_position_of_claimed_end = 4
+header_position_of_published_end = 5
+header_position_of_finished_indicator = 6
+
+number_of_header_values = 8
+
+size_of_header = number_of_header_values * 8
+
+default_number_of_records = 65536
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that attaches to existing shared memory without
+#  making this process responsible for removing it, when the Python
+#  version allows that.
+
+def attach_to_shared_memory( name ):
+
+    "Attaches to existing shared memory by name"
+
+    try:
+        return shared_memory.SharedMemory( name=name , track=False )
+    except TypeError:
+        return shared_memory.SharedMemory( name=name )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that publishes the results.
+
+class SharedMemoryResultPublisher:
+
+    "Writes QRST octave results into a ring of records in shared memory"
+
+
+#----------------------------------------------------------------------
+#  Create the shared memory and its header.  When no name is
+#  specified, a unique name is chosen, and readers get it from the
+#  "name" attribute.
+
+    def __init__( self , number_of_records=default_number_of_records , name=None ):
+        self.shared_memory = shared_memory.SharedMemory( name=name , create=True , size=( size_of_header + ( number_of_records * record_type.itemsize ) ) )
+        self.name = self.shared_memory.name
+        self.number_of_records = number_of_records
+        self.header = numpy.ndarray( ( number_of_header_values , ) , dtype="<i8" , buffer=self.shared_memory.buf )
+        self.records = numpy.ndarray( ( number_of_records , ) , dtype=record_type , buffer=self.shared_memory.buf , offset=size_of_header )
+        self.header[ : ] = 0
+        self.header[ header_position_of_format_version ] = format_version
+        self.header[ header_position_of_number_of_records ] = number_of_records
+        self.header[ header_position_of_record_size ] = record_type.itemsize
+        self.header[ header_position_of_identifying_value ] = identifying_value
+        self.next_sequence_number = 0
+    # }
+
+
+#----------------------------------------------------------------------
+#  Publish the octave results returned by the
+#  "quick_rolling_spectral_transform_for_block" function.  The sample
+#  offsets within the block are converted to sample numbers.  When
+#  there are more results than records, only the latest results are
+#  written, but every result still uses a sequence number.
+
+    def publish_octave_results_for_block( self , list_of_octave_results , sample_number_at_start_of_block ):
+        number_of_results = len( list_of_octave_results )
+        if number_of_results == 0:
+            return
+        # }
+        octave_results = numpy.array( list_of_octave_results , dtype=numpy.float64 ).reshape( number_of_results , 4 )
+        first_sequence_number = self.next_sequence_number
+        end_sequence_number = first_sequence_number + number_of_results
+        number_to_write = min( number_of_results , self.number_of_records )
+        self.header[ header_position_of_claimed_end ] = end_sequence_number
+
+        sequence_numbers = numpy.arange( end_sequence_number - number_to_write , end_sequence_number , dtype=numpy.int64 )
+        new_records = numpy.empty( number_to_write , dtype=record_type )
+        new_records[ "sample_number" ] = sample_number_at_start_of_block + octave_results[ ( number_of_results - number_to_write ) : , 0 ].astype( numpy.int64 )
+        new_records[ "octave" ] = octave_results[ ( number_of_results - number_to_write ) : , 1 ]
+        new_records[ "amplitude" ] = octave_results[ ( number_of_results - number_to_write ) : , 2 ]
+        new_records[ "scaled_wavelength" ] = octave_results[ ( number_of_results - number_to_write ) : , 3 ]
+        new_records[ "sequence_number" ] = sequence_numbers
+        positions = sequence_numbers % self.number_of_records
+        self.records[ positions ] = new_records
+
+        self.header[ header_position_of_published_end ] = end_sequence_number
+        self.next_sequence_number = end_sequence_number
+    # }
+
+
+#----------------------------------------------------------------------
+#  Indicate to the readers that no more results will be published.
+
+    def finish( self ):
+        self.header[ header_position_of_finished_indicator ] = 1
+    # }
+
+
+#----------------------------------------------------------------------
+#  Close and remove the shared memory.  Readers that are still attached
+#  can continue to use it until they close it.
+
+    def close( self ):
+        del self.header
+        del self.records
+        self.shared_memory.close( )
+        self.shared_memory.unlink( )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that reads the results.
+
+class SharedMemoryResultReader:
+
+    "Reads QRST octave results from a ring of records in shared memory, without copying them"
+
+
+#----------------------------------------------------------------------
+#  Attach to the shared memory and check its header.  A new reader
+#  starts with the next result to be published, unless it is asked to
+#  start with the oldest result that is still in the ring.
+
+    def __init__( self , name , start_with_oldest_result=False ):
+        self.shared_memory = attach_to_shared_memory( name )
+        self.header = numpy.ndarray( ( number_of_header_values , ) , dtype="<i8" , buffer=self.shared_memory.buf )
+        if ( self.header[ header_position_of_identifying_value ] != identifying_value ) or ( self.header[ header_position_of_format_version ] != format_version ) or ( self.header[ header_position_of_record_size ] != record_type.itemsize ):
+            self.shared_memory.close( )
+            raise ValueError( "shared memory %s does not contain a QRST result ring" % name )
+        # }
+        self.number_of_records = int( self.header[ header_position_of_number_of_records ] )
+        self.records = numpy.ndarray( ( self.number_of_records , ) , dtype=record_type , buffer=self.shared_memory.buf , offset=size_of_header )
+        self.next_sequence_number = int( self.header[ header_position_of_published_end ] )
+        if start_with_oldest_result:
+            self.next_sequence_number = max( 0 , self.next_sequence_number - self.number_of_records )
+        # }
+        self.first_sequence_number_in_views = self.next_sequence_number
+        self.total_number_of_lost_results = 0
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return the results published since the previous request, as a list
+#  of one or two views of the records (two when the results wrap
+#  around the end of the ring), and the number of results that were
+#  lost because this reader fell more than one ring behind.
+
+    def views_of_new_results( self ):
+        published_end = int( self.header[ header_position_of_published_end ] )
+        number_of_lost_results = 0
+        if ( published_end - self.next_sequence_number ) > self.number_of_records:
+            number_of_lost_results = published_end - self.next_sequence_number - self.number_of_records
+            self.next_sequence_number = published_end - self.number_of_records
+        # }
+        self.total_number_of_lost_results = self.total_number_of_lost_results + number_of_lost_results
+        list_of_views = [ ]
+        first_position = self.next_sequence_number % self.number_of_records
+        number_of_new_results = published_end - self.next_sequence_number
+        if number_of_new_results > 0:
+            number_in_first_view = min( number_of_new_results , self.number_of_records - first_position )
+            list_of_views.append( self.records[ first_position : ( first_position + number_in_first_view ) ] )
+            if number_in_first_view < number_of_new_results:
+                list_of_views.append( self.records[ 0 : ( number_of_new_results - number_in_first_view ) ] )
+            # }
+        # }
+        self.first_sequence_number_in_views = self.next_sequence_number
+        self.next_sequence_number = published_end
+        return ( list_of_views , number_of_lost_results )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Indicate whether the results in the most recent views are still
+#  intact.  This should be checked after the results have been used,
+#  because the publisher can overwrite them while they are in use.
+#  If they are not intact, the results that were overwritten are
+#  counted as lost.
+
+    def views_are_still_intact( self ):
+        oldest_intact_sequence_number = int( self.header[ header_position_of_claimed_end ] ) - self.number_of_records
+        if self.first_sequence_number_in_views >= oldest_intact_sequence_number:
+            return True
+        # }
+        self.total_number_of_lost_results = self.total_number_of_lost_results + min( oldest_intact_sequence_number , self.next_sequence_number ) - self.first_sequence_number_in_views
+        return False
+    # }
+
+
+#----------------------------------------------------------------------
+#  Indicate whether the publisher has finished and all its results
+#  have been read.
+
+    def has_finished( self ):
+        return ( self.header[ header_position_of_finished_indicator ] != 0 ) and ( self.next_sequence_number >= int( self.header[ header_position_of_published_end ] ) )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Detach from the shared memory.  Views of the records must not be
+#  used after this.
+
+    def close( self ):
+        del self.header
+        del self.records
+        self.shared_memory.close( )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that runs a sample reader process, which sums
+#  the amplitudes at each octave, and then reports the number of
+#  results that it read and lost.
+
+def run_sample_reader( reader_number , name , seconds_of_delay_per_poll , result_queue ):
+
+    "Reads results from the shared-memory ring and reports a summary"
+
+    reader = SharedMemoryResultReader( name , start_with_oldest_result=True )
+    number_of_results_read = 0
+    number_of_overwritten_views = 0
+    total_amplitude_at_octave = numpy.zeros( 16 )
+    while not reader.has_finished( ):
+        ( list_of_views , number_of_lost_results ) = reader.views_of_new_results( )
+        for view in list_of_views:
+            numpy.add.at( total_amplitude_at_octave , view[ "octave" ] , view[ "amplitude" ] )
+            number_of_results_read = number_of_results_read + len( view )
+        # }
+        if not reader.views_are_still_intact( ):
+            number_of_overwritten_views = number_of_overwritten_views + 1
+        # }
+        time.sleep( seconds_of_delay_per_poll )
+    # }
+    result_queue.put( { "reader_number" : reader_number , "results_read" : number_of_results_read , "results_lost" : reader.total_number_of_lost_results , "overwritten_views" : number_of_overwritten_views , "total_amplitude" : float( numpy.sum( total_amplitude_at_octave ) ) } )
+    reader.close( )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which runs the QRST function once on a
+#  test signal -- one block at a time -- and publishes the results to
+#  the sample readers.
+
+def main( ):
+
+    "Shares the results of one QRST stream with several reader processes"
+
+    parser = argparse.ArgumentParser( description="Shares QRST results with several reader processes through shared memory" )
+    parser.add_argument( "--readers" , type=int , default=3 , help="number of reader processes" )
+    parser.add_argument( "--records" , type=int , default=default_number_of_records , help="number of records in the ring" )
+    parser.add_argument( "--duration" , type=float , default=10.0 , help="seconds of test signal" )
+    parser.add_argument( "--samples-per-block" , type=int , default=1024 , help="samples transformed at a time" )
+    parser.add_argument( "--poll-delay" , type=float , default=0.01 , help="seconds each reader waits between polls" )
+    arguments = parser.parse_args( )
+
+#  The QRST module is only needed by the command-line usage, so it is
+#  only imported here.
+
+    import generate_signal_blocks_for_testing
+    import quick_rolling_spectral_transform
+
+    publisher = SharedMemoryResultPublisher( arguments.records )
+    context = multiprocessing.get_context( "spawn" )
+    result_queue = context.Queue( )
+    list_of_processes = [ context.Process( target=run_sample_reader , args=( reader_number , publisher.name , arguments.poll_delay , result_queue ) ) for reader_number in range( arguments.readers ) ]
+    for process in list_of_processes:
+        process.start( )
+    # }
+
+    parameters = generate_signal_blocks_for_testing.parameters_for_signal( "chirp" , duration_in_seconds=arguments.duration )
+    number_of_samples_so_far = 0
+    total_amplitude_published = 0.0
+    for block in generate_signal_blocks_for_testing.generate_signal_blocks( parameters , arguments.samples_per_block ):
+        list_of_octave_results = quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( block , 8 , 24 , "s16le" , 0 , 100 )
+        publisher.publish_octave_results_for_block( list_of_octave_results , number_of_samples_so_far )
+        total_amplitude_published = total_amplitude_published + sum( [ octave_result[ 2 ] for octave_result in list_of_octave_results ] )
+        number_of_samples_so_far = number_of_samples_so_far + len( block )
+    # }
+    publisher.finish( )
+
+    list_of_summaries = sorted( [ result_queue.get( ) for process in list_of_processes ] , key=lambda summary: summary[ "reader_number" ] )
+    for process in list_of_processes:
+        process.join( )
+    # }
+    publisher.close( )
+    print( "published %d results (total amplitude %.1f)" % ( publisher.next_sequence_number , total_amplitude_published ) )
+    for summary in list_of_summaries:
+        print( "reader %d:  read %d , lost %d , overwritten views %d , total amplitude %.1f" % ( summary[ "reader_number" ] , summary[ "results_read" ] , summary[ "results_lost" ] , summary[ "overwritten_views" ] , summary[ "total_amplitude" ] ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Share the results when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,173 @@
+#----------------------------------------------------------------------
+#
+#          spectrogram_accumulator.py
+#          --------------------------
+#
+#  Accumulates the octave results of the Quick Rolling Spectral
+#  Transform (QRST) function into a spectrogram:  a grid of total
+#  amplitudes at each frequency segment and time segment.  The octave
+#  results are supplied in batches, and are binned into the grid with
+#  NumPy.  The number of time segments grows as needed, so the
+#  duration of the audio does not need to be known in advance.
+#
+#  The grid is written -- in a single write -- as the "ploticus" data
+#  that is written by "sample_usage_of_quick_rolling_spectral_transform.py".
+#
+#  Sample usage:
+#
+#      spectrogram = spectrogram_accumulator.SpectrogramAccumulator( number_of_frequency_segments )
+#      spectrogram.add_octave_results( time_segments , octaves , amplitudes , scaled_wavelengths )
+#      spectrogram.write_ploticus_data( sys.stdout , final_time_segment )
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify a need for the NumPy library.
+
+import numpy
+
+
+#----------------------------------------------------------------------
+#  Initialization.  The highest octave is always 15, and each octave
+#  amplitude is multiplied by the bit that represents its octave
+#  (except for the highest octave, which is multiplied by one).
+
+highest_octave = 15
+
+bit_representing_octave_at_octave = numpy.array( [ ( 2 ** ( highest_octave - octave ) ) for octave in range( highest_octave + 1 ) ] , dtype=numpy.float64 )
+
+bit_representing_octave_at_octave[ highest_octave ] = 1
+
+# TO DO:  Use correct logrithmic scale to convert from wavelength to frequency (within octave).
+scale_to_calculate_frequency_within_octave = 1 / 128
+
+frequency_segments_per_octave = 5
+
+initial_number_of_time_segments = 64
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that calculates -- for a batch of octave results
+#  -- the frequency segment of each result from its octave and its
+#  wavelength within the octave, and the amplitude adjusted by the bit
+#  that represents its octave.
+
+def frequency_segments_and_adjusted_amplitudes( octaves , amplitudes , scaled_wavelengths ):
+
+    "Calculates the frequency segments and adjusted amplitudes of QRST octave results"
+
+    octaves = numpy.asarray( octaves , dtype=numpy.int64 )
+    adjusted_amplitudes = numpy.asarray( amplitudes , dtype=numpy.float64 ) * bit_representing_octave_at_octave[ octaves ]
+    frequencies_within_octave = numpy.clip( scale_to_calculate_frequency_within_octave * numpy.asarray( scaled_wavelengths , dtype=numpy.float64 ) , 0.0 , 1.0 )
+    frequency_segments = numpy.trunc( frequency_segments_per_octave * ( octaves + frequencies_within_octave ) ).astype( numpy.int64 )
+    return ( frequency_segments , adjusted_amplitudes )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that accumulates the spectrogram.
+
+class SpectrogramAccumulator:
+
+    "Accumulates QRST octave results into a grid of frequency segments and time segments"
+
+
+#----------------------------------------------------------------------
+#  Initialize an empty grid.  Octave results at or above the specified
+#  number of frequency segments are not added to the grid, but are
+#  still included in the range of used frequency segments.
+
+    def __init__( self , number_of_frequency_segments ):
+        self.number_of_frequency_segments = number_of_frequency_segments
+        self.total_amplitude_at_frequency_segment_at_time_segment = numpy.zeros( ( number_of_frequency_segments , initial_number_of_time_segments ) , dtype=numpy.float64 )
+        self.number_of_time_segments_used = 0
+        self.lowest_used_frequency_segment = 100
+        self.highest_used_frequency_segment = 0
+        self.highest_amplitude = 0
+    # }
+
+
+#----------------------------------------------------------------------
+#  Double the number of time segments in the grid until it holds the
+#  specified time segment.
+
+    def grow_to_hold_time_segment( self , time_segment ):
+        number_of_time_segments = self.total_amplitude_at_frequency_segment_at_time_segment.shape[ 1 ]
+        if time_segment < number_of_time_segments:
+            return
+        # }
+        while number_of_time_segments <= time_segment:
+            number_of_time_segments = number_of_time_segments * 2
+        # }
+        larger_grid = numpy.zeros( ( self.number_of_frequency_segments , number_of_time_segments ) , dtype=numpy.float64 )
+        larger_grid[ : , 0 : self.number_of_time_segments_used ] = self.total_amplitude_at_frequency_segment_at_time_segment[ : , 0 : self.number_of_time_segments_used ]
+        self.total_amplitude_at_frequency_segment_at_time_segment = larger_grid
+    # }
+
+
+#----------------------------------------------------------------------
+#  Add a batch of octave results, each specified by its time segment,
+#  octave, amplitude, and scaled wavelength.  The frequency segment of
+#  each result is calculated from its octave and its wavelength within
+#  the octave.  Results are added to the grid in the order supplied,
+#  so the totals are the same as when the results are added one at a
+#  time.
+
+    def add_octave_results( self , time_segments , octaves , amplitudes , scaled_wavelengths ):
+        time_segments = numpy.asarray( time_segments , dtype=numpy.int64 )
+        ( frequency_segments , adjusted_amplitudes ) = frequency_segments_and_adjusted_amplitudes( octaves , amplitudes , scaled_wavelengths )
+
+        is_used = adjusted_amplitudes > 0
+        if not numpy.any( is_used ):
+            return
+        # }
+        self.lowest_used_frequency_segment = min( self.lowest_used_frequency_segment , int( numpy.min( frequency_segments[ is_used ] ) ) )
+        self.highest_used_frequency_segment = max( self.highest_used_frequency_segment , int( numpy.max( frequency_segments[ is_used ] ) ) )
+
+        is_added = is_used & ( frequency_segments < self.number_of_frequency_segments )
+        if not numpy.any( is_added ):
+            return
+        # }
+        highest_time_segment = int( numpy.max( time_segments[ is_added ] ) )
+        self.grow_to_hold_time_segment( highest_time_segment )
+        self.number_of_time_segments_used = max( self.number_of_time_segments_used , highest_time_segment + 1 )
+        numpy.add.at( self.total_amplitude_at_frequency_segment_at_time_segment , ( frequency_segments[ is_added ] , time_segments[ is_added ] ) , adjusted_amplitudes[ is_added ] )
+        self.highest_amplitude = max( self.highest_amplitude , float( numpy.max( self.total_amplitude_at_frequency_segment_at_time_segment[ frequency_segments[ is_added ] , time_segments[ is_added ] ] ) ) )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the grid -- from the lowest to the highest used frequency
+#  segment, and from the first to the specified final time segment --
+#  as "ploticus" data.  Each time segment is scaled to at most 80,
+#  offset by three per time segment, and limited to 100.
+
+    def write_ploticus_data( self , output_file , final_time_segment ):
+        plot_offset_per_time_segment = 3
+        self.grow_to_hold_time_segment( final_time_segment )
+        list_of_lines = [ "#proc getdata\n\tdata:\n" ]
+        if self.highest_used_frequency_segment >= self.lowest_used_frequency_segment:
+            amplitudes_to_plot = self.total_amplitude_at_frequency_segment_at_time_segment[ self.lowest_used_frequency_segment : ( self.highest_used_frequency_segment + 1 ) , 0 : ( final_time_segment + 1 ) ]
+            values_to_plot = numpy.trunc( ( ( amplitudes_to_plot * 80 ) / self.highest_amplitude ) + ( numpy.arange( final_time_segment + 1 ) * plot_offset_per_time_segment ) )
+            values_to_plot = numpy.clip( values_to_plot , 0 , 100 ).astype( numpy.int64 )
+            for offset_frequency_segment in range( values_to_plot.shape[ 0 ] ):
+                list_of_spectral_info_as_text = [ "%d" % ( self.lowest_used_frequency_segment + offset_frequency_segment ) ]
+                list_of_spectral_info_as_text.extend( [ "%d" % value_to_plot for value_to_plot in values_to_plot[ offset_frequency_segment ].tolist( ) ] )
+                list_of_lines.append( "\t%s\n" % "\t".join( list_of_spectral_info_as_text ) )
+            # }
+        # }
+        output_file.write( "".join( list_of_lines ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,110 @@
+#----------------------------------------------------------------------
+#
+#          stage_profiling_counters.py
+#          ---------------------------
+#
+#  Collects call counts, cumulative time, and work units for each
+#  stage -- and each octave -- of the Quick Rolling Spectral Transform
+#  (QRST) function.  The stages are:  decimation (which calculates
+#  each octave's filtered sample), peak-and-trough line fitting,
+#  the line-crossing cycle counter, and measurement-window
+#  finalization.
+#
+#  The counters are used only when they are supplied to the QRST
+#  function, with:
+#
+#      counters = stage_profiling_counters.StageProfilingCounters( )
+#      quick_rolling_spectral_transform.enable_stage_profiling( counters )
+#
+#  and at any time -- including from another thread -- a snapshot of
+#  the counters can be requested with:  counters.snapshot( )
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the stage numbers, the stage names, and the name of the
+#  work unit counted at each stage.
+
+stage_decimation = 0
+stage_peak_trough_line_fitting = 1
+stage_line_crossing_cycle_counter = 2
+stage_measurement_window_finalization = 3
+
+number_of_stages = 4
+
+name_for_stage = [ "decimation" , "peak_trough_line_fitting" , "line_crossing_cycle_counter" , "measurement_window_finalization" ]
+
+name_for_work_unit_at_stage = [ "filtered_samples" , "gap_to_line_evaluations" , "samples_compared_with_center_line" , "measurements_finalized" ]
+
+highest_octave = 15
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that holds the counters.
+
+class StageProfilingCounters:
+
+    "Holds call counts, cumulative time, and work units for each QRST stage and octave"
+
+
+#----------------------------------------------------------------------
+#  Initialize the counters to zero.
+
+    def __init__( self ):
+        self.reset( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Reset all the counters to zero.
+
+    def reset( self ):
+        self.call_count_at_stage_and_octave = [ [ 0 for octave in range( highest_octave + 1 ) ] for stage in range( number_of_stages ) ]
+        self.cumulative_seconds_at_stage_and_octave = [ [ 0.0 for octave in range( highest_octave + 1 ) ] for stage in range( number_of_stages ) ]
+        self.work_units_at_stage_and_octave = [ [ 0 for octave in range( highest_octave + 1 ) ] for stage in range( number_of_stages ) ]
+    # }
+
+
+#----------------------------------------------------------------------
+#  Add one call -- and its elapsed time and work units -- to the
+#  counters for the specified stage and octave.
+
+    def add_to_stage( self , stage , octave , elapsed_seconds , work_units ):
+        self.call_count_at_stage_and_octave[ stage ][ octave ] = self.call_count_at_stage_and_octave[ stage ][ octave ] + 1
+        self.cumulative_seconds_at_stage_and_octave[ stage ][ octave ] = self.cumulative_seconds_at_stage_and_octave[ stage ][ octave ] + elapsed_seconds
+        self.work_units_at_stage_and_octave[ stage ][ octave ] = self.work_units_at_stage_and_octave[ stage ][ octave ] + work_units
+    # }
+
+
+#----------------------------------------------------------------------
+#  Return a snapshot of the counters, as a dictionary (which can be
+#  written as JSON) that contains -- for each stage -- the totals and
+#  the values at each octave that has been used.
+
+    def snapshot( self ):
+        snapshot_of_stages = { }
+        for stage in range( number_of_stages ):
+            call_counts = list( self.call_count_at_stage_and_octave[ stage ] )
+            cumulative_seconds = list( self.cumulative_seconds_at_stage_and_octave[ stage ] )
+            work_units = list( self.work_units_at_stage_and_octave[ stage ] )
+            values_at_octave = { }
+            for octave in range( highest_octave + 1 ):
+                if call_counts[ octave ] > 0:
+                    values_at_octave[ octave ] = { "calls" : call_counts[ octave ] , "seconds" : cumulative_seconds[ octave ] , name_for_work_unit_at_stage[ stage ] : work_units[ octave ] }
+                # }
+            # }
+            snapshot_of_stages[ name_for_stage[ stage ] ] = { "calls" : sum( call_counts ) , "seconds" : sum( cumulative_seconds ) , name_for_work_unit_at_stage[ stage ] : sum( work_units ) , "octaves" : values_at_octave }
+        # }
+        return snapshot_of_stages
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+#
+#----------------------------------------------------------------------
+#
+#        write_spectrogram_image_tiles.py
+#        --------------------------------
+#
+#  Writes the octave results of the Quick Rolling Spectral Transform
+#  (QRST) function as a spectrogram made of greyscale image tiles.
+#  Each tile covers a fixed number of time segments, and is written
+#  to disk -- as a PGM or PNG file -- as soon as it is complete, so
+#  only the current tile is kept in memory, regardless of the length
+#  of the recording.
+#
+#  As each tile is written, a downsampled summary of the tile (the
+#  highest amplitude within each group of time segments) is appended
+#  to a summary file, and the summaries are later assembled into a
+#  single overview image of the whole recording.
+#
+#  In the images, time increases to the right, frequency increases
+#  upward, and brightness is proportional to the amplitude in
+#  decibels, over the specified dynamic range below the full-scale
+#  amplitude.  When a full-scale amplitude is not specified, each tile
+#  uses the highest amplitude found so far, and the overview image uses
+#  the highest amplitude in the whole recording.
+#
+#  Sample usage as a library:
+#
+#      tile_writer = write_spectrogram_image_tiles.SpectrogramImageTileWriter( "tiles" , 40 , 81 )
+#      tile_writer.add_octave_results( time_segments , octaves , amplitudes , scaled_wavelengths )
+#      tile_writer.finish( )
+#      tile_writer.write_overview_image( "tiles/overview.png" )
+#
+#  Sample usage from the command line:
+#
+#      python write_spectrogram_image_tiles.py --input long_recording.raw --directory tiles --format png
+#
+#  This code is licensed under the Perl Artistic License
+#  version 2.0 (see www.perlfoundation.org/artistic_license_2_0
+#  or the copy included in the directory containing this code).
+#
+#----------------------------------------------------------------------
+
+
+#----------------------------------------------------------------------
+#  Specify the needed libraries.
+
+import argparse
+import os
+import struct
+import zlib
+
+import numpy
+
+import spectrogram_accumulator
+
+
+#----------------------------------------------------------------------
+#  Specify the default settings.
+
+default_time_segments_per_tile = 1024
+
+default_time_segments_per_summary_column = 16
+
+default_dynamic_range_in_decibels = 60.0
+
+default_samples_per_time_segment = 128
+
+name_for_summary_file = "overview_summary.f32"
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that converts amplitudes to greyscale brightness
+#  values, from 0 (black) to 255 (white), using a decibel scale.
+
+def brightness_for_amplitudes( amplitudes , full_scale_amplitude , dynamic_range_in_decibels ):
+
+    "Converts amplitudes to greyscale brightness values"
+
+    if full_scale_amplitude <= 0:
+        return numpy.zeros( amplitudes.shape , dtype=numpy.uint8 )
+    # }
+    with numpy.errstate( divide="ignore" ):
+        decibels = 20 * numpy.log10( amplitudes / full_scale_amplitude )
+    # }
+    brightness = 255 * ( 1 + ( decibels / dynamic_range_in_decibels ) )
+    return numpy.clip( numpy.nan_to_num( brightness , nan=0.0 , neginf=0.0 ) , 0 , 255 ).astype( numpy.uint8 )
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes greyscale pixels -- rows of 8-bit
+#  values -- as a binary PGM file.
+
+def write_pgm_image( path_to_file , pixels ):
+
+    "Writes greyscale pixels to a PGM file"
+
+    with open( path_to_file , "wb" ) as image_file:
+        image_file.write( ( "P5\n%d %d\n255\n" % ( pixels.shape[ 1 ] , pixels.shape[ 0 ] ) ).encode( "ascii" ) )
+        image_file.write( numpy.ascontiguousarray( pixels ).tobytes( ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes greyscale pixels as a PNG file, using
+#  only the "zlib" library.  Each row starts with a zero byte, which
+#  indicates that the row is not filtered.
+
+def write_png_image( path_to_file , pixels ):
+
+    "Writes greyscale pixels to a PNG file"
+
+    def chunk( chunk_type , chunk_data ):
+        return struct.pack( ">I" , len( chunk_data ) ) + chunk_type + chunk_data + struct.pack( ">I" , zlib.crc32( chunk_type + chunk_data ) & 0xffffffff )
+    # }
+
+    filtered_rows = numpy.zeros( ( pixels.shape[ 0 ] , pixels.shape[ 1 ] + 1 ) , dtype=numpy.uint8 )
+    filtered_rows[ : , 1 : ] = pixels
+    header = struct.pack( ">IIBBBBB" , pixels.shape[ 1 ] , pixels.shape[ 0 ] , 8 , 0 , 0 , 0 , 0 )
+    with open( path_to_file , "wb" ) as image_file:
+        image_file.write( b"\x89PNG\r\n\x1a\n" )
+        image_file.write( chunk( b"IHDR" , header ) )
+        image_file.write( chunk( b"IDAT" , zlib.compress( filtered_rows.tobytes( ) , 6 ) ) )
+        image_file.write( chunk( b"IEND" , b"" ) )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define a function that writes greyscale pixels in the specified
+#  image format.
+
+def write_image( path_to_file , pixels , image_format ):
+
+    "Writes greyscale pixels to a PGM or PNG file"
+
+    if image_format == "png":
+        write_png_image( path_to_file , pixels )
+    else:
+        write_pgm_image( path_to_file , pixels )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the class that writes the tiles.
+
+class SpectrogramImageTileWriter:
+
+    "Writes QRST octave results as a series of spectrogram image tiles"
+
+
+#----------------------------------------------------------------------
+#  Initialize the first tile.  Only frequency segments from the lowest
+#  to the highest specified frequency segment are shown.
+
+    def __init__( self , directory , lowest_frequency_segment , highest_frequency_segment , time_segments_per_tile=default_time_segments_per_tile , time_segments_per_summary_column=default_time_segments_per_summary_column , image_format="pgm" , full_scale_amplitude=None , dynamic_range_in_decibels=default_dynamic_range_in_decibels ):
+        if image_format not in ( "pgm" , "png" ):
+            raise ValueError( "unknown image format:  %s" % image_format )
+        # }
+        if ( time_segments_per_tile % time_segments_per_summary_column ) != 0:
+            raise ValueError( "the time segments per tile must be a multiple of the time segments per summary column" )
+        # }
+        self.directory = directory
+        self.lowest_frequency_segment = lowest_frequency_segment
+        self.number_of_frequency_segments = highest_frequency_segment - lowest_frequency_segment + 1
+        self.time_segments_per_tile = time_segments_per_tile
+        self.time_segments_per_summary_column = time_segments_per_summary_column
+        self.image_format = image_format
+        self.full_scale_amplitude = full_scale_amplitude
+        self.dynamic_range_in_decibels = dynamic_range_in_decibels
+        self.amplitude_at_frequency_segment_at_time_segment_in_tile = numpy.zeros( ( self.number_of_frequency_segments , time_segments_per_tile ) , dtype=numpy.float64 )
+        self.tile_number = 0
+        self.number_of_time_segments_used_in_tile = 0
+        self.highest_amplitude = 0.0
+        self.list_of_tile_files = [ ]
+        os.makedirs( directory , exist_ok=True )
+        self.summary_file = open( os.path.join( directory , name_for_summary_file ) , "wb" )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the current tile and its summary, and then clear the tile.
+#  Only the used part of the final tile is written.
+
+    def write_tile( self , number_of_time_segments ):
+        amplitudes_in_tile = self.amplitude_at_frequency_segment_at_time_segment_in_tile[ : , 0 : number_of_time_segments ]
+        if amplitudes_in_tile.size > 0:
+            self.highest_amplitude = max( self.highest_amplitude , float( numpy.max( amplitudes_in_tile ) ) )
+        # }
+        full_scale_amplitude = self.full_scale_amplitude
+        if full_scale_amplitude is None:
+            full_scale_amplitude = self.highest_amplitude
+        # }
+        pixels = brightness_for_amplitudes( amplitudes_in_tile[ : : -1 ] , full_scale_amplitude , self.dynamic_range_in_decibels )
+        path_to_tile = os.path.join( self.directory , "spectrogram_tile_%06d.%s" % ( self.tile_number , self.image_format ) )
+        write_image( path_to_tile , pixels , self.image_format )
+        self.list_of_tile_files.append( path_to_tile )
+
+        number_of_summary_columns = - ( - number_of_time_segments // self.time_segments_per_summary_column )
+        summary = self.amplitude_at_frequency_segment_at_time_segment_in_tile[ : , 0 : ( number_of_summary_columns * self.time_segments_per_summary_column ) ]
+        summary = summary.reshape( self.number_of_frequency_segments , number_of_summary_columns , self.time_segments_per_summary_column ).max( axis=2 )
+        self.summary_file.write( numpy.ascontiguousarray( summary.T , dtype="<f4" ).tobytes( ) )
+
+        self.amplitude_at_frequency_segment_at_time_segment_in_tile[ : , : ] = 0
+        self.tile_number = self.tile_number + 1
+        self.number_of_time_segments_used_in_tile = 0
+    # }
+
+
+#----------------------------------------------------------------------
+#  Add a batch of octave results, each specified by its time segment,
+#  octave, amplitude, and scaled wavelength.  The time segments must
+#  not decrease -- from one result to the next, or from one batch to
+#  the next -- because each tile is written when a later tile is
+#  reached.  Tiles without any results are written as black tiles.
+
+    def add_octave_results( self , time_segments , octaves , amplitudes , scaled_wavelengths ):
+        time_segments = numpy.asarray( time_segments , dtype=numpy.int64 )
+        if len( time_segments ) == 0:
+            return
+        # }
+        ( frequency_segments , adjusted_amplitudes ) = spectrogram_accumulator.frequency_segments_and_adjusted_amplitudes( octaves , amplitudes , scaled_wavelengths )
+        rows = frequency_segments - self.lowest_frequency_segment
+        is_shown = ( adjusted_amplitudes > 0 ) & ( rows >= 0 ) & ( rows < self.number_of_frequency_segments )
+        tile_numbers = time_segments // self.time_segments_per_tile
+        if tile_numbers[ 0 ] < self.tile_number:
+            raise ValueError( "time segment %d belongs to a tile that has already been written" % time_segments[ 0 ] )
+        # }
+        for tile_number in range( self.tile_number , int( tile_numbers[ -1 ] ) + 1 ):
+            if tile_number > self.tile_number:
+                self.write_tile( self.time_segments_per_tile )
+            # }
+            is_in_tile = is_shown & ( tile_numbers == tile_number )
+            columns = time_segments[ is_in_tile ] - ( tile_number * self.time_segments_per_tile )
+            numpy.add.at( self.amplitude_at_frequency_segment_at_time_segment_in_tile , ( rows[ is_in_tile ] , columns ) , adjusted_amplitudes[ is_in_tile ] )
+        # }
+        self.number_of_time_segments_used_in_tile = max( self.number_of_time_segments_used_in_tile , int( time_segments[ -1 ] - ( self.tile_number * self.time_segments_per_tile ) ) + 1 )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Write the final tile, which contains the time segments up to the
+#  specified final time segment, or else the time segments that have
+#  been used.
+
+    def finish( self , final_time_segment=None ):
+        number_of_time_segments = self.number_of_time_segments_used_in_tile
+        if final_time_segment is not None:
+            while ( final_time_segment // self.time_segments_per_tile ) > self.tile_number:
+                self.write_tile( self.time_segments_per_tile )
+            # }
+            number_of_time_segments = final_time_segment - ( self.tile_number * self.time_segments_per_tile ) + 1
+        # }
+        if number_of_time_segments > 0:
+            self.write_tile( number_of_time_segments )
+        # }
+        self.summary_file.close( )
+    # }
+
+
+#----------------------------------------------------------------------
+#  Assemble the overview image from the tile summaries.  Only the
+#  summaries -- not the tiles -- are read.
+
+    def write_overview_image( self , path_to_file , image_format=None ):
+        if image_format is None:
+            image_format = os.path.splitext( path_to_file )[ 1 ].lstrip( "." ).lower( )
+        # }
+        summary = numpy.fromfile( os.path.join( self.directory , name_for_summary_file ) , dtype="<f4" ).reshape( -1 , self.number_of_frequency_segments ).T
+        full_scale_amplitude = self.full_scale_amplitude
+        if full_scale_amplitude is None:
+            full_scale_amplitude = self.highest_amplitude
+        # }
+        pixels = brightness_for_amplitudes( summary[ : : -1 ] , full_scale_amplitude , self.dynamic_range_in_decibels )
+        write_image( path_to_file , pixels , image_format )
+    # }
+
+# }
+
+
+#----------------------------------------------------------------------
+#----------------------------------------------------------------------
+#  Define the main function, which applies the QRST function to a raw
+#  file of little-endian signed 16-bit samples -- one block at a time
+#  -- and writes the spectrogram tiles and the overview image.
+
+def main( ):
+
+    "Writes spectrogram image tiles for a raw 16-bit audio file"
+
+    parser = argparse.ArgumentParser( description="Writes QRST spectrogram image tiles for a raw 16-bit audio file" )
+    parser.add_argument( "--input" , default="output_binary_signal_for_testing_qrst.raw" , help="raw file of little-endian signed 16-bit samples" )
+    parser.add_argument( "--directory" , default="output_spectrogram_tiles" , help="directory for the tiles and the overview image" )
+    parser.add_argument( "--format" , choices=( "pgm" , "png" ) , default="png" , help="image format" )
+    parser.add_argument( "--octaves" , type=int , default=8 , help="number of octaves for calculations" )
+    parser.add_argument( "--measurement-samples" , type=int , default=24 , help="number of samples for wavelength measurement" )
+    parser.add_argument( "--samples-per-time-segment" , type=int , default=default_samples_per_time_segment , help="samples in each image column" )
+    parser.add_argument( "--time-segments-per-tile" , type=int , default=default_time_segments_per_tile , help="image columns in each tile" )
+    parser.add_argument( "--time-segments-per-summary-column" , type=int , default=default_time_segments_per_summary_column , help="tile columns in each overview column" )
+    parser.add_argument( "--dynamic-range" , type=float , default=default_dynamic_range_in_decibels , help="decibels from black to white" )
+    parser.add_argument( "--samples-per-block" , type=int , default=8192 , help="samples read and transformed at a time" )
+    arguments = parser.parse_args( )
+
+#  The QRST module is only needed by the command-line usage, so it is
+#  only imported here.
+
+    import quick_rolling_spectral_transform
+
+    highest_octave = 15
+    lowest_frequency_segment = spectrogram_accumulator.frequency_segments_per_octave * ( highest_octave - arguments.octaves + 1 )
+    highest_frequency_segment = spectrogram_accumulator.frequency_segments_per_octave * ( highest_octave + 1 )
+    tile_writer = SpectrogramImageTileWriter( arguments.directory , lowest_frequency_segment , highest_frequency_segment , arguments.time_segments_per_tile , arguments.time_segments_per_summary_column , arguments.format , dynamic_range_in_decibels=arguments.dynamic_range )
+
+    scale_for_amplitude = 100
+    number_of_samples_so_far = 0
+    with open( arguments.input , "rb" ) as input_waveform_file:
+        while True:
+            block_of_bytes = input_waveform_file.read( 2 * arguments.samples_per_block )
+            if len( block_of_bytes ) < 2:
+                break
+            # }
+            block_of_samples = memoryview( block_of_bytes )[ 0 : ( 2 * ( len( block_of_bytes ) // 2 ) ) ].cast( "h" )
+            list_of_octave_results = quick_rolling_spectral_transform.quick_rolling_spectral_transform_for_block( block_of_samples , arguments.octaves , arguments.measurement_samples , "s16le" , 0 , scale_for_amplitude )
+            if list_of_octave_results == 1:
+                raise SystemExit( "invalid parameters for the QRST function" )
+            # }
+            if len( list_of_octave_results ) > 0:
+                octave_results = numpy.array( list_of_octave_results , dtype=numpy.float64 )
+                sample_numbers = number_of_samples_so_far + octave_results[ : , 0 ].astype( numpy.int64 )
+                tile_writer.add_octave_results( sample_numbers // arguments.samples_per_time_segment , octave_results[ : , 1 ].astype( numpy.int64 ) , octave_results[ : , 2 ] , octave_results[ : , 3 ] )
+            # }
+            number_of_samples_so_far = number_of_samples_so_far + len( block_of_samples )
+        # }
+    # }
+    tile_writer.finish( ( number_of_samples_so_far - 1 ) // arguments.samples_per_time_segment )
+    path_to_overview = os.path.join( arguments.directory , "overview.%s" % arguments.format )
+    tile_writer.write_overview_image( path_to_overview )
+    print( "wrote %d tiles and %s" % ( len( tile_writer.list_of_tile_files ) , path_to_overview ) )
+
+# }
+
+
+#----------------------------------------------------------------------
+#  Write the tiles when this file is executed (not imported).
+
+if __name__ == "__main__":
+    main( )
+# }
+
+
+#----------------------------------------------------------------------